@@ -0,0 +1,199 @@
+"""
+SQLite-Ablage für die Rohdaten der Stufen 01–02 (ersetzt raw_data.xlsx).
+
+Eine Zeile pro Video, Schlüssel ist die YouTube-Video-ID. Jede Stufe schreibt
+nur ihre eigenen Spalten (zeilenweise Upserts), die Excel-Datei ist nur noch
+eine optionale Import-/Export-Ansicht:
+
+    python raw_store.py import raw_data.xlsx    # bestehende Excel übernehmen
+    python raw_store.py export raw_data.xlsx    # Ansicht für 03_segmentation
+    python raw_store.py status
+"""
+
+import sqlite3
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from youtube_url import video_id_from_url
+
+DB_DATEI = "raw_data.sqlite"
+
+# (Spalte in SQLite, SQL-Typ, Spaltenname in der Excel-Ansicht)
+SPALTEN = [
+    ("url", "TEXT", "URL"),
+    ("saison", "TEXT", "Saison"),
+    ("spieltag", "INTEGER", "Spieltag"),
+    ("tabelle", "INTEGER", "Tabelle"),
+    # 01_scraping/youtube_description.py
+    ("titel", "TEXT", "Titel"),
+    ("beschreibung", "TEXT", "Beschreibung"),
+    ("veroeffentlicht", "TEXT", "Veröffentlicht"),
+    ("dauer_s", "INTEGER", "Dauer (s)"),
+    ("metadaten_fehler", "TEXT", "Metadaten Fehler"),
+    # 01_scraping/transcript_api.py
+    ("transkript", "TEXT", "ZDF Transkript"),
+    ("transkript_fehler", "TEXT", "Transkript Fehler"),
+    # 02_preperation/transcript_cleaning.py
+    ("clean_transkript", "TEXT", "Clean Transcript"),
+    ("clean_transkript_fehler", "TEXT", "Clean Transcript Fehler"),
+    # 02_preperation/youtube_extraction.py
+    ("heim_auswaerts", "TEXT", "Heim/Auswärts"),
+    ("gegner", "TEXT", "Gegner"),
+    ("schiedsrichter", "TEXT", "Schiedsrichter"),
+    ("kommentator", "TEXT", "Kommentator"),
+    ("tore_bayern", "INTEGER", "Tore Bayern"),
+    ("tore_gegner", "INTEGER", "Tore Gegner"),
+]
+
+SQL_TYPEN = {name: typ for name, typ, _ in SPALTEN}
+EXCEL_NAMEN = {name: excel for name, _, excel in SPALTEN}
+
+
+def _typed(spalte: str, value):
+    """Wert in den Spaltentyp bringen; leere Zellen und 'Unbekannt' → NULL."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, str) and value.strip() in ("", "Unbekannt", "nan"):
+        return None
+    if SQL_TYPEN[spalte] == "INTEGER":
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+
+class RawStore:
+    """Zeilenweiser Zugriff auf die Video-Tabelle."""
+
+    def __init__(self, path: str | Path = DB_DATEI):
+        self.path = Path(path)
+        # WAL erlaubt Lesen aus anderen Prozessen, während eine Stufe schreibt
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create()
+
+    def _create(self):
+        spalten = ", ".join(f"{name} {typ}" for name, typ, _ in SPALTEN)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS videos (video_id TEXT PRIMARY KEY, {spalten})")
+        # neue Spalten in bestehenden Datenbanken nachziehen
+        vorhanden = {r["name"] for r in self.conn.execute("PRAGMA table_info(videos)")}
+        for name, typ, _ in SPALTEN:
+            if name not in vorhanden:
+                self.conn.execute(f"ALTER TABLE videos ADD COLUMN {name} {typ}")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def video_ids(self) -> list[str]:
+        return [r[0] for r in self.conn.execute("SELECT video_id FROM videos ORDER BY rowid")]
+
+    def get(self, video_id: str) -> dict | None:
+        row = self.conn.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return dict(row) if row else None
+
+    def rows(self, spalten: list[str] | None = None) -> list[dict]:
+        auswahl = "video_id, " + ", ".join(spalten) if spalten else "*"
+        return [dict(r) for r in self.conn.execute(f"SELECT {auswahl} FROM videos ORDER BY rowid")]
+
+    def update(self, video_id: str, **werte):
+        """Setzt nur die übergebenen Spalten einer Zeile (legt sie bei Bedarf an)."""
+        self.update_many({video_id: werte})
+
+    def update_many(self, zeilen: dict[str, dict]):
+        """Mehrere zeilenweise Upserts in einer Transaktion."""
+        with self.conn:
+            for video_id, werte in zeilen.items():
+                unbekannt = set(werte) - set(SQL_TYPEN)
+                if unbekannt:
+                    raise KeyError(f"Unbekannte Spalten: {sorted(unbekannt)}")
+                namen = list(werte)
+                if not namen:
+                    self.conn.execute("INSERT OR IGNORE INTO videos (video_id) VALUES (?)", (video_id,))
+                    continue
+                platzhalter = ", ".join("?" for _ in namen)
+                setzen = ", ".join(f"{n} = excluded.{n}" for n in namen)
+                self.conn.execute(
+                    f"INSERT INTO videos (video_id, {', '.join(namen)}) VALUES (?, {platzhalter}) "
+                    f"ON CONFLICT(video_id) DO UPDATE SET {setzen}",
+                    (video_id, *(_typed(n, werte[n]) for n in namen)),
+                )
+
+    def to_dataframe(self, excel_namen: bool = True) -> pd.DataFrame:
+        df = pd.read_sql_query("SELECT * FROM videos ORDER BY rowid", self.conn)
+        for name, typ, _ in SPALTEN:
+            if typ == "INTEGER":
+                df[name] = df[name].astype("Int64")
+        if excel_namen:
+            df = df.rename(columns=EXCEL_NAMEN)
+        return df
+
+    def import_excel(self, datei: str | Path) -> int:
+        """Übernimmt bekannte Spalten einer Excel-Datei; Zeilen ohne gültige URL werden übersprungen."""
+        df = pd.read_excel(datei)
+        spalten = {excel: name for name, excel in EXCEL_NAMEN.items() if excel in df.columns}
+
+        zeilen = {}
+        for idx, row in df.iterrows():
+            url = row.get("URL")
+            try:
+                video_id = video_id_from_url(str(url) if pd.notna(url) else "")
+            except ValueError as e:
+                print(f"Zeile {idx + 2} übersprungen: {e}")
+                continue
+            werte = {name: row[excel] for excel, name in spalten.items()}
+            # alte Fehlermarker aus der Excel-Ära nicht als Inhalt übernehmen
+            for name in ("transkript", "beschreibung"):
+                if isinstance(werte.get(name), str) and werte[name].startswith("Fehler"):
+                    werte[name] = None
+            zeilen[video_id] = werte
+
+        self.update_many(zeilen)
+        return len(zeilen)
+
+    def export_excel(self, datei: str | Path):
+        self.to_dataframe().to_excel(datei, index=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rohdaten-Datenbank der Stufen 01–02 verwalten.")
+    parser.add_argument("--db", default=DB_DATEI, help=f"SQLite-Datei (Standard: {DB_DATEI})")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    p = sub.add_parser("import", help="Excel-Datei in die Datenbank übernehmen")
+    p.add_argument("excel")
+
+    p = sub.add_parser("export", help="Datenbank als Excel-Ansicht schreiben")
+    p.add_argument("excel")
+
+    sub.add_parser("status", help="Füllstand pro Spalte anzeigen")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = RawStore(args.db)
+
+    if args.befehl == "import":
+        n = store.import_excel(args.excel)
+        print(f"{n} Videos aus {args.excel} übernommen.")
+    elif args.befehl == "export":
+        store.export_excel(args.excel)
+        print(f"{len(store.video_ids())} Videos nach {args.excel} exportiert.")
+    elif args.befehl == "status":
+        df = store.to_dataframe(excel_namen=False)
+        print(f"{len(df)} Videos in {args.db}")
+        for name, _, excel in SPALTEN:
+            print(f"  {excel:<20} {df[name].notna().sum():>4}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,195 @@
-import pandas as pd
-import requests
 import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+from raw_store import RawStore, DB_DATEI
+from youtube_url import video_id_from_url
+
+# Messung (Spans, Zähler) aus process/
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import instrumentation as instr  # noqa: E402
+
 load_dotenv()
 
-API_KEY = os.getenv("TRANSCRIPT_API_KEY")
-if not API_KEY:
-    raise RuntimeError("TRANSCRIPT_API_KEY fehlt in .env")
+API_URL = os.getenv("TRANSCRIPT_API_URL", "https://transcriptapi.com/api/v2/youtube/transcript")
+STORE_DIR = "transcript_store"
+WORKERS = 4
+TIMEOUT = 30
+MAX_RETRIES = 5
+
+
+class TranscriptStore:
+    """
+    Ablage der rohen API-Antworten (inkl. Segment-Zeitstempel) als
+    gzip-komprimiertes JSON, eine Datei pro Video-ID.
+    """
+
+    def __init__(self, folder: str | Path):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
 
-# Excel laden
-datei = "raw_data.xlsx"
-df = pd.read_excel(datei)
+    def path(self, video_id: str) -> Path:
+        return self.folder / f"{video_id}.json.gz"
 
-for index, row in df.iterrows():
-    url = row["URL"]
+    def has(self, video_id: str) -> bool:
+        return self.path(video_id).is_file()
 
-    api = "https://transcriptapi.com/api/v2/youtube/transcript"
+    def load(self, video_id: str) -> dict:
+        with gzip.open(self.path(video_id), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, video_id: str, data: dict):
+        # erst temporär schreiben, dann umbenennen → keine halben Dateien bei Abbruch
+        tmp = self.path(video_id).with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        tmp.replace(self.path(video_id))
+
+
+def make_session(api_key: str, workers: int = WORKERS) -> requests.Session:
+    """Session mit Connection-Pool und Retry/Backoff für 429 und 5xx."""
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "accept": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    })
+    return session
+
+
+def fetch_transcript(session: requests.Session, url: str, api_url: str = API_URL) -> dict:
     params = {
         "video_url": url,
         "send_metadata": "true",
         "format": "json",
-        "include_timestamp": "false"
-    }
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
+        "include_timestamp": "true",
     }
+    start = time.perf_counter()
+    r = session.get(api_url, params=params, timeout=TIMEOUT)
+    instr.observe("transkripte.latenz_s", time.perf_counter() - start)
+    # urllib3 protokolliert die automatischen Wiederholungen (429/5xx) in retries.history
+    retries = getattr(getattr(r.raw, "retries", None), "history", ())
+    if retries:
+        instr.count("transkripte.wiederholungen", len(retries))
+    r.raise_for_status()
+    return r.json()
+
+
+def transcript_text(data: dict) -> str:
+    return " ".join(i["text"] for i in data["transcript"])
+
+
+def fetch_all(
+    urls: list[str],
+    store: TranscriptStore,
+    session: requests.Session,
+    api_url: str = API_URL,
+    workers: int = WORKERS,
+    refresh: bool = False,
+) -> dict[str, str | None]:
+    """
+    Lädt alle noch nicht gespeicherten Transkripte parallel (max. `workers`
+    gleichzeitige Anfragen) in den Store.
+    Rückgabe: Video-ID → Fehlermeldung (None bei Erfolg bzw. Cache-Treffer).
+    """
+    status = {}
+    todo = {}
+    for url in urls:
+        vid = video_id_from_url(url)
+        if not refresh and store.has(vid):
+            status[vid] = None
+        else:
+            todo[vid] = url
+
+    print(f"{len(status)} Transkripte im Store, {len(todo)} werden geladen ...")
+
+    def job(vid, url):
+        with instr.span("video", video_id=vid):
+            store.save(vid, fetch_transcript(session, url, api_url))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(job, vid, url): vid for vid, url in todo.items()}
+        for fut in as_completed(futures):
+            vid = futures[fut]
+            try:
+                fut.result()
+                status[vid] = None
+            except Exception as e:
+                print(f"Fehler bei {vid}: {e}")
+                instr.count("transkripte.fehler")
+                status[vid] = str(e)
+
+    return status
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="YouTube-Transkripte laden und in die Rohdaten-Datenbank eintragen.")
+    parser.add_argument("--db", default=DB_DATEI, help=f"SQLite-Datei aus raw_store.py (Standard: {DB_DATEI})")
+    parser.add_argument("--store", default=STORE_DIR, help=f"Ordner für rohe API-Antworten (Standard: {STORE_DIR})")
+    parser.add_argument("--api_url", default=API_URL, help="Endpoint der Transcript-API (z.B. lokaler Stub-Server)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Parallele Anfragen (Standard: {WORKERS})")
+    parser.add_argument("--refresh", action="store_true", help="Auch bereits gespeicherte Transkripte neu laden")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    instr.start("transkripte")
+
+    api_key = os.getenv("TRANSCRIPT_API_KEY")
+    if not api_key:
+        raise RuntimeError("TRANSCRIPT_API_KEY fehlt in .env")
+
+    db = RawStore(args.db)
+    videos = {r["video_id"]: r["url"] for r in db.rows(["url"]) if r["url"]}
+
+    store = TranscriptStore(args.store)
+    session = make_session(api_key, args.workers)
 
-    r = requests.get(api, params=params, headers=headers)
+    start = time.perf_counter()
+    status = fetch_all(
+        list(videos.values()),
+        store,
+        session,
+        api_url=args.api_url,
+        workers=args.workers,
+        refresh=args.refresh,
+    )
+    print(f"Download abgeschlossen in {time.perf_counter() - start:.1f}s")
 
-    if r.status_code != 200:
-        df.at[index, "ZDF Transkript"] = "Fehler"
-        continue
+    # Text wird immer aus dem Store erzeugt, nie direkt aus der Antwort;
+    # geschrieben werden nur die eigenen Spalten
+    updates = {}
+    for vid in videos:
+        if status.get(vid) is not None or not store.has(vid):
+            updates[vid] = {"transkript_fehler": status.get(vid) or "nicht im Store"}
+        else:
+            updates[vid] = {"transkript": transcript_text(store.load(vid)), "transkript_fehler": None}
+    db.update_many(updates)
+    db.close()
 
-    data = r.json()
-    text = " ".join(i["text"] for i in data["transcript"])
-    df.at[index, "ZDF Transkript"] = text
+    print("Fertig aktualisiert!")
 
-# zurück in Originaldatei speichern
-df.to_excel(datei, index=False)
 
-print("Fertig aktualisiert!")
+if __name__ == "__main__":
+    main()
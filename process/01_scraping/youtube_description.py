@@ -1,40 +1,153 @@
-from pytubefix import YouTube
-from urllib.parse import urlparse, parse_qs
-import pandas as pd
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def clean_youtube_url(url: str) -> str:
-    url = url.strip()
-    if not url:
-        raise ValueError("Leere URL")
+from raw_store import RawStore, DB_DATEI
+from youtube_url import clean_youtube_url, video_id_from_url
 
-    parsed = urlparse(url)
+# Messung (Spans, Zähler) aus process/
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import instrumentation as instr  # noqa: E402
 
-    # youtu.be/VIDEOID
-    if parsed.netloc in ("youtu.be", "www.youtu.be"):
-        video_id = parsed.path.lstrip("/")
-    else:
-        qs = parse_qs(parsed.query)
-        video_id = qs.get("v", [None])[0]
+CACHE_DIR = "metadata_cache"
+WORKERS = 8
 
-    if not video_id:
-        raise ValueError(f"Keine Video-ID gefunden in URL: {url}")
 
-    return f"https://www.youtube.com/watch?v={video_id}"
+def pytubefix_fetcher(url: str) -> dict:
+    """Standard-Backend: Metadaten über pytubefix abrufen."""
+    from pytubefix import YouTube
 
+    yt = YouTube(url)
+    return {
+        "title": yt.title,
+        "description": yt.description,
+        "publish_date": yt.publish_date.isoformat() if yt.publish_date else None,
+        "duration": yt.length,
+    }
 
-df = pd.read_excel("raw_data.xlsx")
 
-for idx, row in df.iterrows():
-    raw_url = str(row.get("URL", "") or "").strip()
-    if not raw_url:
-        continue
+class MetadataCache:
+    """Strukturierte Video-Metadaten als JSON, eine Datei pro Video-ID."""
 
-    try:
-        url = clean_youtube_url(raw_url)
-        yt = YouTube(url)
-        df.at[idx, "Beschreibung"] = f"Titel: {yt.title} Beschreibung: {yt.description}"
-    except Exception as e:
-        df.at[idx, "Beschreibung"] = f"Fehler: {e}"
+    def __init__(self, folder: str | Path):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
 
-df.to_excel("raw_data.xlsx", index=False)
-print("Fertig.")
\ No newline at end of file
+    def path(self, video_id: str) -> Path:
+        return self.folder / f"{video_id}.json"
+
+    def has(self, video_id: str) -> bool:
+        return self.path(video_id).is_file()
+
+    def load(self, video_id: str) -> dict:
+        with self.path(video_id).open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, video_id: str, meta: dict):
+        tmp = self.path(video_id).with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        tmp.replace(self.path(video_id))
+
+
+def collect_metadata(
+    urls: list[str],
+    cache: MetadataCache,
+    fetcher: Callable[[str], dict] = pytubefix_fetcher,
+    workers: int = WORKERS,
+    refresh: bool = False,
+) -> dict[str, str | None]:
+    """
+    Holt Metadaten für alle noch nicht gecachten Videos parallel.
+    `fetcher` bekommt die bereinigte URL und liefert ein Dict mit
+    title, description, publish_date, duration (austauschbar für Tests).
+    Rückgabe: Video-ID → Fehlermeldung (None bei Erfolg bzw. Cache-Treffer).
+    """
+    status = {}
+    todo = {}
+    for url in urls:
+        vid = video_id_from_url(url)
+        if not refresh and cache.has(vid):
+            status[vid] = None
+        elif vid not in todo:
+            todo[vid] = clean_youtube_url(url)
+
+    print(f"{len(status)} Videos im Cache, {len(todo)} werden abgefragt ...")
+
+    def job(vid, url):
+        with instr.span("video", video_id=vid):
+            start = time.perf_counter()
+            meta = fetcher(url)
+            instr.observe("metadaten.latenz_s", time.perf_counter() - start)
+        meta["video_id"] = vid
+        cache.save(vid, meta)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(job, vid, url): vid for vid, url in todo.items()}
+        for fut in as_completed(futures):
+            vid = futures[fut]
+            try:
+                fut.result()
+                status[vid] = None
+            except Exception as e:
+                instr.count("metadaten.fehler")
+                status[vid] = str(e)
+
+    return status
+
+
+def beschreibung_text(meta: dict) -> str:
+    return f"Titel: {meta.get('title')} Beschreibung: {meta.get('description')}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="YouTube-Metadaten sammeln und in die Rohdaten-Datenbank eintragen.")
+    parser.add_argument("--db", default=DB_DATEI, help=f"SQLite-Datei aus raw_store.py (Standard: {DB_DATEI})")
+    parser.add_argument("--cache", default=CACHE_DIR, help=f"Ordner für Metadaten-Cache (Standard: {CACHE_DIR})")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Parallele Abfragen (Standard: {WORKERS})")
+    parser.add_argument("--refresh", action="store_true", help="Auch bereits gecachte Videos neu abfragen")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    instr.start("metadaten")
+
+    db = RawStore(args.db)
+    videos = {r["video_id"]: r["url"] for r in db.rows(["url"]) if r["url"]}
+
+    cache = MetadataCache(args.cache)
+    start = time.perf_counter()
+    status = collect_metadata(
+        list(videos.values()),
+        cache,
+        workers=args.workers,
+        refresh=args.refresh,
+    )
+    print(f"Abfrage abgeschlossen in {time.perf_counter() - start:.1f}s")
+
+    updates = {}
+    for vid in videos:
+        if status.get(vid) is not None:
+            updates[vid] = {"metadaten_fehler": status[vid]}
+            continue
+        meta = cache.load(vid)
+        updates[vid] = {
+            "beschreibung": beschreibung_text(meta),
+            "titel": meta.get("title"),
+            "veroeffentlicht": meta.get("publish_date"),
+            "dauer_s": meta.get("duration"),
+            "metadaten_fehler": None,
+        }
+    db.update_many(updates)
+    db.close()
+
+    print("Fertig.")
+
+
+if __name__ == "__main__":
+    main()
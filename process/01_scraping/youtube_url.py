@@ -0,0 +1,25 @@
+from urllib.parse import urlparse, parse_qs
+
+
+def video_id_from_url(url: str) -> str:
+    url = url.strip()
+    if not url:
+        raise ValueError("Leere URL")
+
+    parsed = urlparse(url)
+
+    # youtu.be/VIDEOID
+    if parsed.netloc in ("youtu.be", "www.youtu.be"):
+        video_id = parsed.path.lstrip("/")
+    else:
+        qs = parse_qs(parsed.query)
+        video_id = qs.get("v", [None])[0]
+
+    if not video_id:
+        raise ValueError(f"Keine Video-ID gefunden in URL: {url}")
+
+    return video_id
+
+
+def clean_youtube_url(url: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id_from_url(url)}"
@@ -1,20 +1,21 @@
-import os
-import pandas as pd
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+
+# gemeinsame Rohdaten-Datenbank aus 01_scraping
+sys.path.append(str(Path(__file__).resolve().parents[1] / "01_scraping"))
+from raw_store import RawStore, DB_DATEI  # noqa: E402
+
+# Messung (Spans, Zähler) aus process/
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import instrumentation as instr  # noqa: E402
+import llm  # noqa: E402  OpenAI oder lokaler Ersatz (Umgebungsvariable LLM)
 
 load_dotenv()
 
-DATEI = "raw_data.xlsx"
 MODEL = "gpt-4o"
-TRANSCRIPT_COL = "ZDF Transkript"
-OUTPUT_COL = "Clean Transcript"
-
-API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("OPENAI_API_KEY fehlt in .env")
 
-client = OpenAI(api_key=API_KEY)
+client = llm.client()
 
 with open("kader_23.txt", "r", encoding="utf-8") as f:
     kader = f.read()
@@ -36,7 +37,8 @@ def analyze(transcript: str, beschreibung: str) -> str:
     if not transcript:
         return "Kein Transkript vorhanden."
 
-    resp = client.chat.completions.create(
+    resp = instr.chat_completion(
+        client,
         model=MODEL,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -48,21 +50,26 @@ def analyze(transcript: str, beschreibung: str) -> str:
     return resp.choices[0].message.content.strip()
 
 
-df = pd.read_excel(DATEI)
+def main():
+    instr.start("bereinigung")
+    db = RawStore(DB_DATEI)
 
-if OUTPUT_COL not in df.columns:
-    df[OUTPUT_COL] = None
+    for row in db.rows(["transkript", "beschreibung"]):
+        try:
+            with instr.span("video", video_id=row["video_id"]):
+                werte = {"clean_transkript": analyze(row["transkript"], row["beschreibung"]),
+                         "clean_transkript_fehler": None}
+        except Exception as e:
+            instr.count("bereinigung.fehler")
+            # nur den Fehler vermerken: ein früher bereinigtes clean_transkript bleibt erhalten
+            werte = {"clean_transkript_fehler": f"{type(e).__name__}: {e}"}
 
-for idx, row in df.iterrows():
-    transcript = row.get(TRANSCRIPT_COL, "")
-    beschreibung = row.get("Beschreibung", "")
+        # sofort zeilenweise schreiben, ein Abbruch verliert nichts
+        db.update(row["video_id"], **werte)
 
-    try:
-        result = analyze(transcript, beschreibung)
-    except Exception as e:
-        result = f"Fehler: {e}"
+    db.close()
+    print("Fertig.")
 
-    df.at[idx, OUTPUT_COL] = result
 
-df.to_excel(DATEI, index=False)
-print("Fertig.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,83 @@
-import os
 import json
-import pandas as pd
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv()
+# gemeinsame Rohdaten-Datenbank aus 01_scraping
+sys.path.append(str(Path(__file__).resolve().parents[1] / "01_scraping"))
+from raw_store import RawStore, DB_DATEI  # noqa: E402
 
-DATEI = "raw_data.xlsx"
-TEAM = "FC Bayern München"
-MODEL = "gpt-4o-mini"
+# Messung (Spans, Zähler) aus process/
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import instrumentation as instr  # noqa: E402
+from vereine import TEAM, STANDARD  # noqa: E402  Bezugsverein (Umgebungsvariable BEZUGSVEREIN)
+import llm  # noqa: E402  OpenAI oder lokaler Ersatz (Umgebungsvariable LLM)
 
-API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("OPENAI_API_KEY fehlt in .env")
+load_dotenv()
 
-client = OpenAI(api_key=API_KEY)
+MODEL = "gpt-4o-mini"
+PACK_SIZE = 10          # Beschreibungen pro Anfrage (1 = alter Einzelmodus)
+MAX_RETRIES = 2         # erneute Anfragen nur für ungültige Einträge
+
+client = llm.client()
+
+FALLBACK = {
+    "heim_auswaerts": "Unbekannt",
+    "gegner": "Unbekannt",
+    "schiedsrichter": None,
+    "kommentator": None,
+    "tore_bayern": "Unbekannt",
+    "tore_gegner": "Unbekannt",
+}
+
+SYSTEM_PROMPT = (
+    "Du extrahierst ausschließlich aus dem gegebenen Beschreibungstext "
+    "Informationen zum Fußballspiel. "
+    "Antwortformat: reines JSON ohne Erklärtexte. "
+    "Wenn unbekannt: 'Unbekannt' oder null. "
+    "Heim/Auswärts immer relativ zum Bezugs-Team bestimmen. "
+    "Zähle die Tore final (Endergebnis), nicht die Reihenfolge."
+)
+if TEAM != STANDARD:
+    # Feldnamen bleiben wie im Schema (raw_store), gemeint ist das Bezugs-Team
+    SYSTEM_PROMPT += " 'tore_bayern' sind die Tore des Bezugs-Teams."
+
+FIELDS_SCHEMA = """{
+            "heim_auswaerts": "Heim" | "Auswärts" | "Unbekannt",
+            "gegner": "STRING",
+            "schiedsrichter": "STRING oder null",
+            "kommentator": "STRING oder null",
+            "tore_bayern": "ZAHL oder Unbekannt",
+            "tore_gegner": "ZAHL oder Unbekannt"
+            }"""
+
+
+def is_valid_result(result) -> bool:
+    """Prüft einen Eintrag gegen das Feldschema (gleiche Felder wie FALLBACK)."""
+    if not isinstance(result, dict) or not set(FALLBACK) <= set(result):
+        return False
+    if result["heim_auswaerts"] not in ("Heim", "Auswärts", "Unbekannt"):
+        return False
+    if not isinstance(result["gegner"], str) or not result["gegner"].strip():
+        return False
+    for key in ("schiedsrichter", "kommentator"):
+        if result[key] is not None and not isinstance(result[key], str):
+            return False
+    for key in ("tore_bayern", "tore_gegner"):
+        value = result[key]
+        if value == "Unbekannt":
+            continue
+        if isinstance(value, bool) or not str(value).strip().isdigit():
+            return False
+    return True
 
 
 def extract_from_text(text: str, team: str) -> dict:
     text = (text or "").strip()
     if not text:
-        return {
-            "heim_auswaerts": "Unbekannt",
-            "gegner": "Unbekannt",
-            "schiedsrichter": None,
-            "kommentator": None,
-            "tore_bayern": "Unbekannt",
-            "tore_gegner": "Unbekannt",
-        }
+        return dict(FALLBACK)
 
-    system = (
-        "Du extrahierst ausschließlich aus dem gegebenen Beschreibungstext "
-        "Informationen zum Fußballspiel. "
-        "Antwortformat: reines JSON ohne Erklärtexte. "
-        "Wenn unbekannt: 'Unbekannt' oder null. "
-        "Heim/Auswärts immer relativ zum Bezugs-Team bestimmen. "
-        "Zähle die Tore final (Endergebnis), nicht die Reihenfolge."
-    )
+    system = SYSTEM_PROMPT
 
     user = f"""
             Bezugs-Team: {team}
@@ -45,17 +86,11 @@ def extract_from_text(text: str, team: str) -> dict:
             \"\"\"{text}\"\"\" 
 
             Gib genau folgende Felder als JSON zurück:
-            {{
-            "heim_auswaerts": "Heim" | "Auswärts" | "Unbekannt",
-            "gegner": "STRING",
-            "schiedsrichter": "STRING oder null",
-            "kommentator": "STRING oder null",
-            "tore_bayern": "ZAHL oder Unbekannt",
-            "tore_gegner": "ZAHL oder Unbekannt"
-            }}
+            {FIELDS_SCHEMA}
             """
 
-    resp = client.chat.completions.create(
+    resp = instr.chat_completion(
+        client,
         model=MODEL,
         messages=[
             {"role": "system", "content": system},
@@ -73,39 +108,125 @@ def extract_from_text(text: str, team: str) -> dict:
             json_str = content[content.index("{"): content.rindex("}") + 1]
             return json.loads(json_str)
         except Exception:
-            return {
-                "heim_auswaerts": "Unbekannt",
-                "gegner": "Unbekannt",
-                "schiedsrichter": None,
-                "kommentator": None,
-                "tore_bayern": "Unbekannt",
-                "tore_gegner": "Unbekannt",
-            }
-
-
-df = pd.read_excel(DATEI)
-
-for col in [
-    "Heim/Auswärts",
-    "Gegner",
-    "Schiedsrichter",
-    "Kommentator",
-    "Tore Bayern",
-    "Tore Gegner",
-]:
-    if col not in df.columns:
-        df[col] = None
-
-for idx, row in df.iterrows():
-    beschr = str(row.get("Beschreibung", "") or "")
-    result = extract_from_text(beschr, TEAM)
-
-    df.at[idx, "Heim/Auswärts"] = result.get("heim_auswaerts")
-    df.at[idx, "Gegner"] = result.get("gegner")
-    df.at[idx, "Schiedsrichter"] = result.get("schiedsrichter")
-    df.at[idx, "Kommentator"] = result.get("kommentator")
-    df.at[idx, "Tore Bayern"] = result.get("tore_bayern")
-    df.at[idx, "Tore Gegner"] = result.get("tore_gegner")
-
-df.to_excel(DATEI, index=False)
-print("Fertig aktualisiert.")
\ No newline at end of file
+            return dict(FALLBACK)
+
+
+def extract_packed(texts: dict, team: str) -> dict:
+    """
+    Extrahiert mehrere Beschreibungen in einer Anfrage.
+    `texts` bildet eine ID auf den Beschreibungstext ab; die Antwort ist ein
+    JSON-Array mit einem Objekt pro ID. Rückgabe: ID → Ergebnis-Dict
+    (nur gültige Einträge, fehlende/ungültige IDs fehlen im Ergebnis).
+    """
+    beschreibungen = "\n\n".join(
+        f'ID {i}:\n\"\"\"{t}\"\"\"' for i, t in texts.items()
+    )
+
+    user = f"""
+            Bezugs-Team: {team}
+
+            Es folgen {len(texts)} Beschreibungen, jeweils mit ID:
+
+            {beschreibungen}
+
+            Gib ein JSON-Array mit genau einem Objekt pro ID zurück.
+            Jedes Objekt enthält "id" (ZAHL) und genau folgende Felder:
+            {FIELDS_SCHEMA}
+            """
+
+    resp = instr.chat_completion(
+        client,
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user},
+        ],
+        temperature=0,
+    )
+
+    content = resp.choices[0].message.content or ""
+
+    try:
+        parsed = json.loads(content[content.index("["): content.rindex("]") + 1])
+    except Exception:
+        return {}
+
+    results = {}
+    for entry in parsed if isinstance(parsed, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            entry_id = int(entry.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if entry_id in texts and is_valid_result(entry):
+            results[entry_id] = {k: entry[k] for k in FALLBACK}
+    return results
+
+
+def extract_all(texts: dict, team: str) -> dict:
+    """
+    Extrahiert alle Beschreibungen in Paketen von PACK_SIZE. Nur ungültige
+    oder fehlende Einträge werden erneut angefragt; was danach noch fehlt,
+    geht einzeln über extract_from_text().
+    """
+    results = {i: dict(FALLBACK) for i, t in texts.items() if not (t or "").strip()}
+    offen = {i: t.strip() for i, t in texts.items() if i not in results}
+    anfragen = 0
+
+    for versuch in range(1 + MAX_RETRIES):
+        if not offen or PACK_SIZE <= 1:
+            break
+        ids = list(offen)
+        for start in range(0, len(ids), PACK_SIZE):
+            paket = {i: offen[i] for i in ids[start:start + PACK_SIZE]}
+            try:
+                with instr.span("paket", groesse=len(paket), versuch=versuch + 1):
+                    results.update(extract_packed(paket, team))
+            except Exception as e:
+                print(f"API-Fehler bei Paket (Versuch {versuch + 1}): {e}")
+            anfragen += 1
+        offen = {i: t for i, t in offen.items() if i not in results}
+        if offen:
+            instr.count("extraktion.wiederholte_eintraege", len(offen))
+            print(f"{len(offen)} ungültige/fehlende Einträge, frage erneut an ...")
+
+    for i, t in offen.items():
+        with instr.span("einzeln"):
+            results[i] = extract_from_text(t, team)
+        anfragen += 1
+
+    print(f"{len(texts)} Beschreibungen mit {anfragen} Anfragen extrahiert.")
+    return results
+
+
+def main():
+    instr.start("extraktion")
+    db = RawStore(DB_DATEI)
+
+    texts = {
+        i: row["beschreibung"] or ""
+        for i, row in enumerate(db.rows(["beschreibung"]))
+    }
+    video_ids = db.video_ids()
+    results = extract_all(texts, TEAM)
+
+    # "Unbekannt" wird beim Schreiben zu NULL (typisierte Spalten)
+    db.update_many({
+        video_ids[i]: {
+            "heim_auswaerts": result.get("heim_auswaerts"),
+            "gegner": result.get("gegner"),
+            "schiedsrichter": result.get("schiedsrichter"),
+            "kommentator": result.get("kommentator"),
+            "tore_bayern": result.get("tore_bayern"),
+            "tore_gegner": result.get("tore_gegner"),
+        }
+        for i, result in results.items()
+    })
+
+    db.close()
+    print("Fertig aktualisiert.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,19 @@
-import os
+import sys
 import json
 import time
+import argparse
 from pathlib import Path
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv()
-API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("OPENAI_API_KEY fehlt in .env")
+# Messung (Spans, Zähler) aus process/
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import instrumentation as instr  # noqa: E402
+import llm  # noqa: E402  OpenAI oder lokaler Ersatz (Umgebungsvariable LLM)
+from vereine import TEAM, STANDARD, kurzname  # noqa: E402  Bezugsverein (Umgebungsvariable BEZUGSVEREIN)
 
-client = OpenAI(api_key=API_KEY)
+load_dotenv()
+client = llm.client()
 
 INPUT_DIR = Path("einzelne_spiele")
 OUTPUT_DIR = Path("mit_zuordnung")
@@ -26,16 +28,17 @@ def sorted_json_files_by_mtime(folder: Path):
     return files
 
 
-def build_system_prompt(opponent: str) -> str:
+def build_system_prompt(opponent: str, team: str = TEAM) -> str:
+    torschuetze = "Sané, " if team == STANDARD else ""
     return (
         "Du bist ein Experte für deutsche Fußball-Kommentare.\n\n"
         "Aufgabe: Bestimme für jeden Satz aus einem Spielbericht, welches Team er betrifft.\n\n"
         "Erlaubte Antworten (exakt diese Schreibweise):\n"
-        f"- FC Bayern München\n- {opponent}\n- Neutral\n\n"
+        f"- {team}\n- {opponent}\n- Neutral\n\n"
         "Wenn Pronomen oder beschreibende Folgesätze vorkommen, übernimm das Team des vorherigen Satzes.\n"
         "Beispiele:\n"
-        "  - 'Sané, 4. Minute, 1:0 Bayern.' → FC Bayern München\n"
-        "  - 'Ein perfekt herausgespielter Treffer.' → FC Bayern München\n\n"
+        f"  - '{torschuetze}4. Minute, 1:0 {kurzname(team)}.' → {team}\n"
+        f"  - 'Ein perfekt herausgespielter Treffer.' → {team}\n\n"
         "Kriterien:\n"
         "- Aktionen, Chancen, Tore → entsprechendes Team\n"
         "- Beschreibungen oder Kommentare direkt danach → selbes Team\n"
@@ -51,13 +54,15 @@ def build_system_prompt(opponent: str) -> str:
 def get_model_response(messages):
     for attempt in range(5):
         try:
-            response = client.chat.completions.create(
+            response = instr.chat_completion(
+                client,
                 model="gpt-4o",
                 messages=messages,
             )
             return response.choices[0].message.content
         except Exception as e:
             wait = 2 ** attempt
+            instr.count("klassifikation.api_wiederholungen")
             print(f"API-Fehler (Versuch {attempt + 1}): {e} → warte {wait}s")
             time.sleep(wait)
     raise RuntimeError("Zu viele API-Fehler in Folge.")
@@ -82,15 +87,13 @@ def parse_and_validate_response(content, valid_labels):
     return results, invalid_entries
 
 
-def classify_file(in_path: Path, out_path: Path):
-    with in_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
+def classify_data(data: dict) -> int:
+    """Setzt t["kontext"] für jeden Satz des Spiels; gibt die Zahl der Durchläufe zurück."""
     transkript = data["content"]["transkript"]
     opponent = data["meta"]["gegner"]
-    valid_labels = {"FC Bayern München", opponent, "Neutral"}
+    valid_labels = {TEAM, opponent, "Neutral"}
 
-    print(f"\nDatei: {in_path.name} | Gegner: {opponent} | Sätze: {len(transkript)}")
+    print(f"\nGegner: {opponent} | Sätze: {len(transkript)}")
 
     system_prompt = build_system_prompt(opponent)
     sentences_json = json.dumps(
@@ -117,6 +120,7 @@ def classify_file(in_path: Path, out_path: Path):
 
         if invalid_entries:
             print(f"{len(invalid_entries)} ungültige Labels, wiederhole ...")
+            instr.count("klassifikation.ungueltige_durchlaeufe")
             for bad in invalid_entries:
                 print(f"  Index {bad.get('index')}: '{bad.get('kontext')}'")
             attempt_counter += 1
@@ -133,6 +137,15 @@ def classify_file(in_path: Path, out_path: Path):
                 t["kontext"] = team
                 break
         print(f"{idx:>3}: {team}")
+    return attempt_counter
+
+
+def classify_file(in_path: Path, out_path: Path):
+    with in_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    print(f"\nDatei: {in_path.name}")
+    attempt_counter = classify_data(data)
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", encoding="utf-8") as f:
@@ -141,15 +154,29 @@ def classify_file(in_path: Path, out_path: Path):
     print(f"Gespeichert: {out_path} (nach {attempt_counter} Durchläufen)")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Segmente pro Spiel einem Team zuordnen.")
+    parser.add_argument(
+        "dateien",
+        nargs="*",
+        type=Path,
+        help=f"Einzelne Spiel-JSONs (Standard: alle 23-24*.json in {INPUT_DIR})",
+    )
+    return parser.parse_args()
+
+
 def main():
-    files = sorted_json_files_by_mtime(INPUT_DIR)
+    args = parse_args()
+    instr.start("klassifikation")
+    files = args.dateien or sorted_json_files_by_mtime(INPUT_DIR)
     if not files:
         print(f"Keine 23-24*.json in {INPUT_DIR.resolve()}")
         return
 
     print(f"Gefundene Dateien: {len(files)}")
     for path in files:
-        classify_file(path, OUTPUT_DIR / path.name)
+        with instr.span("datei", datei=path.name):
+            classify_file(path, OUTPUT_DIR / path.name)
 
 
 if __name__ == "__main__":
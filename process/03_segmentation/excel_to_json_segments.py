@@ -1,27 +1,35 @@
 import os
 import re
+import sys
 import json
 import time
 import hashlib
+from pathlib import Path
+
 import pandas as pd
 from dotenv import load_dotenv
-from openai import OpenAI
+
+# Messung (Spans, Zähler) aus process/
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import instrumentation as instr  # noqa: E402
+import llm  # noqa: E402  OpenAI oder lokaler Ersatz (Umgebungsvariable LLM)
 
 # Konfiguration
 EXCEL_DATEI = "data/23-25_working.xlsx"
 AUSGABE_ORDNER = "einzelne_spiele"
 MODEL = "gpt-4o"
+SEGMENTIERER = "openai"             # "openai" oder "lokal" (siehe local_segmenter.py)
+SEGMENTIERER_MODELL = "segmenter.pkl"
 
 load_dotenv()
-API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("OPENAI_API_KEY fehlt in .env")
-
-client = OpenAI(api_key=API_KEY)
 
-os.makedirs(AUSGABE_ORDNER, exist_ok=True)
-
-df = pd.read_excel(EXCEL_DATEI, sheet_name=0)
+if SEGMENTIERER == "openai":
+    client = llm.client()
+elif SEGMENTIERER == "lokal":
+    from local_segmenter import load_model, segment_text
+    lokales_modell = load_model(SEGMENTIERER_MODELL)
+else:
+    raise ValueError(f"Unbekannter Segmentierer: {SEGMENTIERER}")
 
 
 def normalize_text(text: str) -> str:
@@ -52,7 +60,8 @@ def ask_openai_as_sentences(content: str, max_retries: int = 5) -> list[str]:
 
     for attempt in range(1, max_retries + 1):
         try:
-            resp = client.chat.completions.create(
+            resp = instr.chat_completion(
+                client,
                 model=MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -88,47 +97,76 @@ def ask_openai_as_sentences(content: str, max_retries: int = 5) -> list[str]:
 
         except Exception as e:
             print(f"Fehler bei Versuch {attempt}/{max_retries}: {e}")
+            instr.count("segmentierung.wiederholungen")
             time.sleep(attempt * 2)
 
     raise RuntimeError("ask_openai_as_sentences() nach allen Versuchen fehlgeschlagen.")
 
 
-for _, row in df.iterrows():
-    raw_transkript = str(row.get("Transkript", "") or "").strip()
-    if not raw_transkript:
-        continue
-
-    saetze = ask_openai_as_sentences(raw_transkript)
-
-    sentences_struct = [{"index": i, "text": s} for i, s in enumerate(saetze)]
-
-    daten = {
-        "meta": {
-            "saison": row.get("Saison"),
-            "spieltag": row.get("Spieltag"),
-            "heim_auswaerts": row.get("Heim/Auswärts"),
-            "gegner": row.get("Gegner"),
-            "tabelle": row.get("Tabelle"),
-        },
-        "ergebnis": {
-            "bayern": row.get("Tore Bayern"),
-            "gegner": row.get("Tore Gegner"),
-        },
-        "offizielle": {
-            "schiedsrichter": row.get("Schiedsrichter"),
-            "kommentator": row.get("Kommentator"),
-        },
-        "content": {
-            "transkript": sentences_struct,
-        },
-    }
-
-    saison_str = str(row.get("Saison", "")).replace("/", "-")
-    spieltag_str = str(row.get("Spieltag", ""))
-    gegner_str = str(row.get("Gegner", "")).lower().replace(" ", "_")
-
-    dateiname = f"{saison_str}_S{spieltag_str}_{gegner_str}.json"
-
-    pfad = os.path.join(AUSGABE_ORDNER, dateiname)
-    with open(pfad, "w", encoding="utf-8") as f:
-        json.dump(daten, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+def segment_local(content: str) -> list[str]:
+    parsed = segment_text(content, lokales_modell)
+
+    if hash_text(normalize_text(content)) != hash_text(normalize_text("".join(parsed))):
+        raise ValueError("Text wurde verändert (Hash-Mismatch).")
+
+    return parsed
+
+
+def segmentieren(content: str) -> list[str]:
+    """Transkript in Aussagen teilen, mit dem konfigurierten SEGMENTIERER."""
+    if SEGMENTIERER == "lokal":
+        return segment_local(content)
+    return ask_openai_as_sentences(content)
+
+
+def dateiname(saison, spieltag, gegner) -> str:
+    """Name der Spiel-JSON, z.B. 23-24_S10_borussia_dortmund.json."""
+    saison_str = str(saison).replace("/", "-")
+    gegner_str = str(gegner).lower().replace(" ", "_")
+    return f"{saison_str}_S{spieltag}_{gegner_str}.json"
+
+
+def main():
+    instr.start("segmentierung")
+    os.makedirs(AUSGABE_ORDNER, exist_ok=True)
+    df = pd.read_excel(EXCEL_DATEI, sheet_name=0)
+
+    for _, row in df.iterrows():
+        raw_transkript = str(row.get("Transkript", "") or "").strip()
+        if not raw_transkript:
+            continue
+
+        with instr.span("spiel", saison=str(row.get("Saison")), spieltag=str(row.get("Spieltag"))):
+            saetze = segmentieren(raw_transkript)
+        instr.count("segmentierung.segmente", len(saetze))
+
+        sentences_struct = [{"index": i, "text": s} for i, s in enumerate(saetze)]
+
+        daten = {
+            "meta": {
+                "saison": row.get("Saison"),
+                "spieltag": row.get("Spieltag"),
+                "heim_auswaerts": row.get("Heim/Auswärts"),
+                "gegner": row.get("Gegner"),
+                "tabelle": row.get("Tabelle"),
+            },
+            "ergebnis": {
+                "bayern": row.get("Tore Bayern"),
+                "gegner": row.get("Tore Gegner"),
+            },
+            "offizielle": {
+                "schiedsrichter": row.get("Schiedsrichter"),
+                "kommentator": row.get("Kommentator"),
+            },
+            "content": {
+                "transkript": sentences_struct,
+            },
+        }
+
+        pfad = os.path.join(AUSGABE_ORDNER, dateiname(row.get("Saison", ""), row.get("Spieltag", ""), row.get("Gegner", "")))
+        with open(pfad, "w", encoding="utf-8") as f:
+            json.dump(daten, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
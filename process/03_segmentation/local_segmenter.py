@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Lokaler Segmentierer als Ersatz für ask_openai_as_sentences().
+
+Das Modell entscheidet für jede Satzgrenze im Transkript, ob die beiden
+angrenzenden Sätze zur selben Aussage gehören (Sentence-Pair-Klassifikation).
+Trainiert wird auf den bereits segmentierten Spielen in dataset/einzelspiele.
+
+Nutzung:
+    python local_segmenter.py train ../../dataset/einzelspiele --model_out segmenter.pkl
+    python local_segmenter.py evaluate ../../dataset/einzelspiele --folds 5
+    python local_segmenter.py segment segmenter.pkl transkript.txt
+
+Wichtige Eigenschaften:
+- Kandidaten sind alle Stellen nach '.', '!' oder '?' mit folgendem Leerzeichen.
+  Ordinalzahlen ("12. Minute") und Abkürzungen ("Dr.") lernt das Modell als
+  Nicht-Grenzen.
+- Eine Aussage umfasst wie im GPT-Prompt maximal 3 Sätze.
+- Der rekonstruierte Text entspricht exakt der Eingabe (nur Leerraum an den
+  Schnittstellen wird entfernt).
+- Ein komplettes Transkript wird mit einem einzigen predict_proba-Aufruf
+  segmentiert (CPU, wenige Millisekunden).
+"""
+
+import argparse
+import json
+import pickle
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.feature_extraction import DictVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+MAX_SAETZE = 3
+THRESHOLD = 0.5
+
+# Kandidat: Satzzeichen (ggf. mit schließendem Anführungszeichen), danach Leerraum
+CANDIDATE_RE = re.compile(r"[.!?][\"“”'»)]*\s+")
+ORDINAL_RE = re.compile(r"(?<![\d:])\d+\.$")
+SCORE_RE = re.compile(r"\d+:\d+")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+ABKUERZUNGEN = {"dr", "bzw", "z", "b", "u", "a", "ca", "st", "vs", "nr", "prof", "etc", "usw"}
+ANSCHLUSSWOERTER = {
+    "und", "aber", "doch", "denn", "dann", "da", "der", "die", "das", "er", "sie",
+    "es", "so", "auch", "noch", "nur", "wieder", "dabei", "damit", "danach",
+    "dafür", "trotzdem", "jetzt", "hier", "dieser", "diese", "dieses",
+}
+
+
+# ---------- Text-Hilfsfunktionen ----------
+def split_candidates(text: str) -> list[str]:
+    """
+    Zerlegt einen Text an allen Kandidaten-Grenzen.
+    Die Teilstücke enthalten keinen führenden/abschließenden Leerraum.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    parts, start = [], 0
+    for m in CANDIDATE_RE.finditer(text):
+        end = m.end()
+        if end >= len(text):
+            break
+        parts.append(text[start:end].strip())
+        start = end
+    parts.append(text[start:].strip())
+    return [p for p in parts if p]
+
+
+def strip_ws(text: str) -> str:
+    return re.sub(r"\s+", "", text)
+
+
+def boundary_offsets(pieces: list[str]) -> set[int]:
+    """Grenzen als Zeichen-Offsets im Text ohne Leerraum (ohne Textende)."""
+    offsets, pos = set(), 0
+    for p in pieces[:-1]:
+        pos += len(strip_ws(p))
+        offsets.add(pos)
+    return offsets
+
+
+def _tokens(s: str) -> list[str]:
+    return TOKEN_RE.findall(s)
+
+
+# ---------- Features ----------
+def pair_features(prev: str, nxt: str) -> dict:
+    """Features für die Frage: gehört `nxt` noch zur Aussage von `prev`?"""
+    p_tok = _tokens(prev)
+    n_tok = _tokens(nxt)
+    p_words = [t.lower() for t in p_tok if t.isalnum()]
+    n_words = [t.lower() for t in n_tok if t.isalnum()]
+    p_last = p_words[-1] if p_words else ""
+    n_first = n_words[0] if n_words else ""
+
+    feats = {
+        "p_last=" + p_last: 1.0,
+        "n_first=" + n_first: 1.0,
+        "p_punct=" + prev.rstrip("\"“”'») ")[-1:]: 1.0,
+        "p_ordinal": float(bool(ORDINAL_RE.search(prev.rstrip()))),
+        "p_abbr": float(p_last in ABKUERZUNGEN and len(p_last) <= 4),
+        "p_score": float(bool(SCORE_RE.search(prev))),
+        "n_score": float(bool(SCORE_RE.search(nxt))),
+        "n_lower": float(nxt[:1].islower()),
+        "n_digit": float(nxt[:1].isdigit()),
+        "n_anschluss": float(n_first in ANSCHLUSSWOERTER),
+        "p_len": min(len(p_words), 40) / 40.0,
+        "n_len": min(len(n_words), 40) / 40.0,
+        "p_short": float(len(p_words) <= 3),
+        "n_short": float(len(n_words) <= 3),
+    }
+    if len(n_words) > 1:
+        feats["n_first2=" + " ".join(n_words[:2])] = 1.0
+    if len(p_words) > 1:
+        feats["p_last2=" + " ".join(p_words[-2:])] = 1.0
+    return feats
+
+
+# ---------- Daten ----------
+def load_match(path: Path) -> list[str]:
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    transkript = (data.get("content") or {}).get("transkript", [])
+    return [str(t.get("text", "")).strip() for t in transkript if str(t.get("text", "")).strip()]
+
+
+def build_examples(segments: list[str]):
+    """
+    Erzeugt (Features, Label) für alle Kandidaten-Grenzen eines Spiels.
+    Label 1 = selbe Aussage (kein Schnitt), 0 = neue Aussage.
+    """
+    text = " ".join(segments)
+    pieces = split_candidates(text)
+    gold = boundary_offsets(segments)
+
+    X, y, pos = [], [], 0
+    for prev, nxt in zip(pieces, pieces[1:]):
+        pos += len(strip_ws(prev))
+        X.append(pair_features(prev, nxt))
+        y.append(0 if pos in gold else 1)
+    return X, y
+
+
+def load_corpus(data_dir: Path) -> dict[str, list[str]]:
+    files = sorted(Path(data_dir).glob("*.json"))
+    if not files:
+        raise FileNotFoundError(f"Keine JSON-Dateien in {data_dir} gefunden.")
+    return {p.name: load_match(p) for p in files}
+
+
+# ---------- Modell ----------
+def train(corpus: dict[str, list[str]]):
+    X, y = [], []
+    for segments in corpus.values():
+        xs, ys = build_examples(segments)
+        X.extend(xs)
+        y.extend(ys)
+
+    model = make_pipeline(
+        DictVectorizer(),
+        LogisticRegression(max_iter=2000, C=1.0),
+    )
+    model.fit(X, y)
+    return model
+
+
+def segment_text(text: str, model, threshold: float = THRESHOLD) -> list[str]:
+    """Segmentiert einen kompletten Transkript-Text in Aussagen."""
+    pieces = split_candidates(text)
+    if len(pieces) <= 1:
+        return pieces
+
+    feats = [pair_features(a, b) for a, b in zip(pieces, pieces[1:])]
+    p_same = model.predict_proba(feats)[:, 1]
+
+    segments, current, n_saetze = [], [pieces[0]], 1
+    for piece, p in zip(pieces[1:], p_same):
+        # Ordinal-/Abkürzungsfragmente zählen nicht als eigener Satz
+        is_sentence = not (ORDINAL_RE.search(current[-1]) or current[-1].lower().rstrip(".") in ABKUERZUNGEN)
+        if p >= threshold and (n_saetze < MAX_SAETZE or not is_sentence):
+            current.append(piece)
+            n_saetze += int(is_sentence)
+        else:
+            segments.append(" ".join(current))
+            current, n_saetze = [piece], 1
+    segments.append(" ".join(current))
+    return segments
+
+
+def save_model(model, path: Path):
+    with Path(path).open("wb") as f:
+        pickle.dump({"model": model, "threshold": THRESHOLD, "max_saetze": MAX_SAETZE}, f)
+
+
+def load_model(path: Path):
+    with Path(path).open("rb") as f:
+        bundle = pickle.load(f)
+    return bundle["model"]
+
+
+# ---------- Evaluation ----------
+def boundary_prf(pred: list[str], gold: list[str]) -> tuple[int, int, int]:
+    """Gibt (tp, fp, fn) der Segmentgrenzen zurück."""
+    p = boundary_offsets(pred)
+    g = boundary_offsets(gold)
+    return len(p & g), len(p - g), len(g - p)
+
+
+def _f1(tp: int, fp: int, fn: int) -> dict:
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def evaluate(corpus: dict[str, list[str]], folds: int = 5, seed: int = 42) -> dict:
+    """
+    Kreuzvalidierung über Spiele (nicht über Sätze), damit keine Formulierungen
+    eines Spiels gleichzeitig in Training und Test landen.
+    """
+    names = sorted(corpus)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(names))
+    fold_of = {names[i]: k % folds for k, i in enumerate(order)}
+
+    totals = {"modell": [0, 0, 0], "baseline": [0, 0, 0]}
+    n_segments, seconds = 0, 0.0
+
+    for k in range(folds):
+        train_corpus = {n: s for n, s in corpus.items() if fold_of[n] != k}
+        test_names = [n for n in names if fold_of[n] == k]
+        model = train(train_corpus)
+
+        for name in test_names:
+            gold = corpus[name]
+            text = " ".join(gold)
+
+            start = time.perf_counter()
+            pred = segment_text(text, model)
+            seconds += time.perf_counter() - start
+            n_segments += 1
+
+            assert strip_ws("".join(pred)) == strip_ws(text), f"Textverlust in {name}"
+
+            for key, segs in (("modell", pred), ("baseline", split_candidates(text))):
+                tp, fp, fn = boundary_prf(segs, gold)
+                totals[key][0] += tp
+                totals[key][1] += fp
+                totals[key][2] += fn
+
+    return {
+        "folds": folds,
+        "spiele": len(names),
+        "modell": _f1(*totals["modell"]),
+        "baseline_jede_grenze": _f1(*totals["baseline"]),
+        "sekunden_pro_transkript": seconds / max(n_segments, 1),
+    }
+
+
+# ---------- CLI ----------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lokaler Segmentierer für Kommentar-Transkripte.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_train = sub.add_parser("train", help="Modell auf segmentierten Spielen trainieren")
+    p_train.add_argument("data_dir", help="Ordner mit Spiel-JSONs (z.B. dataset/einzelspiele)")
+    p_train.add_argument("--model_out", default="segmenter.pkl", help="Zieldatei für das Modell")
+
+    p_eval = sub.add_parser("evaluate", help="Boundary-F1 per Kreuzvalidierung über Spiele")
+    p_eval.add_argument("data_dir", help="Ordner mit Spiel-JSONs")
+    p_eval.add_argument("--folds", type=int, default=5, help="Anzahl Folds (Standard: 5)")
+    p_eval.add_argument("--json_out", default=None, help="Optional: Ergebnisse als JSON speichern")
+
+    p_seg = sub.add_parser("segment", help="Textdatei segmentieren und JSON-Array ausgeben")
+    p_seg.add_argument("model", help="Pfad zum trainierten Modell")
+    p_seg.add_argument("text_file", help="Textdatei mit dem Transkript")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.cmd == "train":
+        corpus = load_corpus(Path(args.data_dir))
+        start = time.perf_counter()
+        model = train(corpus)
+        save_model(model, Path(args.model_out))
+        print(f"Modell trainiert auf {len(corpus)} Spielen in {time.perf_counter() - start:.1f}s")
+        print(f"Gespeichert: {args.model_out}")
+
+    elif args.cmd == "evaluate":
+        corpus = load_corpus(Path(args.data_dir))
+        res = evaluate(corpus, folds=args.folds)
+        for key in ("modell", "baseline_jede_grenze"):
+            r = res[key]
+            print(
+                f"{key:<22} Precision {r['precision']:.3f}  "
+                f"Recall {r['recall']:.3f}  F1 {r['f1']:.3f}"
+            )
+        print(f"Ø Laufzeit pro Transkript: {res['sekunden_pro_transkript'] * 1000:.1f} ms")
+        if args.json_out:
+            with open(args.json_out, "w", encoding="utf-8") as f:
+                json.dump(res, f, ensure_ascii=False, indent=2)
+
+    elif args.cmd == "segment":
+        model = load_model(Path(args.model))
+        text = Path(args.text_file).read_text(encoding="utf-8")
+        print(json.dumps(segment_text(text, model), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,34 @@
+"""
+Führt alle Spiel-JSONs aus mit_zuordnung inkrementell zu einer Tabelle zusammen.
+
+Jede Datei wird nur neu geparst, wenn sich ihr Inhalts-Hash geändert hat
+(Prozess-Pool, Zwischenergebnis pro Datei im Cache). Danach werden nur die
+betroffenen Saison-Partitionen neu geschrieben:
+
+    alle_saetze_23-25.csv
+    alle_saetze_23-25_parquet/<saison>/teil.parquet   (z.B. 23-24/teil.parquet)
+
+Einlesen der Parquet-Ausgabe: pd.read_parquet("alle_saetze_23-25_parquet")
+"""
+
 import json
+import time
+import shutil
+import hashlib
+import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 from pandas import json_normalize
 
 DATA_DIR = Path("mit_zuordnung")
 OUTPUT_CSV = "alle_saetze_23-25.csv"
+OUTPUT_PARQUET = Path("alle_saetze_23-25_parquet")
+CACHE_DIR = Path(".merge_cache")
+WORKERS = None  # None = Anzahl CPU-Kerne
+
+META_PREFIXES = ("meta.", "ergebnis.", "offizielle.")
 
 
 def load_one_json(path: Path) -> pd.DataFrame:
@@ -26,32 +50,139 @@ def load_one_json(path: Path) -> pd.DataFrame:
     return df
 
 
-files = sorted(DATA_DIR.glob("*.json"))
-if not files:
-    raise FileNotFoundError(f"Keine JSON-Dateien in {DATA_DIR} gefunden.")
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def saison_ordner(saison) -> str:
+    return str(saison).replace("/", "-")
+
 
-frames = []
-for p in files:
+def order_columns(df: pd.DataFrame) -> pd.DataFrame:
+    cols_transkript = [
+        c for c in df.columns if not c.startswith(META_PREFIXES) and c != "source_file"
+    ]
+    cols_meta = [c for c in df.columns if c.startswith(META_PREFIXES)]
+    df = df[cols_transkript + cols_meta + ["source_file"]]
+
+    if "meta.ballbesitz_bayern" in df.columns:
+        df = df.assign(**{"meta.ballbesitz_bayern": pd.to_numeric(df["meta.ballbesitz_bayern"], errors="coerce")})
+    return df
+
+
+def parse_to_cache(path: Path, cache_file: Path) -> tuple[str, float, str]:
+    """Worker: eine Datei parsen und als Parquet cachen. Rückgabe: (Saison, Sekunden, Fehler)."""
+    start = time.perf_counter()
     try:
-        frames.append(load_one_json(p))
+        df = order_columns(load_one_json(path))
+        df.to_parquet(cache_file, index=False)
+        saison = str(df["meta.saison"].iloc[0]) if "meta.saison" in df.columns and len(df) else ""
+        return saison, time.perf_counter() - start, ""
     except Exception as e:
-        print(f"Übersprungen: {p.name} ({e})")
+        return "", time.perf_counter() - start, str(e)
+
+
+def load_state() -> dict:
+    state_file = CACHE_DIR / "state.json"
+    if not state_file.is_file():
+        return {}
+    with state_file.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: dict):
+    with (CACHE_DIR / "state.json").open("w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
 
-big = pd.concat(frames, ignore_index=True)
 
-meta_prefixes = ("meta.", "ergebnis.", "offizielle.")
-cols_transkript = [
-    c for c in big.columns if not c.startswith(meta_prefixes) and c != "source_file"
-]
-cols_meta = [c for c in big.columns if c.startswith(meta_prefixes)]
-big = big[cols_transkript + cols_meta + ["source_file"]]
+def cached_frames(names: list[str]) -> list[pd.DataFrame]:
+    return [pd.read_parquet(CACHE_DIR / f"{Path(n).stem}.parquet") for n in names]
 
-if "meta.ballbesitz_bayern" in big.columns:
-    big["meta.ballbesitz_bayern"] = pd.to_numeric(
-        big["meta.ballbesitz_bayern"], errors="coerce"
+
+def write_partition(saison: str, names: list[str]):
+    ordner = OUTPUT_PARQUET / saison_ordner(saison)
+    if ordner.exists():
+        shutil.rmtree(ordner)
+    if not names:
+        return
+    ordner.mkdir(parents=True)
+    order_columns(pd.concat(cached_frames(names), ignore_index=True)).to_parquet(
+        ordner / "teil.parquet", index=False
     )
 
-print(big.head())
-print(f"Zeilen gesamt: {len(big):,}")
 
-big.to_csv(OUTPUT_CSV, index=False)
\ No newline at end of file
+def parse_args():
+    parser = argparse.ArgumentParser(description="Spiel-JSONs inkrementell zu CSV und Parquet zusammenführen.")
+    parser.add_argument("--voll", action="store_true", help="Cache ignorieren und alles neu aufbauen")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Anzahl Prozesse (Standard: alle Kerne)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    gesamt_start = time.perf_counter()
+
+    files = sorted(DATA_DIR.glob("*.json"))
+    if not files:
+        raise FileNotFoundError(f"Keine JSON-Dateien in {DATA_DIR} gefunden.")
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    state = {} if args.voll else load_state()
+
+    hashes = {p.name: file_hash(p) for p in files}
+    geaendert = [
+        p for p in files
+        if state.get(p.name, {}).get("hash") != hashes[p.name]
+        or not (CACHE_DIR / f"{p.stem}.parquet").is_file()
+    ]
+    entfernt = [n for n in state if n not in hashes]
+
+    # Saisons, deren Partition neu geschrieben werden muss (alte und neue Zuordnung)
+    betroffen = {state[n]["saison"] for n in entfernt}
+    betroffen |= {state[p.name]["saison"] for p in geaendert if p.name in state}
+
+    for n in entfernt:
+        (CACHE_DIR / f"{Path(n).stem}.parquet").unlink(missing_ok=True)
+        del state[n]
+
+    print(f"{len(files)} Dateien, {len(geaendert)} neu/geändert, {len(entfernt)} entfernt.")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        ergebnisse = pool.map(
+            parse_to_cache, geaendert, [CACHE_DIR / f"{p.stem}.parquet" for p in geaendert]
+        )
+        for p, (saison, dauer, fehler) in zip(geaendert, ergebnisse):
+            if fehler:
+                print(f"Übersprungen: {p.name} ({fehler})")
+                state.pop(p.name, None)
+                (CACHE_DIR / f"{p.stem}.parquet").unlink(missing_ok=True)
+                continue
+            print(f"  {p.name:<50} {dauer * 1000:7.1f} ms")
+            state[p.name] = {"hash": hashes[p.name], "saison": saison}
+            betroffen.add(saison)
+
+    if args.voll and OUTPUT_PARQUET.exists():
+        shutil.rmtree(OUTPUT_PARQUET)
+        betroffen = {s["saison"] for s in state.values()}
+
+    if not betroffen and Path(OUTPUT_CSV).is_file():
+        save_state(state)
+        print(f"Keine Änderungen. Gesamt: {time.perf_counter() - gesamt_start:.2f}s")
+        return
+
+    for saison in sorted(betroffen):
+        write_partition(saison, [n for n in sorted(state) if state[n]["saison"] == saison])
+        print(f"Partition {saison_ordner(saison)} neu geschrieben.")
+
+    # CSV bleibt eine Gesamtdatei und wird aus den gecachten Einzeltabellen zusammengesetzt
+    big = order_columns(pd.concat(cached_frames(sorted(state)), ignore_index=True))
+    big.to_csv(OUTPUT_CSV, index=False)
+    save_state(state)
+
+    print(big.head())
+    print(f"Zeilen gesamt: {len(big):,}")
+    print(f"Gesamt: {time.perf_counter() - gesamt_start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
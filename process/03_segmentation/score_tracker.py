@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Deterministische Bestimmung von Spielstand und Spielphase pro Segment.
+
+Ersetzt den LLM-Schritt für `klassifikation.tore_bayern`, `tore_gegner` und
+`phase` (siehe dataset/einzelspiele/info.md). Das Transkript wird einmal in
+Reihenfolge durchlaufen; ausgewertet werden Spielstände ("1:0 Bayern"),
+"Ausgleich"/"Anschlusstreffer", Tor-Hinweise, Minutenangaben sowie Anpfiff-,
+Halbzeit- und Abpfiff-Hinweise.
+
+Nutzung:
+    python score_tracker.py check ../../dataset/einzelspiele
+    python score_tracker.py annotate mit_zuordnung mit_klassifikation
+
+Wichtige Eigenschaften:
+- Spielstand und Phase können nur steigen. Statt jeden Hinweis sofort zu
+  übernehmen, wird im selben Durchlauf (Viterbi) der günstigste monotone
+  Verlauf bestimmt, der bei 0:0 beginnt und beim Endergebnis
+  (`ergebnis.bayern` / `ergebnis.gegner`) endet. Rückblicke ("im Hinspiel 8:2"),
+  Konjunktive ("Machen die Bayern das 3:0 ...") und Wiederholungen kosten
+  dadurch nur etwas, statt den Stand zu verfälschen.
+- Aufwand O(Segmente × Zustände²); ein komplettes Spiel dauert Millisekunden.
+- `check` vergleicht mit den vorhandenen Annotationen und dem Endergebnis.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+# Bezugsverein (Umgebungsvariable BEZUGSVEREIN, Standard FC Bayern München)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vereine import TEAM, namen  # noqa: E402
+
+SCORE_RE = re.compile(r"(?<![\d:.,])(\d{1,2})\s?:\s?(\d{1,2})(?![\d:])")
+MINUTE_RE = re.compile(
+    r"(?<![\d:])(\d{1,3})\.\s*(?:Minute|Spielminute)|"
+    r"(?:Minute|Spielminute)\s+(\d{1,3})(?!\d)|"
+    r"\b(90|45)\s*(?:plus|\+)\s*\d"
+)
+WORT_MINUTEN = {
+    "ersten": 1, "zweiten": 2, "dritten": 3, "vierten": 4, "fünften": 5, "sechsten": 6,
+    "siebten": 7, "achten": 8, "neunten": 9, "zehnten": 10, "elften": 11, "zwölften": 12,
+    "erste": 1, "zweite": 2, "dritte": 3, "vierte": 4, "fünfte": 5, "sechste": 6,
+    "siebte": 7, "achte": 8, "neunte": 9, "zehnte": 10, "elfte": 11, "zwölfte": 12,
+}
+WORT_MINUTE_RE = re.compile(r"\b(" + "|".join(WORT_MINUTEN) + r")\s+Minute\b", re.IGNORECASE)
+
+ANPFIFF_CUES = (
+    "anpfiff", "rein ins spiel", "los geht", "geht los", "geht's los", "spielbeginn",
+    "ersten minuten", "startphase", "anstoß", "erste chance", "ersten chance",
+    "erster abschluss", "ersten abschluss", "sekunden gespielt", "minute läuft",
+)
+PAUSE_CUES = (
+    "zur pause", "in die pause", "in die kabine", "halbzeitführung", "pausenpfiff",
+    "halbzeitpfiff", "vor der pause", "zur halbzeit",
+)
+HALBZEIT2_CUES = (
+    "zweite halbzeit", "zweiten halbzeit", "zweite hälfte", "zweiten hälfte",
+    "zweiten durchgang", "zweite durchgang", "wiederanpfiff", "nach der pause",
+    "nach dem seitenwechsel", "aus der kabine", "halbzeit zwei", "nach wiederbeginn",
+)
+ABPFIFF_CUES = (
+    "abpfiff", "schlusspfiff", "endstand", "spiel ist aus", "spiel ist vorbei",
+    "nach dem spiel", "am ende steht", "am ende gewinnt", "stimmen zum spiel",
+    "abo da", "aktuelle videos",
+)
+ENDE_VERBEN_RE = re.compile(
+    r"\b(gewinn\w*|siegt\w*|schlägt|verlier\w*|besiegt\w*|remis|unentschieden)\b", re.IGNORECASE
+)
+TOR_CUES = (
+    "treffer", "trifft", "torschütze", "netzt", "eingeschoben", "verwandelt",
+    "im netz", "in die maschen", "köpft ein", "schiebt ein", "zappelt",
+)
+# Spielstände in Bedingungs-, Frage- oder Beinahe-Sätzen sind keine Tore
+HYPOTHESE_RE = re.compile(
+    r"\b(wenn|falls|wäre|würde|könnte|hätte|müsste|muss|kann|soll|eigentlich|beinahe|fast|"
+    r"verhindert|machen die|macht der)\b|\?",
+    re.IGNORECASE,
+)
+# "bayern" steht in diesem Modul für den Bezugsverein (Spalten ergebnis.bayern, tore_bayern)
+BAYERN_WOERTER = tuple(namen(TEAM))
+
+# Kosten (frei gewählt, an den vorhandenen Annotationen abgestimmt)
+K_MENTION_ZUKUNFT = 0.5     # genannter Stand liegt (noch) vor uns
+K_MENTION_RUECKBLICK = 0.6  # genannter Stand liegt hinter uns
+K_MENTION_ANDERS = 1.0      # genannter Stand passt gar nicht
+K_RICHTUNG = 0.05           # Orientierung passt nicht zu Heim/Auswärts
+K_TOR_OHNE_HINWEIS = 0.3    # Tor in einem Segment ohne jeden Hinweis
+K_TOR_HINWEIS = 0.0
+K_TOR_MENTION = 0.0
+K_TOR_TEAM = 0.3            # Tor passt nicht zum Team-Kontext des Segments
+K_MEHRFACHTOR = 2.0         # mehr als ein Tor in einem Segment
+K_AUSGLEICH = 0.4           # "Ausgleich" genannt, Stand aber nicht ausgeglichen
+K_PHASE = 1.0
+K_PHASE_SCHWACH = 0.4
+K_PHASE_SPRUNG = 0.5
+K_PHASE_RAND = 0.08         # pro Segment in Vor- bzw. Nachbericht
+
+
+# ---------- Hilfsfunktionen ----------
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _has_any(text: str, cues) -> bool:
+    return any(c in text for c in cues)
+
+
+def minute_mentions(text: str) -> list[int]:
+    minuten = []
+    for m in MINUTE_RE.finditer(text):
+        value = next(g for g in m.groups() if g)
+        minuten.append(int(value))
+    for m in WORT_MINUTE_RE.finditer(text):
+        minuten.append(WORT_MINUTEN[m.group(1).lower()])
+    return [x for x in minuten if 0 < x <= 130]
+
+
+def score_mentions(text: str) -> list[tuple[int, int]]:
+    if HYPOTHESE_RE.search(text):
+        return []
+    return [
+        (int(a), int(b)) for a, b in SCORE_RE.findall(text)
+        if int(a) <= 15 and int(b) <= 15
+    ]
+
+
+def _team_hint(segment: dict, gegner: str) -> str | None:
+    """Welches Team ist im Segment gemeint? Bevorzugt `kontext`, sonst Stichwörter."""
+    kontext = str(segment.get("kontext") or "").strip()
+    if kontext == TEAM:
+        return "bayern"
+    if kontext and kontext.lower() != "neutral":
+        return "gegner"
+
+    text = str(segment.get("text", "")).lower()
+    bayern = _has_any(text, BAYERN_WOERTER)
+    gegner_woerter = [w for w in re.split(r"[\s.]+", gegner.lower()) if len(w) > 3]
+    other = _has_any(text, gegner_woerter)
+    if bayern and not other:
+        return "bayern"
+    if other and not bayern:
+        return "gegner"
+    return None
+
+
+def _viterbi(n: int, states: list, start, end, emission, transition) -> list:
+    """
+    Günstigster Pfad durch `states` über n Segmente.
+    emission(t, s) und transition(t, alt, neu) liefern Kosten (None = verboten).
+    """
+    INF = float("inf")
+    cost = {s: (emission(0, s) if s == start else INF) for s in states}
+    back = []
+
+    for t in range(1, n):
+        neu_cost, ptr = {}, {}
+        for s in states:
+            e = emission(t, s)
+            best, arg = INF, None
+            for alt, c in cost.items():
+                if c == INF:
+                    continue
+                tr = transition(t, alt, s)
+                if tr is None:
+                    continue
+                if c + tr < best:
+                    best, arg = c + tr, alt
+            neu_cost[s], ptr[s] = best + e, arg
+        cost = neu_cost
+        back.append(ptr)
+
+    ziel = end if end is not None and cost.get(end, INF) < INF else min(cost, key=cost.get)
+    pfad = [ziel]
+    for ptr in reversed(back):
+        pfad.append(ptr[pfad[-1]])
+    return pfad[::-1]
+
+
+# ---------- Spielstand ----------
+def track_scores(transkript: list[dict], heim: bool, gegner: str, final: tuple[int, int] | None):
+    n = len(transkript)
+    texts = [str(s.get("text", "")) for s in transkript]
+    mentions = [score_mentions(t) for t in texts]
+    hints = [_team_hint(s, gegner) for s in transkript]
+    lower = [t.lower() for t in texts]
+
+    if final is None:
+        # ohne Endergebnis: höchster plausibler Stand aus den Nennungen
+        fb = max([max(m) for ms in mentions for m in ms] or [0])
+        max_b = max_g = fb
+    else:
+        max_b, max_g = final
+
+    states = [(b, g) for b in range(max_b + 1) for g in range(max_g + 1)]
+
+    def emission(t, s):
+        c = 0.0
+        for x, y in mentions[t]:
+            heim_sicht = (x, y) if heim else (y, x)
+            if s in ((x, y), (y, x)):
+                c += 0.0 if s == heim_sicht or x == y else K_RICHTUNG
+            elif any(s[0] >= m[0] and s[1] >= m[1] for m in ((x, y), (y, x))):
+                c += K_MENTION_RUECKBLICK
+            elif any(s[0] <= m[0] and s[1] <= m[1] for m in ((x, y), (y, x))):
+                c += K_MENTION_ZUKUNFT
+            else:
+                c += K_MENTION_ANDERS
+
+        if "torlos" in lower[t] and s != (0, 0):
+            c += K_MENTION_ZUKUNFT
+
+        diff = s[0] - s[1]
+        if "ausgleich" in lower[t] and not mentions[t] and diff != 0 and not HYPOTHESE_RE.search(texts[t]):
+            c += K_AUSGLEICH
+        return c
+
+    def transition(t, alt, neu):
+        db, dg = neu[0] - alt[0], neu[1] - alt[1]
+        if db < 0 or dg < 0:
+            return None
+        tore = db + dg
+        if tore == 0:
+            return 0.0
+
+        if mentions[t]:
+            c = K_TOR_MENTION
+        elif _has_any(lower[t], TOR_CUES) or "ausgleich" in lower[t] or "anschluss" in lower[t]:
+            c = K_TOR_HINWEIS
+        else:
+            c = K_TOR_OHNE_HINWEIS
+
+        if (hints[t] == "bayern" and db == 0) or (hints[t] == "gegner" and dg == 0):
+            c += K_TOR_TEAM
+        return c + K_MEHRFACHTOR * (tore - 1)
+
+    return _viterbi(n, states, (0, 0), final, emission, transition)
+
+
+# ---------- Phase ----------
+def track_phases(transkript: list[dict], scores: list[tuple[int, int]], final: tuple[int, int] | None):
+    n = len(transkript)
+    texts = [str(s.get("text", "")) for s in transkript]
+
+    def wunsch(t):
+        """Liste (erlaubte Phasen, Kosten falls abweichend) aus den Hinweisen des Segments."""
+        text = texts[t]
+        lower = text.lower()
+        w = []
+        for m in minute_mentions(text):
+            w.append(({1} if m <= 45 else {2}, K_PHASE))
+        if _has_any(lower, ANPFIFF_CUES):
+            w.append(({1, 2}, K_PHASE_SCHWACH))
+        if _has_any(lower, PAUSE_CUES):
+            w.append(({1}, K_PHASE_SCHWACH))
+        if _has_any(lower, HALBZEIT2_CUES):
+            w.append(({2, 3}, K_PHASE))
+        tor = t > 0 and scores[t] != scores[t - 1]
+        if tor:
+            w.append(({1, 2}, K_PHASE))
+        am_ende = final is None or tuple(scores[t]) == tuple(final)
+        if am_ende and not tor and (
+            _has_any(lower, ABPFIFF_CUES)
+            or (SCORE_RE.search(text) and ENDE_VERBEN_RE.search(text))
+        ):
+            w.append(({3}, K_PHASE))
+        return w
+
+    wuensche = [wunsch(t) for t in range(n)]
+
+    def emission(t, p):
+        c = K_PHASE_RAND if p in (0, 3) else 0.0
+        for erlaubt, kosten in wuensche[t]:
+            if p not in erlaubt:
+                c += kosten
+        return c
+
+    def transition(t, alt, neu):
+        if neu < alt:
+            return None
+        return K_PHASE_SPRUNG * max(0, neu - alt - 1)
+
+    # Start in Phase 0 (Vorbericht), Ende in Phase 3 (Nachbericht)
+    return _viterbi(n, [0, 1, 2, 3], 0, 3, emission, transition)
+
+
+def track_match(data: dict) -> list[dict]:
+    """Berechnet `klassifikation` für alle Segmente eines Spiels."""
+    meta = data.get("meta") or {}
+    ergebnis = data.get("ergebnis") or {}
+    transkript = (data.get("content") or {}).get("transkript", [])
+    if not transkript:
+        return []
+
+    fb, fg = _as_int(ergebnis.get("bayern")), _as_int(ergebnis.get("gegner"))
+    final = (fb, fg) if fb is not None and fg is not None else None
+
+    scores = track_scores(
+        transkript,
+        heim=str(meta.get("heim_auswaerts", "")).strip().lower() == "heim",
+        gegner=str(meta.get("gegner") or ""),
+        final=final,
+    )
+    phases = track_phases(transkript, scores, final)
+
+    return [
+        {"tore_bayern": b, "tore_gegner": g, "phase": p}
+        for (b, g), p in zip(scores, phases)
+    ]
+
+
+# ---------- Prüfung & Annotation ----------
+def check(data_dir: Path) -> dict:
+    files = sorted(Path(data_dir).glob("*.json"))
+    if not files:
+        raise FileNotFoundError(f"Keine JSON-Dateien in {data_dir} gefunden.")
+
+    n = ok_score = ok_phase = ok_all = 0
+    final_ok = 0
+    seconds = 0.0
+
+    for path in files:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        start = time.perf_counter()
+        pred = track_match(data)
+        seconds += time.perf_counter() - start
+
+        for seg, p in zip(data["content"]["transkript"], pred):
+            gold = seg.get("klassifikation") or {}
+            s = (p["tore_bayern"], p["tore_gegner"]) == (gold.get("tore_bayern"), gold.get("tore_gegner"))
+            ph = p["phase"] == gold.get("phase")
+            n += 1
+            ok_score += s
+            ok_phase += ph
+            ok_all += s and ph
+
+        erg = data.get("ergebnis") or {}
+        ende = (pred[-1]["tore_bayern"], pred[-1]["tore_gegner"]) if pred else None
+        if ende == (_as_int(erg.get("bayern")), _as_int(erg.get("gegner"))):
+            final_ok += 1
+        else:
+            print(f"Endstand weicht ab: {path.name} → {ende} statt {erg.get('bayern')}:{erg.get('gegner')}")
+
+    return {
+        "spiele": len(files),
+        "segmente": n,
+        "spielstand_accuracy": ok_score / n if n else 0.0,
+        "phase_accuracy": ok_phase / n if n else 0.0,
+        "gesamt_accuracy": ok_all / n if n else 0.0,
+        "endstand_korrekt": final_ok,
+        "sekunden": seconds,
+    }
+
+
+def annotate(in_dir: Path, out_dir: Path):
+    files = sorted(Path(in_dir).glob("*.json"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for path in files:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        for seg, klass in zip(data["content"]["transkript"], track_match(data)):
+            seg["klassifikation"] = klass
+        with (out_dir / path.name).open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"{len(files)} Dateien annotiert → {out_dir}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Spielstand und Phase pro Segment bestimmen.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_check = sub.add_parser("check", help="Mit vorhandenen Annotationen vergleichen")
+    p_check.add_argument("data_dir", help="Ordner mit annotierten Spiel-JSONs")
+
+    p_ann = sub.add_parser("annotate", help="klassifikation-Felder neu berechnen")
+    p_ann.add_argument("in_dir", help="Eingabeordner mit Spiel-JSONs")
+    p_ann.add_argument("out_dir", help="Ausgabeordner")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "check":
+        res = check(Path(args.data_dir))
+        print(f"Spiele: {res['spiele']} | Segmente: {res['segmente']}")
+        print(f"Spielstand korrekt: {res['spielstand_accuracy']:.3f}")
+        print(f"Phase korrekt:      {res['phase_accuracy']:.3f}")
+        print(f"Beides korrekt:     {res['gesamt_accuracy']:.3f}")
+        print(f"Endstand korrekt:   {res['endstand_korrekt']}/{res['spiele']}")
+        print(f"Laufzeit:           {res['sekunden']:.2f}s")
+    else:
+        annotate(Path(args.in_dir), Path(args.out_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,31 @@
+import sys
 import json
+import argparse
+from pathlib import Path
+
+# Append-only Label-Journal (jede Eingabe sofort auf der Platte, Fortsetzen nach Abbruch)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from label_journal import LabelJournal, in_eintraege, journal_pfad, json_schreiben, segment_id  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Sätze manuell mit Stimmung und Bezug labeln.")
+parser.add_argument("eingabe", nargs="?", default="saetze3.json")
+parser.add_argument("ausgabe", nargs="?", default="saetze_mit_stimmung3.json")
+parser.add_argument("--journal", default=None, help="Standard: <ausgabe ohne .json>.labels.jsonl")
+args = parser.parse_args()
 
 # Datei mit den Sätzen laden
-with open("saetze3.json", "r", encoding="utf-8") as f:
+with open(args.eingabe, "r", encoding="utf-8") as f:
     saetze = json.load(f)
 
+# Bereits gelabelte Sätze aus dem Journal übernehmen und überspringen
+journal = LabelJournal(args.journal or journal_pfad(args.ausgabe))
+labels = journal.labels()
+n_fertig = in_eintraege(saetze, journal.stand(), {"label": "sentiment", "target": "target"})
+if n_fertig:
+    print(f"{n_fertig} Sätze bereits im Journal ({journal.path}), es geht mit dem Rest weiter.\n")
+
 print("Bitte gib zu jedem Satz eine Stimmung ein:")
-print("O = Neutral, P = Positiv, N = Negativ\n")
+print("O = Neutral, P = Positiv, N = Negativ (Strg+C = abbrechen, später fortsetzen)\n")
 
 # Zuordnung von Eingabe zu ausgeschriebenem Wert
 stimmungs_map = {
@@ -14,38 +34,49 @@ stimmungs_map = {
     "N": "Negativ"
 }
 
-for satz in saetze:
-    print(f"Satz {satz['index']}: {satz['text']}")
-    
-    # Stimmung abfragen
-    while True:
-        eingabe = input("Stimmung (O/P/N): ").strip().upper()
-        if eingabe in ["O", "P", "N"]:
-            stimmung = stimmungs_map[eingabe]
-            break
-        else:
-            print("Ungültige Eingabe. Bitte O, P oder N eingeben.")
-    
-    satz["sentiment"] = stimmung
+try:
+    for satz in saetze:
+        sid = segment_id(satz)
+        if sid in labels:
+            continue
+
+        print(f"Satz {satz['index']}: {satz['text']}")
 
-    # Wenn Positiv oder Negativ → nach Bezug fragen
-    if eingabe in ["P", "N"]:
+        # Stimmung abfragen
         while True:
-            bezug = input("Bezug (B = Bayern, G = Gegner): ").strip().upper()
-            if bezug in ["B", "G"]:
-                satz["target"] = "Bayern" if bezug == "B" else "Gegner"
+            eingabe = input("Stimmung (O/P/N): ").strip().upper()
+            if eingabe in ["O", "P", "N"]:
+                stimmung = stimmungs_map[eingabe]
                 break
             else:
-                print("Ungültige Eingabe. Bitte B oder G eingeben.")
-    else:
-        satz["target"] = None
+                print("Ungültige Eingabe. Bitte O, P oder N eingeben.")
+
+        satz["sentiment"] = stimmung
+
+        # Wenn Positiv oder Negativ → nach Bezug fragen
+        if eingabe in ["P", "N"]:
+            while True:
+                bezug = input("Bezug (B = Bayern, G = Gegner): ").strip().upper()
+                if bezug in ["B", "G"]:
+                    satz["target"] = "Bayern" if bezug == "B" else "Gegner"
+                    break
+                else:
+                    print("Ungültige Eingabe. Bitte B oder G eingeben.")
+        else:
+            satz["target"] = None
+
+        journal.append(sid, satz["sentiment"], target=satz["target"])
+        print()  # Leerzeile für bessere Übersicht
+except (KeyboardInterrupt, EOFError):
+    journal.close()
+    print(f"\nAbgebrochen. Bisherige Labels stehen im Journal {journal.path}; erneut starten zum Fortsetzen.")
+    sys.exit(0)
 
-    print()  # Leerzeile für bessere Übersicht
+journal.close()
 
 # Ergebnis speichern
-with open("saetze_mit_stimmung3.json", "w", encoding="utf-8") as f:
-    json.dump(saetze, f, ensure_ascii=False, indent=2)
+json_schreiben(saetze, args.ausgabe)
 
-print("\nFertig! Die Datei 'saetze_mit_stimmung3.json' wurde erstellt.")
+print(f"\nFertig! Die Datei '{args.ausgabe}' wurde erstellt.")
 print("Vorschau der ersten Einträge:")
 print(json.dumps(saetze[:5], ensure_ascii=False, indent=2))
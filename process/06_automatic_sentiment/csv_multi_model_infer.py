@@ -1,8 +1,18 @@
-import os, re, argparse
+import os, re, sys, time, json, hashlib, argparse
+_T0 = time.perf_counter()
+from functools import cache
+from pathlib import Path
 import numpy as np
 import pandas as pd
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+# torch/transformers erst beim ersten Laden eines Modells (--help, Vorbereitung und übersprungene Modelle ohne)
+from model_registry import ModelRegistry, kopie_anlegen, ladepfad
+from near_duplicates import near_duplicate_groups
+
+# Messung (Spans, Zähler) aus process/
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import instrumentation as instr  # noqa: E402
+from vereine import TEAM, andere_namen, kurzname, namen, verein  # noqa: E402  Bezugsverein (Umgebungsvariable BEZUGSVEREIN)
 
 # ==== Modelle hier eintragen: lokale Fine-Tunes ODER HF-Model-IDs ====
 MODELS = [
@@ -16,28 +26,33 @@ USE_TARGET_HINT = True
 ADD_CONFIDENCE = True             # optional: zusätzlich <spalte>__conf anhängen
 MAX_LEN = 160
 BATCH = 64
+DEDUP_THRESHOLD = 0.9             # Beinahe-Duplikate nur einmal inferieren (0 = aus)
+
+IMPORT_S = time.perf_counter() - _T0
+
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+@cache
+def get_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
 
 
 # ---------- Utility ----------
 def slug(s: str) -> str:
     return re.sub(r"[^A-Za-z0-9_.-]+", "_", s)
 
-def resolve_target(gegner: str | None, kontext: str | None) -> str | None:
+def resolve_target(gegner: str | None, kontext: str | None, team: str = TEAM) -> str | None:
+    """Bezug des Segments: Kurzname des Bezugsvereins (z. B. "Bayern"), "Gegner" oder None."""
     k = (kontext or "").strip().lower()
     g = (gegner or "").strip().lower()
-    if any(x in k for x in ["fc bayern", "bayern münchen", "bayern m\u00fcnchen", "fcb", "rekordmeister", "bayern"]):
-        return "Bayern"
+    if k == team.lower():
+        return kurzname(team)
     if g and (g in k or k in g or k == g):
         return "Gegner"
-    if any(x in k for x in [
-        "werder","bremen","borussia","dortmund","leverkusen","köln","koeln","freiburg","augsburg",
-        "stuttgart","gladbach","bochum","leipzig","union","hoffenheim","wolfsburg","mainz",
-        "heidenheim","darmstadt"
-    ]):
-        if "bayern" not in k:
-            return "Gegner"
+    if any(x in k for x in namen(team)):
+        return kurzname(team)
+    if any(x in k for x in andere_namen(team)):
+        return "Gegner"
     return None
 
 def apply_hint(text: str, target: str | None) -> str:
@@ -71,9 +86,14 @@ def get_label_mapping_from_config(model) -> list[str]:
 
 
 # ---------- Inferenz pro Modell ----------
-def predict_with_model(texts: list[str], model_id_or_dir: str):
-    tok = AutoTokenizer.from_pretrained(model_id_or_dir)
-    mdl = AutoModelForSequenceClassification.from_pretrained(model_id_or_dir).to(device).eval()
+def load_model(model_id_or_dir: str):
+    """Tokenizer, Modell und Label-Reihenfolge; wer mehrfach inferiert (live.py), lädt nur einmal."""
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    quelle, safetensors = ladepfad(model_id_or_dir)
+    with instr.span("laden", safetensors=safetensors):
+        tok = AutoTokenizer.from_pretrained(quelle)
+        mdl = AutoModelForSequenceClassification.from_pretrained(quelle).to(get_device()).eval()
 
     # Sicherstellen, dass das Modell 3 Klassen hat
     num_labels = getattr(mdl.config, "num_labels", None)
@@ -81,9 +101,22 @@ def predict_with_model(texts: list[str], model_id_or_dir: str):
         raise ValueError(f"Modell {model_id_or_dir} scheint nicht für 3-Klassen-Sentiment feingetunt zu sein (num_labels={num_labels}).")
 
     label_order = get_label_mapping_from_config(mdl)  # z. B. ['Negativ','Neutral','Positiv']
+    if not safetensors:
+        with instr.span("safetensors_kopie"):
+            print(f"  safetensors-Kopie: {kopie_anlegen(model_id_or_dir, tok, mdl)}")
+    return tok, mdl, label_order
+
+
+def predict_with_model(texts: list[str], model_id_or_dir: str, geladen=None):
+    import torch
+
+    tok, mdl, label_order = geladen or load_model(model_id_or_dir)
+    device = get_device()
 
     preds, confs = [], []
+    start = time.perf_counter()
     for i in range(0, len(texts), BATCH):
+        t_batch = time.perf_counter()
         batch = texts[i:i+BATCH]
         enc = tok(batch, truncation=True, padding=True, max_length=MAX_LEN, return_tensors="pt")
         enc = {k: v.to(device) for k, v in enc.items()}
@@ -93,40 +126,126 @@ def predict_with_model(texts: list[str], model_id_or_dir: str):
         ids = probs.argmax(axis=1)
         preds.extend([label_order[j] for j in ids])
         confs.extend(probs.max(axis=1))
+        instr.observe("inferenz.batch_s", time.perf_counter() - t_batch)
+    dauer = time.perf_counter() - start
+    instr.gauge(f"inferenz.{slug(model_id_or_dir)}.zeilen_pro_s", len(texts) / dauer if dauer else 0.0)
     return preds, confs
 
 
+# ---------- Vorbereitung ----------
+def prepare_texts(df: pd.DataFrame, team: str = TEAM) -> list[str]:
+    """Texte inkl. Target-Hint, eine Zeile pro Segment."""
+    prepped = []
+    for _, row in df.iterrows():
+        text = str(row["text"])
+        kontext = row.get("kontext", None)
+        gegner = row.get("meta.gegner", None)
+        target = resolve_target(gegner, kontext, team)
+        prepped.append(apply_hint(text, target))
+    return prepped
+
+def inference_groups(prepped: list[str], dedup_threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Beinahe-Duplikate (inkl. gleichem Target-Hint) zusammenfassen:
+    pro Gruppe wird nur der erste Text inferiert, das Ergebnis gilt für alle.
+    Rückgabe: (Indizes der zu inferierenden Texte, Position jeder Zeile darin).
+    """
+    if dedup_threshold > 0:
+        groups = near_duplicate_groups(prepped, dedup_threshold)
+    else:
+        groups = np.arange(len(prepped))
+    reps = np.unique(groups)
+    return reps, np.searchsorted(reps, groups)
+
+
+# ---------- Stand der Ausgabe ----------
+def model_columns(model_id_or_dir: str) -> list[str]:
+    """Spalten, die ein Modell anhängt: sentiment__<modell> (+ __conf)."""
+    col_pred = f"sentiment__{slug(os.path.basename(model_id_or_dir) or model_id_or_dir)}"
+    return [col_pred, f"{col_pred}__conf"] if ADD_CONFIDENCE else [col_pred]
+
+def input_fingerprint(prepped: list[str], dedup_threshold: float) -> str:
+    """Alles, was außer dem Modell in die Vorhersagen eingeht: Texte inkl. Hint und Parameter."""
+    h = hashlib.sha256(json.dumps([MAX_LEN, dedup_threshold]).encode("utf-8"))
+    for t in prepped:
+        h.update(t.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def state_path(out_csv: str) -> Path:
+    return Path(out_csv).with_suffix(".modelle.json")
+
+def current_columns(out_csv: str, stand: dict, fingerprints: dict[str, str], eingabe: str, n_rows: int) -> pd.DataFrame:
+    """Spalten aus out_csv, die mit demselben Modell-Fingerprint und derselben Eingabe entstanden sind."""
+    aktuell = [
+        c for m, fp in fingerprints.items() for c in model_columns(m)
+        if stand.get(c) == {"modell": fp, "eingabe": eingabe}
+    ]
+    if not aktuell or not Path(out_csv).is_file():
+        return pd.DataFrame()
+    vorhanden = pd.read_csv(out_csv, usecols=lambda c: c in aktuell)
+    return vorhanden if len(vorhanden) == n_rows else pd.DataFrame()
+
+
 # ---------- Main ----------
 def main():
     ap = argparse.ArgumentParser(description="Anhängen von Sentiment-Spalten (mehrere Modelle) an CSV")
     ap.add_argument("--in_csv", required=True, help="Eingabe-CSV (Komma-separiert)")
     ap.add_argument("--out_csv", default="sentiment_annotated.csv", help="Ausgabe-CSV")
+    ap.add_argument("--dedup_threshold", type=float, default=DEDUP_THRESHOLD,
+                    help=f"MinHash-Ähnlichkeit für gemeinsame Inferenz (Standard: {DEDUP_THRESHOLD}, 0 = aus)")
+    ap.add_argument("--team", default=TEAM, type=verein,
+                    help=f"Bezugsverein für den Target-Hint (Standard: {TEAM}, Umgebungsvariable BEZUGSVEREIN)")
+    ap.add_argument("--modelle", nargs="+", default=MODELS, help="Nur diese Einträge (Standard: alle in MODELS)")
+    ap.add_argument("--neu", action="store_true", help="Auch aktuelle Spalten neu berechnen")
     args = ap.parse_args()
+    instr.start("inferenz")
 
     df = pd.read_csv(args.in_csv)
 
-    # Texte vorbereiten (inkl. Target-Hint)
-    prepped = []
-    for _, row in df.iterrows():
-        text = str(row["text"])
-        kontext = row.get("kontext", None)
-        gegner = row.get("meta.gegner", None)
-        target = resolve_target(gegner, kontext)
-        prepped.append(apply_hint(text, target))
+    prepped = prepare_texts(df, args.team)
+    reps, pos = inference_groups(prepped, args.dedup_threshold)
+    unique_texts = [prepped[i] for i in reps]
+    instr.count("inferenz.zeilen", len(prepped))
+    instr.count("inferenz.dedup_gespart", len(prepped) - len(reps))
+    print(f"{len(prepped)} Texte in {len(reps)} Gruppen → {len(prepped) - len(reps)} Inferenzen pro Modell gespart.")
+
+    # Modelle nur bei Bedarf laden; Spalten mit gleichem Modell-Fingerprint und gleicher Eingabe übernehmen
+    registry = ModelRegistry(args.modelle, load_model)
+    eingabe = input_fingerprint(prepped, args.dedup_threshold)
+    stand_datei = state_path(args.out_csv)
+    stand = json.loads(stand_datei.read_text("utf-8")) if stand_datei.is_file() else {}
+    vorhanden = pd.DataFrame() if args.neu else current_columns(args.out_csv, stand, registry.fingerprints, eingabe, len(df))
+
+    kaltstart = time.perf_counter() - _T0
+    instr.gauge("inferenz.import_s", IMPORT_S)
+    instr.gauge("inferenz.kaltstart_s", kaltstart)
+    print(f"Start: {kaltstart:.2f}s (Importe {IMPORT_S:.2f}s)")
 
     # Für jedes Modell predicten und Spalten anhängen
-    for model_dir in MODELS:
-        col_base = slug(os.path.basename(model_dir) or model_dir)
-        col_pred = f"sentiment__{col_base}"
-        col_conf = f"{col_pred}__conf"
+    for model_dir in args.modelle:
+        spalten = model_columns(model_dir)
+        if all(c in vorhanden.columns for c in spalten):
+            df[spalten] = vorhanden[spalten]
+            instr.count("inferenz.modelle_aktuell")
+            print(f"→ Modell: {model_dir} aktuell, übersprungen")
+            continue
 
         print(f"→ Modell: {model_dir}")
-        preds, confs = predict_with_model(prepped, model_dir)
-        df[col_pred] = preds
+        with instr.span("modell", modell=model_dir, zeilen=len(unique_texts)):
+            geladen = registry.get(model_dir)
+            laden_s = registry.ladezeiten[model_dir]
+            instr.gauge(f"inferenz.{slug(model_dir)}.laden_s", laden_s)
+            print(f"  geladen in {laden_s:.2f}s")
+            preds, confs = predict_with_model(unique_texts, model_dir, geladen)
+        df[spalten[0]] = np.asarray(preds, dtype=object)[pos]
         if ADD_CONFIDENCE:
-            df[col_conf] = np.round(confs, 4)
+            df[spalten[1]] = np.round(np.asarray(confs)[pos], 4)
+        for c in spalten:
+            stand[c] = {"modell": registry.fingerprints[model_dir], "eingabe": eingabe}
 
     df.to_csv(args.out_csv, index=False)
+    stand_datei.write_text(json.dumps(stand, indent=1), "utf-8")
     print(f" Fertig. Datei geschrieben: {args.out_csv}")
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+"""
+Modell-Registry für csv_multi_model_infer.py: Fingerprints, safetensors-Kopie, Laden bei Bedarf.
+
+Fingerprint pro Eintrag in MODELS (ohne torch, in Millisekunden):
+    lokaler Ordner   Name, Größe und mtime jeder Datei
+    HF-Model-ID      ID + Commit des Snapshots im HF-Cache (refs/main)
+
+Beim ersten Laden wird eine Kopie mit safetensors-Gewichten samt Tokenizer
+unter CACHE_DIR/<slug>-<fingerprint>/ abgelegt. Danach lädt from_pretrained
+nur noch von dort: die Gewichte werden memory-mapped statt entpickelt, und
+für HF-IDs entfallen die Anfragen an den Hub. Lokale Ordner, die schon
+safetensors enthalten, werden direkt geladen. Ältere Kopien desselben
+Eintrags werden beim Anlegen einer neuen gelöscht.
+
+    registry = ModelRegistry(MODELS, load_model)
+    registry.fingerprints["./fine_tuned_german_sentiment"]   # ohne zu laden
+    tok, mdl, labels = registry.get("./fine_tuned_german_sentiment")
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+
+CACHE_DIR = Path(".modell_cache")
+
+
+def _slug(eintrag: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", eintrag.strip("./")) or "modell"
+
+
+def _hf_hub() -> Path:
+    if os.getenv("HF_HUB_CACHE"):
+        return Path(os.environ["HF_HUB_CACHE"])
+    return Path(os.getenv("HF_HOME") or Path.home() / ".cache" / "huggingface") / "hub"
+
+
+def fingerprint(eintrag: str) -> str:
+    pfad = Path(eintrag)
+    if pfad.is_dir():
+        teile = [
+            (str(p.relative_to(pfad)), p.stat().st_size, p.stat().st_mtime_ns)
+            for p in sorted(pfad.rglob("*")) if p.is_file()
+        ]
+    else:
+        ref = _hf_hub() / f"models--{eintrag.replace('/', '--')}" / "refs" / "main"
+        teile = [eintrag, ref.read_text().strip() if ref.is_file() else None]
+    return hashlib.sha256(json.dumps(teile).encode("utf-8")).hexdigest()[:16]
+
+
+def _hat_safetensors(pfad: Path) -> bool:
+    return pfad.is_dir() and any(pfad.glob("*.safetensors"))
+
+
+def kopie(eintrag: str) -> Path:
+    return CACHE_DIR / f"{_slug(eintrag)}-{fingerprint(eintrag)}"
+
+
+def ladepfad(eintrag: str) -> tuple[str, bool]:
+    """Wovon from_pretrained lädt → (Pfad oder ID, schon safetensors)."""
+    if _hat_safetensors(Path(eintrag)):
+        return eintrag, True
+    if (kopie(eintrag) / "config.json").is_file():
+        return str(kopie(eintrag)), True
+    return eintrag, False
+
+
+def kopie_anlegen(eintrag: str, tok, mdl) -> Path:
+    """Tokenizer und Modell als safetensors ablegen (erst in einen Temp-Ordner, dann umbenennen)."""
+    ziel = kopie(eintrag)
+    tmp = ziel.with_name(f"{ziel.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    mdl.save_pretrained(tmp, safe_serialization=True)
+    tok.save_pretrained(tmp)
+    shutil.rmtree(ziel, ignore_errors=True)
+    tmp.rename(ziel)
+    for alt in CACHE_DIR.glob(f"{_slug(eintrag)}-*"):
+        if alt != ziel and alt.name.rsplit("-", 1)[0] == _slug(eintrag) and ".tmp" not in alt.name:
+            shutil.rmtree(alt, ignore_errors=True)
+    return ziel
+
+
+class ModelRegistry:
+    """Einträge mit Fingerprint; geladen wird erst beim ersten get() und nur einmal."""
+
+    def __init__(self, eintraege: list[str], laden):
+        self.laden = laden
+        self.fingerprints = {e: fingerprint(e) for e in eintraege}
+        self.ladezeiten: dict[str, float] = {}
+        self._geladen: dict[str, tuple] = {}
+
+    def get(self, eintrag: str):
+        if eintrag not in self._geladen:
+            start = time.perf_counter()
+            self._geladen[eintrag] = self.laden(eintrag)
+            self.ladezeiten[eintrag] = time.perf_counter() - start
+            # HF-ID nach dem ersten Download: jetzt mit Commit
+            self.fingerprints[eintrag] = fingerprint(eintrag)
+        return self._geladen[eintrag]
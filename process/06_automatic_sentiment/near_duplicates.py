@@ -0,0 +1,219 @@
+"""
+Erkennung nahezu identischer Segmente über MinHash + LSH (nur numpy).
+
+Kommentatoren verwenden Standardfloskeln über viele Spiele hinweg
+("Und dann ist der Ball drin.", "Dann der Abpfiff."). Ein exakter
+String-Vergleich findet diese nur, wenn wirklich jedes Zeichen gleich ist.
+
+Verwendung:
+- csv_multi_model_infer.py: Inferenz einmal pro Gruppe, Ergebnis für alle Mitglieder
+- manuelles_sentiment_labeling.py: Stichprobe ohne Beinahe-Duplikate der Trainingssätze
+
+Kommandozeile:
+    python near_duplicates.py report kommentare.csv --threshold 0.8
+    python near_duplicates.py flag kommentare_annotiert.csv --train ../04_manual_labeling/Selbst_belabelt/*.json \\
+        --out kommentare_geflaggt.csv
+"""
+
+import re
+import json
+import zlib
+import argparse
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+NUM_PERM = 128
+SHINGLE = 5         # Zeichen-n-Gramme
+THRESHOLD = 0.8     # geschätzte Jaccard-Ähnlichkeit ab der zwei Texte als Duplikat gelten
+SEED = 1
+
+_PRIME = np.uint64((1 << 31) - 1)
+_MAX = np.uint32((1 << 31) - 2)
+
+
+def normalize(text: str) -> str:
+    text = str(text or "").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text: str, k: int = SHINGLE) -> np.ndarray:
+    """Hashes aller Zeichen-k-Gramme des normalisierten Textes (kurze Texte: ganzer Text)."""
+    t = normalize(text)
+    if not t:
+        return np.empty(0, dtype=np.uint64)
+    grams = {t[i:i + k] for i in range(max(1, len(t) - k + 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, text: str) -> np.ndarray:
+        x = shingles(text) % _PRIME
+        if len(x) == 0:
+            return np.full(self.num_perm, _MAX, dtype=np.uint32)
+        # (a·x + b) mod p für alle Shingles × Permutationen, dann Minimum je Permutation
+        h = (x[:, None] * self.a[None, :] + self.b[None, :]) % _PRIME
+        return h.min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts) -> np.ndarray:
+        return np.vstack([self.signature(t) for t in texts]) if len(texts) else np.empty((0, self.num_perm), np.uint32)
+
+
+def choose_bands(threshold: float, num_perm: int = NUM_PERM) -> tuple[int, int]:
+    """
+    (Bänder, Zeilen pro Band) mit b·r = num_perm. Die LSH-Schwelle (1/b)^(1/r)
+    wird etwas unter `threshold` gelegt, damit kaum echte Paare verloren gehen;
+    Kandidaten werden danach über die Signatur exakt geprüft.
+    """
+    ziel = threshold * 0.85
+    optionen = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(optionen, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - ziel))
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float((sig_a == sig_b).mean())
+
+
+class LSHIndex:
+    """Bänder-LSH über MinHash-Signaturen; Schlüssel sind beliebige IDs."""
+
+    def __init__(self, threshold: float = THRESHOLD, hasher: MinHasher | None = None):
+        self.hasher = hasher or MinHasher()
+        self.threshold = threshold
+        self.bands, self.rows = choose_bands(threshold, self.hasher.num_perm)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        self.sigs = {}
+
+    def _band_keys(self, sig: np.ndarray):
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key, text: str | None = None, sig: np.ndarray | None = None):
+        sig = self.hasher.signature(text) if sig is None else sig
+        self.sigs[key] = sig
+        for band, bkey in zip(self.buckets, self._band_keys(sig)):
+            band[bkey].append(key)
+
+    def query(self, text: str | None = None, sig: np.ndarray | None = None) -> list:
+        """Alle Schlüssel mit geschätzter Ähnlichkeit ≥ threshold."""
+        sig = self.hasher.signature(text) if sig is None else sig
+        kandidaten = set()
+        for band, bkey in zip(self.buckets, self._band_keys(sig)):
+            kandidaten.update(band.get(bkey, ()))
+        return [k for k in kandidaten if similarity(self.sigs[k], sig) >= self.threshold]
+
+
+def near_duplicate_groups(texts, threshold: float = THRESHOLD, hasher: MinHasher | None = None) -> np.ndarray:
+    """
+    Gruppen-ID pro Text (= Position des ersten Gruppenmitglieds).
+    Exakt gleiche normalisierte Texte landen immer in derselben Gruppe.
+    """
+    texts = list(texts)
+    index = LSHIndex(threshold, hasher)
+    parent = np.arange(len(texts))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    exakt = {}
+    for i, t in enumerate(texts):
+        norm = normalize(t)
+        if norm in exakt:
+            parent[i] = exakt[norm]
+            continue
+        exakt[norm] = i
+        sig = index.hasher.signature(t)
+        for j in index.query(sig=sig):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+        index.add(i, sig=sig)
+
+    return np.array([find(i) for i in range(len(texts))])
+
+
+def load_training_texts(json_paths) -> list[str]:
+    """Texte aus den Selbst_belabelt-JSONs (Liste von Objekten mit 'text')."""
+    texts = []
+    for path in json_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        texts.extend(e["text"] for e in data if isinstance(e, dict) and isinstance(e.get("text"), str))
+    return texts
+
+
+def flag_near_training(texts, training_texts, threshold: float = THRESHOLD) -> np.ndarray:
+    """Bool-Array: Text ist ein (Beinahe-)Duplikat eines Trainingssatzes."""
+    index = LSHIndex(threshold)
+    exakt = set()
+    for i, t in enumerate(training_texts):
+        index.add(i, t)
+        exakt.add(normalize(t))
+    return np.array([normalize(t) in exakt or bool(index.query(t)) for t in texts], dtype=bool)
+
+
+def group_report(groups: np.ndarray, texts, beispiele: int = 5):
+    ids, counts = np.unique(groups, return_counts=True)
+    n = len(groups)
+    print(f"Texte:                  {n}")
+    print(f"Gruppen:                {len(ids)}")
+    print(f"Gruppen mit >1 Mitglied: {(counts > 1).sum()} ({counts[counts > 1].sum()} Texte)")
+    print(f"Gesparte Inferenz:      {n - len(ids)} Texte ({(n - len(ids)) / max(n, 1):.1%})")
+    for gid in ids[np.argsort(-counts)][:beispiele]:
+        mitglieder = np.flatnonzero(groups == gid)
+        if len(mitglieder) < 2:
+            break
+        varianten = sorted({str(texts[i]) for i in mitglieder})
+        print(f"\n  {len(mitglieder)}× ({len(varianten)} Varianten), z.B.:")
+        for v in varianten[:3]:
+            print(f"    - {v}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Beinahe-Duplikate in Kommentar-Segmenten finden.")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    p = sub.add_parser("report", help="Cluster und gesparte Inferenz für eine CSV ausgeben")
+    p.add_argument("csv", help="CSV mit Spalte 'text'")
+    p.add_argument("--threshold", type=float, default=THRESHOLD)
+
+    p = sub.add_parser("flag", help="Zeilen markieren, die Trainingssätzen (fast) gleichen")
+    p.add_argument("csv", help="Evaluations-CSV mit Spalte 'text'")
+    p.add_argument("--train", nargs="+", required=True, help="JSON-Dateien aus Selbst_belabelt")
+    p.add_argument("--out", help="CSV mit zusätzlicher Spalte 'near_dup_train' schreiben")
+    p.add_argument("--threshold", type=float, default=THRESHOLD)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    df = pd.read_csv(args.csv)
+    texts = df["text"].astype(str).tolist()
+
+    if args.befehl == "report":
+        group_report(near_duplicate_groups(texts, args.threshold), texts)
+
+    elif args.befehl == "flag":
+        flags = flag_near_training(texts, load_training_texts(args.train), args.threshold)
+        exakt = df["text"].isin(set(load_training_texts(args.train))).to_numpy()
+        print(f"{flags.sum()} von {len(df)} Zeilen gleichen Trainingssätzen ({exakt.sum()} davon exakt).")
+        for t in df.loc[flags & ~exakt, "text"].head(10):
+            print(f"  ~ {t}")
+        if args.out:
+            df["near_dup_train"] = flags
+            df.to_csv(args.out, index=False)
+            print(f"Geschrieben: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
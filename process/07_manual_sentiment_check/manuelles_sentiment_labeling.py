@@ -8,13 +8,17 @@ Nutzung:
         Selbst_belabelt/saetze_mit_stimmung2.json Selbst_belabelt/saetze_mit_stimmung3.json
 
 Wichtige Eigenschaften:
-- Sätze aus den JSON-Dateien (Trainingsdaten) werden ausgeschlossen.
+- Sätze aus den JSON-Dateien (Trainingsdaten) werden ausgeschlossen, auch
+  Beinahe-Duplikate davon (MinHash, `--near_dup_threshold`).
 - Bereits manuell gelabelte Zeilen (Spalte `sentiment__manual`) werden komplett
   übersprungen.
 - Du definierst ein Ziel (`--target_total`, z.B. 700). Das Skript zieht pro Lauf
   nur noch so viele neue Sätze, wie fehlen.
 - Du gibst 'p' (positiv), 'o' (neutral), 'n' (negativ) ein.
-- Nach jeder Annotation wird automatisch in die Output-CSV gespeichert.
+- Jede Annotation wird sofort an ein Journal neben der Output-CSV angehängt
+  (`kommentare_annotiert.labels.jsonl`, siehe ../label_journal.py). Die CSV
+  selbst wird nur beim Beenden (auch mit 'q' oder Strg+C) einmal geschrieben.
+  Nach einem Absturz übernimmt der nächste Start die Labels aus dem Journal.
 """
 
 import argparse
@@ -23,6 +27,13 @@ import json
 import pandas as pd
 from pathlib import Path
 
+# MinHash/LSH-Index aus 06_automatic_sentiment
+sys.path.append(str(Path(__file__).resolve().parents[1] / "06_automatic_sentiment"))
+from near_duplicates import flag_near_training  # noqa: E402
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from label_journal import LabelJournal, csv_schreiben, in_dataframe, journal_pfad, segment_ids  # noqa: E402
+
 
 def parse_args():
     """Kommandozeilenargumente parsen."""
@@ -70,6 +81,20 @@ def parse_args():
             "vorkommen dürfen (z.B. Trainingsdaten)."
         )
     )
+    parser.add_argument(
+        "--near_dup_threshold",
+        type=float,
+        default=0.8,
+        help=(
+            "Ab dieser geschätzten Ähnlichkeit gilt ein Satz als Beinahe-Duplikat "
+            "eines Ausschluss-Textes (Standard: 0.8, 0 = nur exakte Treffer)"
+        )
+    )
+    parser.add_argument(
+        "--journal",
+        default=None,
+        help="Label-Journal (Standard: <output_csv ohne .csv>.labels.jsonl)"
+    )
     return parser.parse_args()
 
 
@@ -141,6 +166,15 @@ def main():
                 f"{removed} Zeilen aufgrund von Ausschluss-Texten entfernt "
                 f"({filtered_len} Zeilen verbleiben)."
             )
+
+            # Standardfloskeln kommen leicht abgewandelt in vielen Spielen vor
+            if args.near_dup_threshold > 0:
+                near = flag_near_training(df["text"].astype(str), list(excluded_texts), args.near_dup_threshold)
+                df = df[~near].copy()
+                print(
+                    f"{near.sum()} weitere Zeilen als Beinahe-Duplikate entfernt "
+                    f"({len(df)} Zeilen verbleiben)."
+                )
         else:
             print("Hinweis: Keine gültigen Ausschluss-Texte geladen, es wurde nichts gefiltert.")
 
@@ -161,6 +195,12 @@ def main():
     if args.manual_col not in df.columns:
         df[args.manual_col] = pd.NA
 
+    # Labels aus dem Journal übernehmen (z.B. nach einem Absturz vor dem letzten CSV-Export)
+    journal = LabelJournal(args.journal or journal_pfad(args.output_csv))
+    n_journal = in_dataframe(df, journal.stand(), args.manual_col)
+    if n_journal:
+        print(f"{n_journal} Labels aus dem Journal übernommen ({journal.path}).")
+
     # *** WICHTIG: Fortschritt über sentiment__manual verfolgen ***
 
     # Anzahl bereits manuell gelabelter Zeilen
@@ -193,10 +233,38 @@ def main():
     print(f"In diesem Lauf werden {n_samples} neue Sätze zur Annotation gezogen.")
 
     sampled_df = unlabeled_df.sample(n=n_samples, random_state=args.random_state)
+    sampled_ids = segment_ids(sampled_df)
 
     print("\nStarte manuelle Sentiment-Überprüfung.")
     print("Gib ein: p = positiv, o = neutral, n = negativ, q = abbrechen.\n")
 
+    newly_labeled = 0
+    try:
+        newly_labeled = annotieren(df, sampled_df, sampled_ids, sentiment_cols, journal, args.manual_col)
+    except KeyboardInterrupt:
+        print("\nAbbruch durch Benutzer (Strg+C).")
+        newly_labeled = df[args.manual_col].notna().sum() - current_labeled
+    finally:
+        journal.close()
+
+    # Journal einmal in die CSV übernehmen
+    try:
+        csv_schreiben(df, args.output_csv)
+    except Exception as e:
+        print(f"Fehler beim Speichern der CSV-Datei: {e}")
+        print(f"Die Labels sind im Journal gesichert: {journal.path}")
+        sys.exit(1)
+
+    print("\nLauf beendet.")
+    print(f"In diesem Lauf neu gelabelt: {newly_labeled}")
+    total_now = current_labeled + newly_labeled
+    print(f"Insgesamt jetzt manuell gelabelt: {total_now} von Ziel {args.target_total}.")
+    print(f"Aktuelle Datei gespeichert in: {args.output_csv}")
+
+
+def annotieren(df, sampled_df, sampled_ids, sentiment_cols, journal, manual_col):
+    """Gezogene Zeilen abfragen; jedes Label geht sofort ins Journal → Anzahl neuer Labels."""
+    n_samples = len(sampled_df)
     newly_labeled = 0
 
     # Über alle zufällig ausgewählten, ungelabelten Zeilen iterieren
@@ -220,31 +288,18 @@ def main():
 
             if user_input in ("p", "o", "n"):
                 manual_label = user_input  # alternativ Mapping auf 'positiv', 'neutral', 'negativ'
-                df.at[idx, args.manual_col] = manual_label
+                # Erst ins Journal (konstante Kosten, fsync), dann in den DataFrame
+                journal.append(sampled_ids[idx], manual_label)
+                df.at[idx, manual_col] = manual_label
                 newly_labeled += 1
                 break
             elif user_input == "q":
                 print("Abbruch durch Benutzer. Bisherige Annotationen werden gespeichert.")
-                try:
-                    df.to_csv(args.output_csv, index=False)
-                    print(f"Zwischenergebnis gespeichert in: {args.output_csv}")
-                except Exception as e:
-                    print(f"Fehler beim Speichern der CSV-Datei: {e}")
-                sys.exit(0)
+                return newly_labeled
             else:
                 print("Ungültige Eingabe. Bitte 'p', 'o', 'n' oder 'q' eingeben.")
 
-        # Nach jeder Annotation automatisch speichern
-        try:
-            df.to_csv(args.output_csv, index=False)
-        except Exception as e:
-            print(f"Warnung: Konnte nach Satz {i} nicht speichern: {e}")
-
-    print("\nLauf beendet.")
-    print(f"In diesem Lauf neu gelabelt: {newly_labeled}")
-    total_now = current_labeled + newly_labeled
-    print(f"Insgesamt jetzt manuell gelabelt: {total_now} von Ziel {args.target_total}.")
-    print(f"Aktuelle Datei gespeichert in: {args.output_csv}")
+    return newly_labeled
 
 
 if __name__ == "__main__":
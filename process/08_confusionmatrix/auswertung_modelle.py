@@ -13,12 +13,35 @@ Voraussetzungen:
     - sentiment__xlm-roberta-base
     - sentiment__german-sentiment-bert
     - sentiment__german-news-sentiment-bert
-  (Namen kannst du unten in `model_cols` anpassen.)
+  (Namen kannst du oben in `MODEL_COLS` anpassen.)
+
+Neben Accuracy und Konfusionsmatrix: Precision/Recall/F1 pro Klasse,
+Macro-F1 und Cohen's Kappa, jeweils mit Bootstrap-Konfidenzintervall
+(siehe evaluation.py). Export:
+
+    python auswertung_modelle.py kommentare_annotiert.csv --out_json auswertung.json --out_csv auswertung.csv
 """
 
+import sys
 import argparse
+from pathlib import Path
+
 import pandas as pd
 
+# typisierter Loader aus 09_explorative_analysis
+sys.path.append(str(Path(__file__).resolve().parents[1] / "09_explorative_analysis"))
+from sentiment_data import load_dataset  # noqa: E402
+
+from evaluation import KLASSEN, N_BOOT, ALPHA, evaluate, write_json, write_csv
+
+# Modell-Spalten, die wir vergleichen wollen
+MODEL_COLS = [
+    "sentiment__fine_tuned_german_sentiment",
+    "sentiment__xlm-roberta-base",
+    "sentiment__german-sentiment-bert",
+    "sentiment__german-news-sentiment-bert",
+]
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -33,51 +56,39 @@ def parse_args():
         default="sentiment__manual",
         help="Spaltenname für das manuelle Label (Standard: 'sentiment__manual')"
     )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=N_BOOT,
+        help=f"Anzahl Bootstrap-Replikate für Konfidenzintervalle (Standard: {N_BOOT}, 0 = aus)"
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=ALPHA,
+        help=f"Irrtumswahrscheinlichkeit der Intervalle (Standard: {ALPHA})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Prozesse für den Bootstrap (Standard: alle Kerne)"
+    )
+    parser.add_argument("--out_json", help="Ergebnisse als JSON schreiben")
+    parser.add_argument("--out_csv", help="Ergebnisse als CSV schreiben (eine Zeile pro Kennzahl)")
     return parser.parse_args()
 
 
-def normalize_label(label: str):
-    """
-    Normalisiert ein Label (manuell ODER Modell) auf eines von:
-    'pos' (positiv), 'neu' (neutral), 'neg' (negativ).
-
-    Versucht dabei robust auf verschiedene Schreibweisen zu reagieren:
-    - p / positiv / positive
-    - o / neutral / neu
-    - n / negativ / negative
-    - 1 / 0 / -1 usw.
-
-    Gibt None zurück, wenn nichts erkannt wird.
-    """
-    if label is None:
-        return None
-
-    s = str(label).strip().lower()
-
-    # direkt Kürzel
-    if s in {"p", "pos", "positiv", "positive", "1"}:
-        return "pos"
-    if s in {"o", "neu", "neutral", "0"}:
-        return "neu"
-    if s in {"n", "neg", "negativ", "negative", "-1"}:
-        return "neg"
-
-    # heuristisch über enthaltene Wörter
-    if "pos" in s:
-        return "pos"
-    if "neu" in s or "neutral" in s:
-        return "neu"
-    if "neg" in s:
-        return "neg"
-
-    return None
+def fmt(kennzahl: dict) -> str:
+    ci = kennzahl.get("ci")
+    return f"{kennzahl['wert']:.3f}" + (f" [{ci[0]:.3f}, {ci[1]:.3f}]" if ci else "")
 
 
 def main():
     args = parse_args()
 
-    # CSV laden
-    df = pd.read_csv(args.input_csv)
+    # CSV laden (nur Label-Spalten, als Kategorien)
+    df = load_dataset(args.input_csv, columns=[args.manual_col] + MODEL_COLS, derived=False)
 
     if args.manual_col not in df.columns:
         raise ValueError(f"Manuelle Spalte '{args.manual_col}' nicht in CSV gefunden.")
@@ -91,62 +102,45 @@ def main():
         print("Keine Zeilen mit manuellem Label vorhanden – Abbruch.")
         return
 
-    # Manuelle Labels normalisieren
-    df["manual_norm"] = df[args.manual_col].apply(normalize_label)
-    df = df[df["manual_norm"].notna()].copy()
-    n_manual_norm = len(df)
-    print(f"Nach Normalisierung der manuellen Labels verbleiben {n_manual_norm} Zeilen.\n")
-
-    # Modell-Spalten, die wir vergleichen wollen
-    model_cols = [
-        "sentiment__fine_tuned_german_sentiment",
-        "sentiment__xlm-roberta-base",
-        "sentiment__german-sentiment-bert",
-        "sentiment__german-news-sentiment-bert",
-    ]
     # nur Spalten verwenden, die es wirklich gibt
-    model_cols = [c for c in model_cols if c in df.columns]
+    model_cols = [c for c in MODEL_COLS if c in df.columns]
 
     if not model_cols:
         print("Keine der erwarteten Modell-Spalten gefunden – nichts zu vergleichen.")
         return
 
-    results = []
-
-    for col in model_cols:
-        # Modell-Labels normalisieren
-        norm_col = f"{col}__norm"
-        df[norm_col] = df[col].apply(normalize_label)
+    # Normalisierung, Matrizen, Kennzahlen und Bootstrap für alle Modelle auf einmal
+    ergebnis = evaluate(
+        df, args.manual_col, model_cols,
+        n_boot=args.bootstrap, alpha=args.alpha, workers=args.workers,
+    )
+    print(f"Nach Normalisierung der manuellen Labels verbleiben {ergebnis['n_manuell']} Zeilen.\n")
 
-        # Nur Zeilen, wo sowohl manuell als auch Modell ein gültiges Label haben
-        mask_valid = df[norm_col].notna() & df["manual_norm"].notna()
-        df_valid = df[mask_valid].copy()
-        n_valid = len(df_valid)
+    results = []
 
-        if n_valid == 0:
+    for r in ergebnis["modelle"]:
+        col = r["model"]
+        if r["n_valid"] == 0:
             print(f"Modell '{col}': Keine vergleichbaren Zeilen (alle Labels None).")
             continue
-
-        # Korrektklassifizierung
-        correct = (df_valid[norm_col] == df_valid["manual_norm"]).sum()
-        accuracy = correct / n_valid
-
-        results.append({
-            "model": col,
-            "n_valid": n_valid,
-            "correct": correct,
-            "accuracy": accuracy,
-        })
+        results.append(r)
 
         print(f"Modell: {col}")
-        print(f"  Vergleichbare Zeilen: {n_valid}")
-        print(f"  Korrekt:               {correct}")
-        print(f"  Accuracy:              {accuracy:.3f}")
+        print(f"  Vergleichbare Zeilen: {r['n_valid']}")
+        print(f"  Korrekt:               {r['correct']}")
+        print(f"  Accuracy:              {fmt(r['accuracy'])}")
+        print(f"  Macro-F1:              {fmt(r['macro_f1'])}")
+        print(f"  Cohen's Kappa:         {fmt(r['kappa'])}")
+        for klasse in KLASSEN:
+            print(
+                f"  {klasse}: P {fmt(r['precision'][klasse])}  "
+                f"R {fmt(r['recall'][klasse])}  F1 {fmt(r['f1'][klasse])}"
+            )
 
-        # einfache "Konfusionsmatrix" ausgeben
         print("  Konfusionsmatrix (manuell -> Modell):")
-        crosstab = pd.crosstab(df_valid["manual_norm"], df_valid[norm_col])
-        print(crosstab, "\n")
+        cm = pd.DataFrame(r["konfusionsmatrix"], index=KLASSEN, columns=KLASSEN)
+        cm.index.name, cm.columns.name = "manual_norm", col
+        print(cm, "\n")
 
     if not results:
         print("Es konnten keine sinnvollen Vergleiche berechnet werden.")
@@ -154,19 +148,27 @@ def main():
 
     # Modelle nach Accuracy sortiert anzeigen
     print("\n=== Zusammenfassung (nach Accuracy sortiert) ===")
-    results_sorted = sorted(results, key=lambda x: x["accuracy"], reverse=True)
+    results_sorted = sorted(results, key=lambda x: x["accuracy"]["wert"], reverse=True)
     for r in results_sorted:
         print(
-            f"{r['model']}: Accuracy {r['accuracy']:.3f} "
-            f"({r['correct']}/{r['n_valid']} korrekt)"
+            f"{r['model']}: Accuracy {r['accuracy']['wert']:.3f} "
+            f"({r['correct']}/{r['n_valid']} korrekt), "
+            f"Macro-F1 {r['macro_f1']['wert']:.3f}, Kappa {r['kappa']['wert']:.3f}"
         )
 
     best = results_sorted[0]
     print(
         f"\nBestes Modell auf diesen Daten: {best['model']} "
-        f"mit Accuracy {best['accuracy']:.3f}"
+        f"mit Accuracy {best['accuracy']['wert']:.3f}"
     )
 
+    if args.out_json:
+        write_json(ergebnis, args.out_json)
+        print(f"JSON geschrieben: {args.out_json}")
+    if args.out_csv:
+        write_csv(ergebnis, args.out_csv)
+        print(f"CSV geschrieben: {args.out_csv}")
+
 
 if __name__ == "__main__":
     main()
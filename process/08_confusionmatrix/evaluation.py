@@ -0,0 +1,242 @@
+"""
+Vektorisierte Auswertung mehrerer Modelle gegen die manuellen Labels.
+
+- Labels werden einmal pro eindeutigem Wert normalisiert und als int8
+  kodiert (0 = neg, 1 = neu, 2 = pos, -1 = unbekannt)
+- Konfusionsmatrizen aller Modelle in einem bincount
+- Precision/Recall/F1 pro Klasse, Macro-F1, Accuracy und Cohen's Kappa
+  direkt aus den Matrizen, auch für beliebig viele Matrizen auf einmal
+- Bootstrap-Konfidenzintervalle: Index-Matrizen je Block, Blöcke verteilt
+  auf mehrere Prozesse
+
+Verwendet von auswertung_modelle.py; Export als JSON (vollständig) und CSV
+(eine Zeile pro Modell, Kennzahl und Klasse).
+"""
+
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+KLASSEN = ["neg", "neu", "pos"]
+N_BOOT = 1000
+ALPHA = 0.05
+SEED = 42
+BLOCK = 250            # Bootstrap-Replikate pro Aufgabe
+
+
+def normalize_label(label: str):
+    """
+    Normalisiert ein Label (manuell ODER Modell) auf eines von:
+    'pos' (positiv), 'neu' (neutral), 'neg' (negativ).
+
+    Versucht dabei robust auf verschiedene Schreibweisen zu reagieren:
+    - p / positiv / positive
+    - o / neutral / neu
+    - n / negativ / negative
+    - 1 / 0 / -1 usw.
+
+    Gibt None zurück, wenn nichts erkannt wird.
+    """
+    if label is None:
+        return None
+
+    s = str(label).strip().lower()
+
+    # direkt Kürzel
+    if s in {"p", "pos", "positiv", "positive", "1"}:
+        return "pos"
+    if s in {"o", "neu", "neutral", "0"}:
+        return "neu"
+    if s in {"n", "neg", "negativ", "negative", "-1"}:
+        return "neg"
+
+    # heuristisch über enthaltene Wörter
+    if "pos" in s:
+        return "pos"
+    if "neu" in s or "neutral" in s:
+        return "neu"
+    if "neg" in s:
+        return "neg"
+
+    return None
+
+
+def encode_labels(werte: pd.Series) -> np.ndarray:
+    """normalize_label nur für die eindeutigen Werte, danach Lookup über die Kategorie-Codes."""
+    cat = werte.astype("category").cat
+    klasse = {k: i for i, k in enumerate(KLASSEN)}
+    lookup = np.array(
+        [klasse.get(normalize_label(c), -1) for c in cat.categories] + [-1],
+        dtype="int8",
+    )
+    return lookup[cat.codes.to_numpy()]  # Code -1 (fehlend) greift auf das letzte Element
+
+
+def confusion_matrices(y_true: np.ndarray, y_pred: np.ndarray, idx: np.ndarray | None = None) -> np.ndarray:
+    """
+    y_true (n,), y_pred (M, n) → Konfusionsmatrizen (M, K, K), Zeilen = manuell.
+    Mit `idx` (B, n) werden die Zeilen je Replikat daraus gezogen → (B, M, K, K).
+    Paare mit unbekanntem Label landen in einem Abfall-Feld und zählen nicht.
+    """
+    k = len(KLASSEN)
+    zellen = k * k + 1
+    m = y_pred.shape[0]
+
+    if idx is None:
+        t, p = y_true[None, :], y_pred
+    else:
+        t, p = y_true[idx][:, None, :], y_pred[:, idx].transpose(1, 0, 2)   # (B, 1, n), (B, M, n)
+
+    gueltig = (t >= 0) & (p >= 0)
+    zelle = np.where(gueltig, t.astype(np.int64) * k + p, k * k)
+    versatz = np.arange(zelle.size // zelle.shape[-1]).reshape(zelle.shape[:-1])[..., None] * zellen
+    counts = np.bincount((zelle + versatz).ravel(), minlength=versatz.size * zellen)
+    counts = counts.reshape(*zelle.shape[:-1], zellen)[..., :k * k]
+    form = (m, k, k) if idx is None else (idx.shape[0], m, k, k)
+    return counts.reshape(form)
+
+
+def metrics_from_confusion(cm: np.ndarray) -> dict[str, np.ndarray]:
+    """Kennzahlen für Matrizen der Form (..., K, K); Division durch 0 ergibt 0 (wie sklearn)."""
+    cm = cm.astype(np.float64)
+    tp = np.diagonal(cm, axis1=-2, axis2=-1)
+    zeilen = cm.sum(axis=-1)          # manuell
+    spalten = cm.sum(axis=-2)         # Modell
+    n = zeilen.sum(axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(spalten > 0, tp / spalten, 0.0)
+        recall = np.where(zeilen > 0, tp / zeilen, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        accuracy = np.where(n > 0, tp.sum(axis=-1) / n, 0.0)
+        pe = np.where(n > 0, (zeilen * spalten).sum(axis=-1) / n ** 2, 0.0)
+        kappa = np.where(pe < 1, (accuracy - pe) / (1 - pe), 0.0)
+
+    return {
+        "n": n,
+        "accuracy": accuracy,
+        "macro_f1": f1.mean(axis=-1),
+        "kappa": kappa,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+    }
+
+
+def _bootstrap_block(y_true: np.ndarray, y_pred: np.ndarray, b: int, seed: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(y_true), size=(b, len(y_true)))
+    return metrics_from_confusion(confusion_matrices(y_true, y_pred, idx))
+
+
+def bootstrap(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    n_boot: int = N_BOOT,
+    seed: int = SEED,
+    workers: int | None = None,
+) -> dict[str, np.ndarray]:
+    """Kennzahlen aller Replikate, je Kennzahl (n_boot, M[, K]); Blöcke parallel."""
+    bloecke = [min(BLOCK, n_boot - s) for s in range(0, n_boot, BLOCK)]
+    # eigene Seeds pro Block → Ergebnis unabhängig von der Anzahl Prozesse
+    seeds = np.random.SeedSequence(seed).generate_state(len(bloecke))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(bloecke) == 1:
+        teile = [_bootstrap_block(y_true, y_pred, b, int(s)) for b, s in zip(bloecke, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(bloecke))) as pool:
+            teile = list(pool.map(
+                _bootstrap_block,
+                [y_true] * len(bloecke), [y_pred] * len(bloecke), bloecke, [int(s) for s in seeds],
+            ))
+    return {k: np.concatenate([t[k] for t in teile]) for k in teile[0]}
+
+
+def evaluate(
+    df: pd.DataFrame,
+    manual_col: str,
+    model_cols: list[str],
+    n_boot: int = N_BOOT,
+    alpha: float = ALPHA,
+    seed: int = SEED,
+    workers: int | None = None,
+) -> dict:
+    """
+    Auswertung aller Modelle in einem Durchlauf. Zeilen ohne gültiges
+    manuelles Label werden vorher entfernt; pro Modell zählen nur Zeilen
+    mit gültiger Vorhersage.
+    """
+    y_true = encode_labels(df[manual_col])
+    behalten = y_true >= 0
+    y_true = y_true[behalten]
+    y_pred = np.vstack([encode_labels(df[c])[behalten] for c in model_cols]) if model_cols \
+        else np.empty((0, len(y_true)), dtype="int8")
+
+    cm = confusion_matrices(y_true, y_pred)
+    punkt = metrics_from_confusion(cm)
+    boot = bootstrap(y_true, y_pred, n_boot, seed, workers) if n_boot > 0 and model_cols else None
+
+    ergebnisse = []
+    for m, col in enumerate(model_cols):
+        eintrag = {
+            "model": col,
+            "n_valid": int(punkt["n"][m]),
+            "correct": int(np.trace(cm[m])),
+            "konfusionsmatrix": cm[m].tolist(),
+        }
+        for name in ("accuracy", "macro_f1", "kappa"):
+            eintrag[name] = _kennzahl(punkt[name][m], boot[name][:, m] if boot else None, alpha)
+        for name in ("precision", "recall", "f1"):
+            eintrag[name] = {
+                klasse: _kennzahl(punkt[name][m, j], boot[name][:, m, j] if boot else None, alpha)
+                for j, klasse in enumerate(KLASSEN)
+            }
+        ergebnisse.append(eintrag)
+
+    return {
+        "klassen": KLASSEN,
+        "n_manuell": int(len(y_true)),
+        "bootstrap": {"n": n_boot, "alpha": alpha, "seed": seed},
+        "modelle": ergebnisse,
+    }
+
+
+def _kennzahl(wert: float, replikate: np.ndarray | None, alpha: float) -> dict:
+    eintrag = {"wert": float(wert)}
+    if replikate is not None:
+        lo, hi = np.quantile(replikate, [alpha / 2, 1 - alpha / 2])
+        eintrag["ci"] = [float(lo), float(hi)]
+    return eintrag
+
+
+def to_frame(ergebnis: dict) -> pd.DataFrame:
+    """Lange Tabelle: model, kennzahl, klasse (leer = gesamt), wert, ci_low, ci_high."""
+    zeilen = []
+    for m in ergebnis["modelle"]:
+        for name in ("accuracy", "macro_f1", "kappa", "precision", "recall", "f1"):
+            werte = m[name] if name in ("precision", "recall", "f1") else {"": m[name]}
+            for klasse, k in werte.items():
+                ci = k.get("ci", [np.nan, np.nan])
+                zeilen.append({
+                    "model": m["model"],
+                    "kennzahl": name,
+                    "klasse": klasse,
+                    "wert": k["wert"],
+                    "ci_low": ci[0],
+                    "ci_high": ci[1],
+                    "n_valid": m["n_valid"],
+                })
+    return pd.DataFrame(zeilen)
+
+
+def write_json(ergebnis: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ergebnis, f, ensure_ascii=False, indent=2)
+
+
+def write_csv(ergebnis: dict, path: str):
+    to_frame(ergebnis).to_csv(path, index=False)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Konfidenz-Schwellen: Abdeckung vs. Accuracy und Kalibrierung aller Modelle.
+
+Für jedes Modell werden die Zeilen einmal absteigend nach `__conf` sortiert;
+Accuracy und Abdeckung für *alle* Schwellen ergeben sich aus den kumulierten
+Treffern (kein erneutes Filtern pro Schwelle). Zeilen unter der Schwelle
+gelten als "eskaliert" (z.B. manuell labeln oder größeres Modell fragen).
+
+Dazu Reliability-Bins und ECE (Expected Calibration Error), gesamt und pro
+vorhergesagter Klasse.
+
+Nutzung:
+    python konfidenz_analyse.py kommentare_annotiert.csv --out_dir konfidenz
+    python konfidenz_analyse.py kommentare_annotiert.csv --ziel 0.8 0.9 --bins 15
+
+Ausgaben in --out_dir:
+    sweep.csv               Modell × Schwelle: Abdeckung, Accuracy behalten/eskaliert
+    kalibrierung.csv        Modell × Klasse × Bin: mittlere Konfidenz, Accuracy, Anzahl
+    abdeckung_accuracy.png  Accuracy über Abdeckung (alle Modelle)
+    reliability.png         Reliability-Diagramme mit ECE
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+# typisierter Loader aus 09_explorative_analysis
+sys.path.append(str(Path(__file__).resolve().parents[1] / "09_explorative_analysis"))
+from sentiment_data import load_dataset  # noqa: E402
+
+from auswertung_modelle import MODEL_COLS  # noqa: E402
+from evaluation import KLASSEN, encode_labels  # noqa: E402
+
+BINS = 10
+SCHWELLEN_TABELLE = [0.0, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95]
+ZIEL_ACCURACY = [0.8, 0.9]
+OUT_DIR = "konfidenz"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Konfidenz-Schwellen und Kalibrierung der Sentiment-Modelle.")
+    parser.add_argument("input_csv", help="CSV mit manuellen Labels und Modellspalten inkl. __conf")
+    parser.add_argument("--manual_col", default="sentiment__manual", help="Spalte mit manuellem Label")
+    parser.add_argument("--bins", type=int, default=BINS, help=f"Reliability-Bins (Standard: {BINS})")
+    parser.add_argument("--ziel", type=float, nargs="+", default=ZIEL_ACCURACY,
+                        help="Ziel-Accuracy: niedrigste Schwelle, die sie erreicht, wird ausgegeben")
+    parser.add_argument("--out_dir", default=OUT_DIR, help=f"Ausgabeordner (Standard: {OUT_DIR})")
+    return parser.parse_args()
+
+
+def sweep(conf: np.ndarray, korrekt: np.ndarray) -> pd.DataFrame:
+    """
+    Eine Zeile pro eindeutiger Konfidenz (= mögliche Schwelle, Zeilen mit
+    conf >= Schwelle werden behalten). Alles aus einer Sortierung + cumsum.
+    """
+    order = np.argsort(-conf, kind="stable")
+    c = conf[order]
+    treffer = np.cumsum(korrekt[order])
+    n = len(c)
+
+    # letzter Index jeder Konfidenzstufe → alle gleich sicheren Zeilen gemeinsam
+    letzte = np.flatnonzero(np.r_[c[1:] != c[:-1], True])
+    k = letzte + 1
+    behalten_korrekt = treffer[letzte]
+    rest = n - k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acc_eskaliert = np.where(rest > 0, (treffer[-1] - behalten_korrekt) / rest, np.nan)
+    return pd.DataFrame({
+        "schwelle": c[letzte],
+        "n_behalten": k,
+        "abdeckung": k / n,
+        "accuracy": behalten_korrekt / k,
+        "n_eskaliert": rest,
+        "accuracy_eskaliert": acc_eskaliert,
+    })
+
+
+def an_schwellen(tabelle: pd.DataFrame, schwellen: list[float]) -> pd.DataFrame:
+    """Werte bei festen Schwellen: die Stufe mit der kleinsten Konfidenz >= Schwelle.
+
+    Liegt eine Schwelle über der höchsten Konfidenz, wird nichts behalten
+    (Abdeckung 0, Accuracy NaN) und alles eskaliert.
+    """
+    s = tabelle["schwelle"].to_numpy()[::-1]          # aufsteigend
+    pos = np.searchsorted(s, schwellen, side="left")
+    alle = tabelle.iloc[-1]                           # kleinste Schwelle: alle Sätze behalten
+    leer = pd.DataFrame([{
+        "schwelle": np.nan,
+        "n_behalten": 0,
+        "abdeckung": 0.0,
+        "accuracy": np.nan,
+        "n_eskaliert": int(alle["n_behalten"]),
+        "accuracy_eskaliert": alle["accuracy"],
+    }])
+    zeilen = pd.concat([tabelle.iloc[::-1], leer], ignore_index=True).iloc[pos].reset_index(drop=True)
+    zeilen.insert(0, "ab", schwellen)
+    return zeilen
+
+
+def reliability(conf: np.ndarray, korrekt: np.ndarray, klasse: np.ndarray, bins: int = BINS) -> pd.DataFrame:
+    """Bins gleicher Breite über [0, 1], gesamt ("alle") und pro vorhergesagter Klasse, per bincount."""
+    b = np.minimum((conf * bins).astype(int), bins - 1)
+    gruppen = ["alle", *KLASSEN]
+    laenge = len(gruppen) * bins
+    # jede Zeile zählt einmal in "alle" (Gruppe 0) und einmal in ihrer Klasse (1..K)
+    schluessel = np.concatenate([b, (klasse.astype(int) + 1) * bins + b])
+    n = np.bincount(schluessel, minlength=laenge)
+    summe_conf = np.bincount(schluessel, weights=np.tile(conf, 2), minlength=laenge)
+    summe_ok = np.bincount(schluessel, weights=np.tile(korrekt, 2), minlength=laenge)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            "klasse": np.repeat(gruppen, bins),
+            "bin": np.tile(np.arange(bins), len(gruppen)),
+            "von": np.tile(np.arange(bins) / bins, len(gruppen)),
+            "bis": np.tile(np.arange(1, bins + 1) / bins, len(gruppen)),
+            "n": n,
+            "conf_mittel": summe_conf / n,
+            "accuracy": summe_ok / n,
+        })
+
+
+def ece(bins_df: pd.DataFrame) -> pd.Series:
+    """ECE je Klasse (gewichtetes Mittel von |Accuracy − Konfidenz| über die Bins)."""
+    d = bins_df[bins_df["n"] > 0]
+    abw = (d["accuracy"] - d["conf_mittel"]).abs() * d["n"]
+    return abw.groupby(d["klasse"], sort=False).sum() / d.groupby("klasse", sort=False)["n"].sum()
+
+
+def plot_abdeckung(sweeps: dict[str, pd.DataFrame], pfad: Path):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for name, t in sweeps.items():
+        ax.plot(t["abdeckung"], t["accuracy"], label=name)
+    ax.set_xlabel("Abdeckung (Anteil automatisch gelabelt)")
+    ax.set_ylabel("Accuracy der behaltenen Zeilen")
+    ax.set_xlim(0, 1)
+    ax.grid(alpha=0.3)
+    ax.legend(fontsize=8)
+    ax.set_title("Accuracy vs. Abdeckung bei steigender Konfidenz-Schwelle")
+    fig.tight_layout()
+    fig.savefig(pfad, dpi=150)
+    plt.close(fig)
+
+
+def plot_reliability(kalibrierung: dict[str, pd.DataFrame], eces: dict[str, pd.Series], pfad: Path):
+    n = len(kalibrierung)
+    fig, axes = plt.subplots(1, n, figsize=(4 * n, 4), squeeze=False)
+    for ax, (name, d) in zip(axes[0], kalibrierung.items()):
+        ax.plot([0, 1], [0, 1], color="grey", linestyle="--", linewidth=1)
+        for klasse, g in d[d["n"] > 0].groupby("klasse", sort=False):
+            ax.plot(g["conf_mittel"], g["accuracy"], marker="o", markersize=3,
+                    linewidth=2 if klasse == "alle" else 1, label=f"{klasse} (ECE {eces[name][klasse]:.3f})")
+        ax.set_title(name.replace("sentiment__", ""), fontsize=9)
+        ax.set_xlabel("Konfidenz")
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.legend(fontsize=7)
+    axes[0][0].set_ylabel("Accuracy")
+    fig.tight_layout()
+    fig.savefig(pfad, dpi=150)
+    plt.close(fig)
+
+
+def main():
+    args = parse_args()
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    spalten = [args.manual_col] + [s for c in MODEL_COLS for s in (c, f"{c}__conf")]
+    df = load_dataset(args.input_csv, columns=spalten, derived=False)
+    y_true = encode_labels(df[args.manual_col])
+
+    sweeps, kalibrierung, eces = {}, {}, {}
+    for col in MODEL_COLS:
+        conf_col = f"{col}__conf"
+        if col not in df.columns or conf_col not in df.columns:
+            print(f"Modell '{col}': Label- oder Konfidenzspalte fehlt, übersprungen.")
+            continue
+
+        y_pred = encode_labels(df[col])
+        conf = df[conf_col].to_numpy(dtype="float64")
+        gueltig = (y_true >= 0) & (y_pred >= 0) & ~np.isnan(conf)
+        if not gueltig.any():
+            continue
+        korrekt = (y_true == y_pred)[gueltig].astype("float64")
+        conf, y_pred = conf[gueltig], y_pred[gueltig]
+
+        sweeps[col] = sweep(conf, korrekt)
+        kalibrierung[col] = reliability(conf, korrekt, y_pred, args.bins)
+        eces[col] = ece(kalibrierung[col])
+
+        print(f"\nModell: {col}  (n = {len(conf)}, ECE gesamt {eces[col]['alle']:.3f}, "
+              + ", ".join(f"{k} {eces[col].get(k, np.nan):.3f}" for k in KLASSEN) + ")")
+        tabelle = an_schwellen(sweeps[col], SCHWELLEN_TABELLE)
+        print(tabelle.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+        t = sweeps[col]
+        for ziel in args.ziel:
+            treffer = t[t["accuracy"] >= ziel]
+            if treffer.empty:
+                print(f"  Ziel-Accuracy {ziel:.2f}: bei keiner Schwelle erreicht")
+                continue
+            beste = treffer.loc[treffer["abdeckung"].idxmax()]
+            print(
+                f"  Ziel-Accuracy {ziel:.2f}: Schwelle {beste['schwelle']:.3f}, "
+                f"Abdeckung {beste['abdeckung']:.1%}, eskaliert {int(beste['n_eskaliert'])} "
+                f"({1000 * beste['n_eskaliert'] / len(conf):.0f} pro 1000 Segmente)"
+            )
+
+    if not sweeps:
+        print("Keine auswertbaren Modelle gefunden.")
+        return
+
+    pd.concat([t.assign(model=m) for m, t in sweeps.items()])[
+        ["model", "schwelle", "n_behalten", "abdeckung", "accuracy", "n_eskaliert", "accuracy_eskaliert"]
+    ].to_csv(out_dir / "sweep.csv", index=False)
+    pd.concat([d.assign(model=m) for m, d in kalibrierung.items()])[
+        ["model", "klasse", "bin", "von", "bis", "n", "conf_mittel", "accuracy"]
+    ].to_csv(out_dir / "kalibrierung.csv", index=False)
+    plot_abdeckung(sweeps, out_dir / "abdeckung_accuracy.png")
+    plot_reliability(kalibrierung, eces, out_dir / "reliability.png")
+    print(f"\nGeschrieben nach {out_dir}/: sweep.csv, kalibrierung.csv, abdeckung_accuracy.png, reliability.png")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Konfidenzintervalle und p-Werte für die Bias-Schätzungen in results/.
+
+Bias = gewichtetes Sentiment Bayern − Gegner (Zeilenmittel wie in den
+Notebooks). Aussagen derselben Übertragung sind nicht unabhängig, deshalb
+wird über Spiele hinweg auf Ebene der Spiele gezogen (Cluster):
+
+- Bootstrap: Index-Matrix (B × Spiele) mit Zurücklegen, daraus per
+  bincount die Gewichte je Spiel; alle Replikate über eine Matrix-
+  Multiplikation der Spielsummen
+- Permutationstest: unter H0 sind "Bayern" und "Gegner" innerhalb eines
+  Spiels austauschbar → pro Replikat und Spiel werden die beiden Kontexte
+  zufällig vertauscht (B × Spiele Vorzeichen-Matrix), p zweiseitig
+
+Pro Kommentator bzw. Tordifferenz läuft dasselbe auf den jeweiligen Spielen,
+verteilt auf mehrere Prozesse. Für die Tabelle pro Spiel gibt es nur ein
+Cluster; dort sind Segmente die Einheit (Bootstrap geschichtet nach Kontext,
+Permutation der Kontext-Labels innerhalb des Spiels). Gruppen mit nur einem
+Spiel bekommen keine Intervalle; bei 2–4 Spielen sind Bootstrap und
+Permutation sehr grob (2^Spiele mögliche Vertauschungen).
+
+    python bias_statistik.py data/output_with_sentiment.csv --out_dir data/results --n 10000
+
+Schreibt die Tabellen aus sentiment_cube.py mit zusätzlichen Spalten
+<kennzahl>.ci_low, <kennzahl>.ci_high und <kennzahl>.p in eigene Dateien
+<tabelle>_statistik.xlsx. Die Tabellen ohne Endung bleiben Quelle der
+Wahrheit für die Kennzahlen und werden von ergebnis_inkrementell.py/live.py
+laufend überschrieben; die _statistik-Dateien sind ein Stand des letzten
+Laufs hier und nach neuen Spieltagen neu zu erzeugen.
+"""
+
+import os
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sentiment_data import MODEL, TEAM, load_dataset
+from sentiment_cube import SentimentCube, load_cube, statistik_datei
+
+N_REPLIKATE = 10_000
+ALPHA = 0.05
+SEED = 42
+BLOCK = 2_500           # Replikate pro Matrix (Speicher: BLOCK × Spiele)
+
+GEGNER = "Gegner"  # Bezugsverein: erste Kategorie von kontext_group
+
+
+# ---------- Cluster-Ebene (Spiele) ----------
+def spiel_summen(cube: SentimentCube) -> pd.DataFrame:
+    """Pro Spiel: Summe und Anzahl gewichtetes Sentiment für den Bezugsverein (s_b, n_b) und Gegner (s_g, n_g)."""
+    z = cube.zellen
+    bezug = cube.team
+    r = cube.rollup(["source_file", "kontext_group"])
+    s = r.pivot(index="source_file", columns="kontext_group", values="sum_weighted")
+    n = r.pivot(index="source_file", columns="kontext_group", values="n_sentiment")
+    out = pd.DataFrame({
+        "s_b": s.get(bezug), "n_b": n.get(bezug),
+        "s_g": s.get(GEGNER), "n_g": n.get(GEGNER),
+    }).fillna(0).reset_index()
+    out["source_file"] = out["source_file"].astype(str)
+
+    kommentator = (
+        z.dropna(subset=["offizielle.kommentator"])
+        .groupby("source_file", observed=True)["offizielle.kommentator"].first().astype(str)
+    )
+    kommentator.index = kommentator.index.astype(str)
+    spiele = cube.spiele.assign(source_file=cube.spiele["source_file"].astype(str)).set_index("source_file")
+    out["offizielle.kommentator"] = out["source_file"].map(kommentator)
+    out["ergebnis.tordifferenz"] = out["source_file"].map(spiele["ergebnis.tordifferenz"])
+    return out
+
+
+def bias(s_b, n_b, s_g, n_g) -> np.ndarray:
+    """Zeilenmittel Bayern − Gegner; arbeitet auf Skalaren wie auf Replikat-Vektoren."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.asarray(s_b) / np.asarray(n_b) - np.asarray(s_g) / np.asarray(n_g)
+
+
+def cluster_replikate(summen: np.ndarray, n_rep: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    summen: (Spiele, 4) mit Spalten s_b, n_b, s_g, n_g.
+    Rückgabe: Bootstrap-Biases (n_rep,) und Permutations-Biases (n_rep,).
+    """
+    rng = np.random.default_rng(seed)
+    g = len(summen)
+    boot, perm = [], []
+    for start in range(0, n_rep, BLOCK):
+        b = min(BLOCK, n_rep - start)
+
+        # Bootstrap: Index-Matrix → Häufigkeit jedes Spiels pro Replikat
+        idx = rng.integers(0, g, size=(b, g))
+        gewichte = np.bincount((idx + np.arange(b)[:, None] * g).ravel(), minlength=b * g).reshape(b, g)
+        t = gewichte @ summen                                    # (b, 4)
+        boot.append(bias(t[:, 0], t[:, 1], t[:, 2], t[:, 3]))
+
+        # Permutation: pro Spiel Bayern ↔ Gegner tauschen oder nicht
+        tausch = rng.random((b, g)) < 0.5
+        bleibt = ~tausch
+        s_b = bleibt @ summen[:, 0] + tausch @ summen[:, 2]
+        n_b = bleibt @ summen[:, 1] + tausch @ summen[:, 3]
+        s_g = bleibt @ summen[:, 2] + tausch @ summen[:, 0]
+        n_g = bleibt @ summen[:, 3] + tausch @ summen[:, 1]
+        perm.append(bias(s_b, n_b, s_g, n_g))
+    return np.concatenate(boot), np.concatenate(perm)
+
+
+def _auswerten(beobachtet: float, boot: np.ndarray, perm: np.ndarray, alpha: float) -> dict:
+    boot, perm = boot[np.isfinite(boot)], perm[np.isfinite(perm)]
+    lo, hi = np.quantile(boot, [alpha / 2, 1 - alpha / 2]) if len(boot) else (np.nan, np.nan)
+    extrem = np.count_nonzero(np.abs(perm) >= abs(beobachtet) - 1e-12)
+    return {
+        "bias": beobachtet,
+        "ci_low": lo,
+        "ci_high": hi,
+        "p": (extrem + 1) / (len(perm) + 1) if len(perm) else np.nan,
+    }
+
+
+def _gruppe(args) -> dict:
+    summen, n_rep, seed, alpha = args
+    beobachtet = float(bias(*summen.sum(axis=0)))
+    if len(summen) < 2 or not np.isfinite(beobachtet):
+        return {"bias": beobachtet, "ci_low": np.nan, "ci_high": np.nan, "p": np.nan}
+    return _auswerten(beobachtet, *cluster_replikate(summen, n_rep, seed), alpha)
+
+
+def gruppen_statistik(
+    summen: pd.DataFrame,
+    gruppe: str | None,
+    n_rep: int = N_REPLIKATE,
+    alpha: float = ALPHA,
+    seed: int = SEED,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """Cluster-Bootstrap und -Permutation je Gruppe (None = alle Spiele), Gruppen parallel."""
+    werte = summen[["s_b", "n_b", "s_g", "n_g"]].to_numpy(dtype="float64")
+    if gruppe is None:
+        schluessel, teile = ["gesamt"], [werte]
+    else:
+        codes, schluessel = pd.factorize(summen[gruppe], sort=True)
+        teile = [werte[codes == i] for i in range(len(schluessel))]
+
+    # eigene Seeds pro Gruppe → Ergebnis unabhängig von der Anzahl Prozesse
+    seeds = [int(s) for s in np.random.SeedSequence(seed).generate_state(len(teile))]
+    aufgaben = [(t, n_rep, s, alpha) for t, s in zip(teile, seeds)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(aufgaben) == 1:
+        ergebnisse = [_gruppe(a) for a in aufgaben]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(aufgaben))) as pool:
+            ergebnisse = list(pool.map(_gruppe, aufgaben))
+
+    out = pd.DataFrame(ergebnisse)
+    out.insert(0, "n_spiele", [len(t) for t in teile])
+    out.insert(0, gruppe or "gruppe", list(schluessel))
+    return out
+
+
+# ---------- Segment-Ebene (ein Spiel) ----------
+def spiel_statistik(
+    df: pd.DataFrame,
+    n_rep: int = N_REPLIKATE,
+    alpha: float = ALPHA,
+    seed: int = SEED,
+) -> pd.DataFrame:
+    """Bias pro Spiel mit Segment-Bootstrap (geschichtet nach Kontext) und Label-Permutation im Spiel."""
+    bezug = df["kontext_group"].cat.categories[0]
+    d = df[df["kontext_group"].isin([bezug, GEGNER]) & df["weighted_sentiment"].notna()]
+    dateien = d["source_file"].astype(str).to_numpy()
+    w_alle = d["weighted_sentiment"].to_numpy(dtype="float64")
+    ist_b_alle = (d["kontext_group"] == bezug).to_numpy()
+
+    rng = np.random.default_rng(seed)
+    zeilen = []
+    for datei in np.unique(dateien):
+        maske = dateien == datei
+        w, ist_b = w_alle[maske], ist_b_alle[maske]
+        wb, wg = w[ist_b], w[~ist_b]
+        beobachtet = wb.mean() - wg.mean() if len(wb) and len(wg) else np.nan
+        if not (len(wb) > 1 and len(wg) > 1):
+            zeilen.append({"source_file": datei, "bias": beobachtet, "ci_low": np.nan, "ci_high": np.nan, "p": np.nan})
+            continue
+
+        boot = (
+            wb[rng.integers(0, len(wb), size=(n_rep, len(wb)))].mean(axis=1)
+            - wg[rng.integers(0, len(wg), size=(n_rep, len(wg)))].mean(axis=1)
+        )
+        # Permutation: zufällige Rangfolge pro Replikat, die ersten len(wb) gelten als Bayern
+        perm_idx = np.argsort(rng.random((n_rep, len(w))), axis=1)
+        w_perm = w[perm_idx]
+        perm = w_perm[:, :len(wb)].mean(axis=1) - w_perm[:, len(wb):].mean(axis=1)
+        zeilen.append({"source_file": datei, **_auswerten(beobachtet, boot, perm, alpha)})
+    return pd.DataFrame(zeilen)
+
+
+# ---------- Tabellen ergänzen ----------
+def ergaenze(tabelle: pd.DataFrame, statistik: pd.DataFrame, schluessel: str, kennzahl: str) -> pd.DataFrame:
+    """Hängt <kennzahl>.ci_low/.ci_high/.p hinter der Kennzahl-Spalte an (Zeilenreihenfolge bleibt)."""
+    spalten = {"ci_low": f"{kennzahl}.ci_low", "ci_high": f"{kennzahl}.ci_high", "p": f"{kennzahl}.p"}
+    stat = statistik[[schluessel, *spalten]].rename(columns=spalten)
+    stat[schluessel] = stat[schluessel].astype(tabelle[schluessel].dtype)
+    out = tabelle.merge(stat, on=schluessel, how="left")
+    pos = list(tabelle.columns).index(kennzahl) + 1
+    reihenfolge = [*tabelle.columns[:pos], *spalten.values(), *tabelle.columns[pos:]]
+    return out[reihenfolge]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cluster-Bootstrap und Permutationstests für die Bias-Tabellen.")
+    parser.add_argument("csv", help="Kombinierte Sentiment-CSV")
+    parser.add_argument("--out_dir", default="data/results", help="Zielordner für die xlsx-Tabellen")
+    parser.add_argument("--n", type=int, default=N_REPLIKATE, help=f"Replikate (Standard: {N_REPLIKATE})")
+    parser.add_argument("--alpha", type=float, default=ALPHA, help=f"Irrtumswahrscheinlichkeit (Standard: {ALPHA})")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--model", default=MODEL, help=f"Modell für das Sentiment (Standard: {MODEL})")
+    parser.add_argument("--team", default=TEAM, help=f"Bezugsverein (Standard: {TEAM})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cube = load_cube(args.csv, model=args.model, team=args.team)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summen = spiel_summen(cube)
+    opts = {"n_rep": args.n, "alpha": args.alpha, "seed": args.seed}
+
+    start = time.perf_counter()
+    gesamt = gruppen_statistik(summen, None, workers=1, **opts).iloc[0]
+    print(
+        f"Bias gesamt ({cube.team} − Gegner): {gesamt['bias']:.4f} "
+        f"[{gesamt['ci_low']:.4f}, {gesamt['ci_high']:.4f}], p = {gesamt['p']:.4f} "
+        f"({len(summen)} Spiele, {args.n} Replikate, {time.perf_counter() - start:.2f}s)"
+    )
+
+    start = time.perf_counter()
+    kommentator = gruppen_statistik(summen, "offizielle.kommentator", workers=args.workers, **opts)
+    tordiff = gruppen_statistik(summen, "ergebnis.tordifferenz", workers=args.workers, **opts)
+    print(f"Kommentatoren/Tordifferenzen in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    df = load_dataset(args.csv, model=args.model, verbose=False, team=args.team)
+    pro_spiel = spiel_statistik(df, **opts)
+    print(f"Spiele (Segment-Ebene) in {time.perf_counter() - start:.2f}s")
+
+    tabellen = [
+        ("sentiment_per_game.xlsx", ergaenze(cube.per_game(), pro_spiel, "source_file", "sentiment.diff"), True),
+        ("sentiment_per_goal_diff.xlsx",
+         ergaenze(cube.per_goal_diff(), tordiff, "ergebnis.tordifferenz", "sentiment.diff"), False),
+        ("sentiment_per_commentator.xlsx",
+         ergaenze(cube.per_commentator_simple(), kommentator, "offizielle.kommentator", "sentiment.diff"), True),
+        ("sentiment_per_commentator_with_justified_bias.xlsx",
+         ergaenze(cube.per_commentator(), kommentator, "offizielle.kommentator", "sentiment.bias"), False),
+    ]
+    for datei, tabelle, mit_index in tabellen:
+        ziel = out_dir / statistik_datei(datei)
+        tabelle.to_excel(ziel, index=mit_index)
+        print(f"Geschrieben: {ziel}")
+
+    k = kommentator.set_index("offizielle.kommentator")
+    print("\nBias pro Kommentator (Cluster = Spiel):")
+    for name, r in k.iterrows():
+        print(f"  {name:<25} {r['bias']:+.4f} [{r['ci_low']:+.4f}, {r['ci_high']:+.4f}]  p = {r['p']:.4f}  "
+              f"({int(r['n_spiele'])} Spiele)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Inkrementelle Aktualisierung der Ergebnistabellen in results/.
+
+Für einen neuen Spieltag muss weder die ganze Inferenz-CSV noch jedes
+Notebook neu laufen. Der Stand liegt in einer kleinen SQLite-Datei neben
+den Tabellen:
+
+    spiele   eine Zeile pro source_file: Fingerprint der Zeilen + Spielattribute
+    zellen   Summen/Anzahlen des Würfels (sentiment_cube.py) pro Spiel ×
+             Kontext × Phase × Kommentator × Heim/Auswärts
+
+Pro Spiel in der Eingabe wird ein Fingerprint über seine Zeilen gebildet.
+Nur neue oder geänderte Spiele werden aggregiert; ihr alter Beitrag wird in
+einer Transaktion gelöscht und der neue eingefügt. Spiele, die in der
+Eingabe fehlen, bleiben stehen (Eingabe darf nur den neuen Spieltag
+enthalten), außer mit --voll.
+
+Die Gruppensummen pro Tordifferenz bzw. Kommentator werden nicht durch
+Abziehen/Addieren von Gleitkommazahlen nachgeführt, sondern aus den ~1.000
+Zellen neu gerollt (Millisekunden). Die Zellen eines Spiels entstehen aus
+genau denselben Zeilen wie bei einer Neuberechnung, daher sind die Tabellen
+bitgleich mit sentiment_cube.py (prüfbar mit --pruefen). Die Dateien
+<tabelle>_statistik.xlsx aus bias_statistik.py werden nicht angefasst; nach
+einem Update wird nur darauf hingewiesen, dass sie neu zu erzeugen sind.
+
+    python ergebnis_inkrementell.py data/output_with_sentiment.csv --out_dir data/results
+    python ergebnis_inkrementell.py neuer_spieltag.csv --out_dir data/results
+    python ergebnis_inkrementell.py data/output_with_sentiment.csv --voll --pruefen
+    python ergebnis_inkrementell.py --entfernen 24-25_S05_x.json --out_dir data/results
+"""
+
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vereine import STANDARD, verein  # noqa: E402
+from sentiment_data import MODEL, TEAM, kontext_gruppen, load_dataset  # noqa: E402
+from sentiment_cube import DIMENSIONEN, SPIEL_SPALTEN, TABELLEN, SentimentCube, build_cube, statistik_datei, write_tables  # noqa: E402
+
+STAND_DATEI = "ergebnis_stand.sqlite"
+STAND_VERSION = 1
+MAX_AUSGABE = 10          # Spiele pro Kategorie in der Konsolenausgabe
+
+SUMMEN = ["n", "n_sentiment", "sum_weighted", "sum_sentiment"]
+SPIEL_ATTRIBUTE = [*SPIEL_SPALTEN, "ergebnis.tordifferenz", "klassifikation.phase"]
+# im Würfel kategorial; SQLite liefert sie als Text zurück
+KATEGORIE_DIMENSIONEN = ["source_file", "kontext_group", "offizielle.kommentator", "meta.heim_auswaerts"]
+
+
+def _q(spalte: str) -> str:
+    return f'"{spalte}"'
+
+
+def _sql_wert(v):
+    """numpy-Skalare und NaN für sqlite3."""
+    if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NA:
+        return None
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+def fingerprint(teil: pd.DataFrame) -> str:
+    """Hash über Spaltennamen und Werte der Zeilen eines Spiels (unabhängig von Kategorien)."""
+    h = hashlib.sha256("|".join(teil.columns).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(teil, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class ErgebnisStand:
+    """Spiele und Würfel-Zellen in SQLite, Aktualisierung pro source_file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create()
+
+    def _create(self):
+        spiel_spalten = ", ".join(f"{_q(c)}" for c in SPIEL_ATTRIBUTE)
+        zell_spalten = ", ".join(_q(c) for c in DIMENSIONEN[1:])
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS info (schluessel TEXT PRIMARY KEY, wert TEXT)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS spiele (source_file TEXT PRIMARY KEY, fingerprint TEXT, "
+                f"aktualisiert TEXT, {spiel_spalten})"
+            )
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS zellen (source_file TEXT, {zell_spalten}, "
+                "n INTEGER, n_sentiment INTEGER, sum_weighted REAL, sum_sentiment REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS zellen_spiel ON zellen (source_file)")
+
+    def pruefe_kopf(self, model: str, team: str = TEAM):
+        """Stand mit anderem Modell, Bezugsverein oder Format wird verworfen statt gemischt."""
+        kopf = dict(self.conn.execute("SELECT schluessel, wert FROM info").fetchall())
+        soll = {"version": str(STAND_VERSION), "model": model}
+        if verein(team) != STANDARD:
+            soll["team"] = verein(team)
+        if kopf and kopf != soll:
+            print(f"Stand {self.path} passt nicht ({kopf} statt {soll}), wird neu aufgebaut.")
+            with self.conn:
+                self.conn.execute("DELETE FROM spiele")
+                self.conn.execute("DELETE FROM zellen")
+        with self.conn:
+            self.conn.execute("DELETE FROM info")
+            self.conn.executemany("INSERT INTO info VALUES (?, ?)", soll.items())
+
+    def fingerprints(self) -> dict[str, str]:
+        return dict(self.conn.execute("SELECT source_file, fingerprint FROM spiele").fetchall())
+
+    def ersetzen(self, zellen: pd.DataFrame, spiele: pd.DataFrame, fingerprints: dict[str, str]):
+        """Alten Beitrag der Spiele in `spiele` löschen, neuen einfügen (eine Transaktion)."""
+        jetzt = datetime.now().isoformat(timespec="seconds")
+        z = zellen.assign(source_file=zellen["source_file"].astype(str))
+        s = spiele.assign(source_file=spiele["source_file"].astype(str))
+        spiel_cols = [c for c in SPIEL_ATTRIBUTE if c in s.columns]
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM zellen WHERE source_file = ?", [(f,) for f in s["source_file"]])
+            self.conn.executemany(
+                f"INSERT INTO zellen ({', '.join(_q(c) for c in DIMENSIONEN + SUMMEN)}) "
+                f"VALUES ({', '.join('?' * len(DIMENSIONEN + SUMMEN))})",
+                [tuple(map(_sql_wert, zeile)) for zeile in z[DIMENSIONEN + SUMMEN].astype(object).itertuples(index=False)],
+            )
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO spiele (source_file, fingerprint, aktualisiert, "
+                f"{', '.join(_q(c) for c in spiel_cols)}) VALUES ({', '.join('?' * (len(spiel_cols) + 3))})",
+                [
+                    (zeile[0], fingerprints[zeile[0]], jetzt, *map(_sql_wert, zeile[1:]))
+                    for zeile in s[["source_file", *spiel_cols]].astype(object).itertuples(index=False)
+                ],
+            )
+
+    def entfernen(self, dateien: list[str]):
+        with self.conn:
+            for tabelle in ("zellen", "spiele"):
+                self.conn.executemany(f"DELETE FROM {tabelle} WHERE source_file = ?", [(f,) for f in dateien])
+
+    def cube(self, team: str = TEAM) -> SentimentCube:
+        """Würfel mit denselben Typen und derselben Zellreihenfolge wie build_cube()."""
+        zellen = pd.read_sql_query("SELECT * FROM zellen", self.conn)
+        spiele = pd.read_sql_query("SELECT * FROM spiele", self.conn).drop(columns=["fingerprint", "aktualisiert"])
+        for c in KATEGORIE_DIMENSIONEN:
+            kategorien = kontext_gruppen(team) if c == "kontext_group" else None
+            zellen[c] = pd.Categorical(zellen[c], categories=kategorien)
+        spiele["source_file"] = pd.Categorical(spiele["source_file"], categories=zellen["source_file"].cat.categories)
+        zellen = zellen.sort_values(DIMENSIONEN, na_position="last", kind="stable").reset_index(drop=True)
+        spiele = spiele.sort_values("source_file", kind="stable").reset_index(drop=True)
+        return SentimentCube(zellen, spiele)
+
+    def close(self):
+        self.conn.close()
+
+
+def aktualisieren(stand: ErgebnisStand, df: pd.DataFrame) -> tuple[list[str], list[str], set[str]]:
+    """Neue/geänderte Spiele aus `df` übernehmen → (neu, geändert, alle Spiele in df)."""
+    bekannt = stand.fingerprints()
+    positionen = df.groupby("source_file", observed=True, sort=True).indices
+
+    neu, geaendert, fps, zeilen = [], [], {}, []
+    for datei, pos in positionen.items():
+        datei = str(datei)
+        fp = fingerprint(df.iloc[pos])
+        if bekannt.get(datei) == fp:
+            continue
+        (geaendert if datei in bekannt else neu).append(datei)
+        fps[datei] = fp
+        zeilen.append(pos)
+
+    if zeilen:
+        zellen, spiele = build_cube(df.iloc[np.sort(np.concatenate(zeilen))])
+        stand.ersetzen(zellen, spiele, fps)
+    return neu, geaendert, {str(d) for d in positionen}
+
+
+def pruefen(cube: SentimentCube, csv_dateien: list[str], model: str, team: str = TEAM) -> bool:
+    """Tabellen aus dem Stand gegen eine vollständige Neuberechnung (exakt, ohne Toleranz)."""
+    if len(csv_dateien) != 1:
+        print("--pruefen braucht genau eine CSV mit allen Spielen.")
+        return False
+    voll = SentimentCube(*build_cube(load_dataset(csv_dateien[0], model=model, verbose=False, team=team)))
+    gleich = True
+    for datei, methode, _ in TABELLEN:
+        a, b = (getattr(c, methode)().reset_index(drop=True) for c in (cube, voll))
+        try:
+            pd.testing.assert_frame_equal(
+                a, b, check_dtype=False, check_categorical=False, check_exact=True,
+            )
+            print(f"  {datei:<55} identisch")
+        except AssertionError as e:
+            gleich = False
+            print(f"  {datei:<55} ABWEICHUNG\n{e}")
+    return gleich
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ergebnistabellen inkrementell pro Spiel aktualisieren.")
+    parser.add_argument("csv", nargs="*", help="Sentiment-CSV(s), komplett oder nur neue/geänderte Spiele")
+    parser.add_argument("--out_dir", default="data/results", help="Zielordner der xlsx-Tabellen und des Stands")
+    parser.add_argument("--stand", default=None, help=f"Stand-Datei (Standard: <out_dir>/{STAND_DATEI})")
+    parser.add_argument("--voll", action="store_true", help="Spiele, die in der Eingabe fehlen, aus dem Stand löschen")
+    parser.add_argument("--entfernen", nargs="+", default=[], metavar="SOURCE_FILE", help="Spiele aus dem Stand löschen")
+    parser.add_argument("--pruefen", action="store_true", help="Mit vollständiger Neuberechnung vergleichen")
+    parser.add_argument("--model", default=MODEL, help=f"Modell für das Sentiment (Standard: {MODEL})")
+    parser.add_argument("--team", default=TEAM, help=f"Bezugsverein (Standard: {TEAM})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    stand = ErgebnisStand(args.stand or Path(args.out_dir) / STAND_DATEI)
+    stand.pruefe_kopf(args.model, args.team)
+
+    neu, geaendert, gesehen = [], [], set()
+    for csv in args.csv:
+        df = load_dataset(csv, model=args.model, verbose=False, team=args.team)
+        n, g, s = aktualisieren(stand, df)
+        neu += n
+        geaendert += g
+        gesehen |= s
+
+    entfernt = [f for f in args.entfernen if f in stand.fingerprints()]
+    if args.voll and args.csv:
+        entfernt += sorted(set(stand.fingerprints()) - gesehen - set(entfernt))
+    stand.entfernen(entfernt)
+
+    print(f"Stand {stand.path}: {len(neu)} neu, {len(geaendert)} geändert, {len(entfernt)} entfernt, "
+          f"{len(gesehen) - len(neu) - len(geaendert)} unverändert")
+    for name, liste in [("neu", neu), ("geändert", geaendert), ("entfernt", entfernt)]:
+        for datei in liste[:MAX_AUSGABE]:
+            print(f"  {name:<9} {datei}")
+        if len(liste) > MAX_AUSGABE:
+            print(f"  {name:<9} ... und {len(liste) - MAX_AUSGABE} weitere")
+
+    cube = stand.cube(args.team)
+    fehlen = any(not (Path(args.out_dir) / datei).is_file() for datei, _, _ in TABELLEN)
+    if neu or geaendert or entfernt or fehlen:
+        write_tables(cube, args.out_dir)
+        statistik = [statistik_datei(d) for d, _, _ in TABELLEN if (Path(args.out_dir) / statistik_datei(d)).is_file()]
+        if statistik:
+            print(f"Hinweis: {', '.join(statistik)} werden hier nicht aktualisiert (bias_statistik.py neu ausführen).")
+    else:
+        print("Keine Änderungen, Tabellen bleiben unverändert.")
+    print(f"Fertig in {time.perf_counter() - start:.2f}s ({len(cube.spiele)} Spiele im Stand)")
+
+    ok = pruefen(cube, args.csv, args.model, args.team) if args.pruefen else True
+    stand.close()
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
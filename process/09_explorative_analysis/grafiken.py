@@ -0,0 +1,397 @@
+"""
+Grafiken in results/grafiken_png und grafiken_pdf ohne Notebook erzeugen.
+
+Jede Grafik ist eine Funktion der (gecachten) Analyse-Tabellen:
+
+    saisonverlauf                 cube.saisonverlauf()
+    tordifferenzverlauf           cube.per_goal_diff()
+    korrelationsmatrix            cube.game_metrics()
+    korrelation_ballbesitz        cube.speaking_share()
+    korrelation_tordifferenz      cube.speaking_share()
+    spielverlauf_interpoliert     Sentiment pro Spielminute
+    spielverlauf_mit_erstem_tor   Sentiment pro Spielminute + Minute des 1:0
+
+Die Tabellen werden einmal im Hauptprozess aus Würfel und Datensatz
+(.cache/) gebildet, die Grafiken dann in einem Prozess-Pool mit dem
+Agg-Backend gezeichnet; PNG und PDF entstehen aus derselben Figur.
+Eine Grafik wird übersprungen, wenn der Hash ihrer Eingabetabellen und
+ihre Code-Version (Quelltext der Funktion, GRAFIK_VERSION, matplotlib)
+seit dem letzten Lauf gleich sind und beide Dateien existieren.
+
+    python grafiken.py data/output_with_sentiment.csv --out_dir data/results
+    python grafiken.py data/output_with_sentiment.csv --nur saisonverlauf --neu
+    python grafiken.py data/output_with_sentiment.csv --team Dortmund
+
+Beschriftungen mit {team} / {kurz} werden mit dem Bezugsverein
+(--team, Standard: Umgebungsvariable BEZUGSVEREIN) bzw. dessen Kurznamen gefüllt.
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.patches import Patch  # noqa: E402
+from scipy.signal import savgol_filter  # noqa: E402
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vereine import kurzname, verein  # noqa: E402
+from sentiment_data import MODEL, TEAM, load_dataset  # noqa: E402
+from sentiment_cube import load_cube  # noqa: E402
+from spielverlauf import kurven, spielminuten  # noqa: E402
+
+GRAFIK_VERSION = 1
+CACHE_DATEI = ".grafiken_cache.json"
+FORMATE = ("png", "pdf")
+
+MINUTEN_FENSTER = 5
+
+MARKIERUNGEN = [
+    ("23/24", 29, "Meisterschaft: Bayer 04 Leverkusen"),
+    ("24/25", 32, "Meisterschaft: FC Bayern München"),
+]
+
+# Spalten wie sentiment.bayern stehen für den Bezugsverein (siehe sentiment_cube)
+KURVEN = [
+    ("sentiment.bayern", "{team}", "crimson", "-"),
+    ("sentiment.gegner", "Gegner", "royalblue", "-"),
+    ("sentiment.neutral", "Neutral", "gray", "--"),
+]
+TORDIFF_LINIEN = [
+    ("sentiment.bayern", "Sentiment {kurz}", "crimson", "-"),
+    ("sentiment.gegner", "Sentiment Gegner", "royalblue", "-"),
+    ("sentiment.neutral", "Sentiment Neutral", "gray", "--"),
+    ("sentiment.average", "Sentiment Durchschnitt", "black", "-"),
+]
+
+
+# ---------- Tabellen ----------
+def erste_fuehrung(df: pd.DataFrame) -> pd.DataFrame:
+    """Erster Satz mit Spielstand 1:0 für den Bezugsverein pro Spiel (Minute des 1:0)."""
+    return (
+        df.loc[(df["klassifikation.tore_bayern"] == 1) & (df["klassifikation.tore_gegner"] == 0),
+               ["source_file", "index", "schaetzung.spielminute"]]
+        .sort_values("index", kind="stable")
+        .drop_duplicates("source_file")
+        .reset_index(drop=True)
+    )
+
+
+def tabellen_quellen(csv: str, model: str, team: str = TEAM) -> dict:
+    """Name → Funktion, die die Tabelle liefert; Datensatz und Würfel werden nur bei Bedarf geladen."""
+    cache = {}
+
+    def cube():
+        if "cube" not in cache:
+            cache["cube"] = load_cube(csv, model=model, verbose=False, team=team)
+        return cache["cube"]
+
+    def minuten():
+        if "minuten" not in cache:
+            cache["minuten"] = spielminuten(load_dataset(csv, model=model, verbose=False, team=team))
+        return cache["minuten"]
+
+    return {
+        "saisonverlauf": lambda: cube().saisonverlauf(),
+        "tordifferenz": lambda: cube().per_goal_diff(),
+        "spielkennzahlen": lambda: cube().game_metrics(),
+        "sprechanteil": lambda: cube().speaking_share(),
+        "sentiment_minute": lambda: kurven(minuten(), glaettung="mittel", fenster=MINUTEN_FENSTER),
+        "erste_fuehrung": lambda: erste_fuehrung(minuten()),
+    }
+
+
+# ---------- Grafiken ----------
+def _label(text: str, team: str) -> str:
+    return text.format(team=team, kurz=kurzname(team))
+
+
+def _minutenkurven(ax, smooth: pd.DataFrame, team: str):
+    """Sentiment-Kurven pro Spielminute mit Null-Linie, Phasengrenzen und Phasen-Beschriftung."""
+    for spalte, label, farbe, stil in KURVEN:
+        if spalte in smooth.columns:
+            ax.plot(smooth.index, smooth[spalte], label=_label(label, team), color=farbe, linestyle=stil,
+                    linewidth=2 if stil == "--" else 2.2)
+    ax.axhline(0, color="black", linestyle=":", linewidth=1)
+    for x in [0, 45, 90]:
+        ax.axvline(x, color="darkgray", linestyle="--", linewidth=1.2)
+
+    ylim = ax.get_ylim()
+    ax.text(-2, ylim[1] * 0.95, "Vorbericht", ha="right", va="top", fontsize=10, color="dimgray")
+    ax.text(22.5, ylim[1] * 0.95, "1. Halbzeit", ha="center", va="top", fontsize=10, color="dimgray")
+    ax.text(67.5, ylim[1] * 0.95, "2. Halbzeit", ha="center", va="top", fontsize=10, color="dimgray")
+    ax.text(92, ylim[1] * 0.95, "Nachbericht", ha="left", va="top", fontsize=10, color="dimgray")
+
+    ax.set_xlabel("Spielminute (interpoliert)", fontsize=12)
+    ax.set_ylabel("Durchschnittliches Sentiment", fontsize=12)
+    ax.set_title("Durchschnittliches Sentiment pro Spielminute", fontsize=14)
+    ax.set_xlim(-5, 95)
+    ax.set_xticks(np.arange(0, 100, 15))
+    ax.grid(which="both", axis="x", linestyle="--", color="lightgray", alpha=0.6)
+    ax.grid(which="major", axis="y", linestyle=":", color="gray", alpha=0.3)
+
+
+def _korrelation(x: pd.Series, y: pd.Series, xlabel: str, titel: str, team: str):
+    fig, ax = plt.subplots(figsize=(7, 5))
+    ax.scatter(x, y, alpha=0.7)
+    m, b = np.polyfit(x, y, 1)  # lineare Regression
+    ax.plot(x, m * x + b, color="red", label=f"r = {y.corr(x):.2f}")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(f"Redeanteil {kurzname(team)} (%)")
+    ax.set_title(titel)
+    ax.legend()
+    return fig
+
+
+def saisonverlauf(t: dict, team: str):
+    d = t["saisonverlauf"].sort_values(["meta.saison", "meta.spieltag"]).reset_index(drop=True)
+    d["saison_spieltag"] = d["meta.saison"].astype(str) + " - " + d["meta.spieltag"].astype(str)
+
+    # Glättung: gleitendes Mittel (3), danach Savitzky-Golay
+    for spalte, _, _, _ in KURVEN:
+        d[f"{spalte}.smooth"] = d[spalte].rolling(3, center=True, min_periods=1).mean()
+        if len(d) >= 5 and d[f"{spalte}.smooth"].notna().all():  # Lücken: Spieltage ohne Sätze der Gruppe
+            d[f"{spalte}.smooth"] = savgol_filter(d[f"{spalte}.smooth"], 5, 2, mode="interp")
+
+    fig, ax1 = plt.subplots(figsize=(14, 6))
+    for spalte, label, farbe, stil in KURVEN:
+        ax1.plot(d["saison_spieltag"], d[f"{spalte}.smooth"], label=_label(label, team), color=farbe, linestyle=stil,
+                 linewidth=1.8 if stil == "--" else 2.2, zorder=3)
+    ax1.axhline(0, color="black", linestyle=":", linewidth=1, zorder=2)
+
+    # Saisonwechsel-Linien & Labels
+    wechsel = d.index[d["meta.saison"].shift() != d["meta.saison"]].tolist()
+    grenzen = [*wechsel, len(d)]
+    for i, (start, ende) in enumerate(zip(grenzen[:-1], grenzen[1:])):
+        if i > 0:
+            ax1.axvline(start, color="black", linestyle="--", linewidth=1.2, zorder=2)
+        ax1.text((start + ende) / 2, ax1.get_ylim()[1] * 0.9, f"Saison {d.loc[start, 'meta.saison']}",
+                 ha="center", va="top", fontsize=10, color="black")
+
+    step = max(1, len(d) // 15)
+    ax1.set_xticks(np.arange(0, len(d), step))
+    ax1.set_xticklabels(d["saison_spieltag"].iloc[::step], rotation=45, ha="right")
+    ax1.set_xlabel("Saisonverlauf (Saison - Spieltag)", fontsize=12)
+    ax1.set_ylabel("Durchschnittliches Sentiment (geglättet)", fontsize=12)
+    ax1.set_title(f"Sentimentverlauf über Saison 2023/24 - 2024/25 ({team})", fontsize=14)
+
+    # Tabellenplatz vollflächig im Hintergrund
+    leg_handles, leg_labels = ax1.get_legend_handles_labels()
+    tabelle = pd.to_numeric(d["meta.tabelle"], errors="coerce").round().astype("Int64")
+    if tabelle.notna().any():
+        ax2 = ax1.twinx()
+        ax2.fill_between(d["saison_spieltag"], tabelle, tabelle.max(), color="black", alpha=0.1,
+                         step="post", zorder=0)
+        leg_handles.append(Patch(facecolor="black", alpha=0.1, label="Tabellenplatz"))
+        leg_labels.append("Tabellenplatz")
+        ymin, ymax = int(tabelle.min()), int(tabelle.max())
+        ax2.set_yticks(np.arange(ymin, ymax + 1, 1))
+        ax2.set_yticklabels([str(i) for i in range(ymin, ymax + 1)])
+        ax2.invert_yaxis()
+        ax2.set_ylabel("Tabellenplatz", color="black", fontsize=11)
+        for label in ax2.get_yticklabels():
+            label.set_fontweight("bold")
+
+    # Markierungen spezieller Spieltage
+    for saison, spieltag, label in MARKIERUNGEN:
+        treffer = d.index[(d["meta.saison"] == saison) & (d["meta.spieltag"] == spieltag)]
+        if len(treffer):
+            ax1.axvline(treffer[0], color="darkred", linestyle="--", linewidth=1, alpha=0.4, zorder=4)
+            ax1.text(treffer[0], ax1.get_ylim()[0] * 0.95, label, rotation=90, ha="right", va="bottom",
+                     fontsize=9, color="darkred", alpha=0.4)
+
+    ax1.legend(leg_handles, leg_labels, frameon=False, fontsize=11, loc="upper left", bbox_to_anchor=(0.01, 0.5))
+    ax1.grid(alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+def tordifferenzverlauf(t: dict, team: str):
+    d = t["tordifferenz"].sort_values("ergebnis.tordifferenz")
+    x = d["ergebnis.tordifferenz"].to_numpy()
+
+    fig, ax1 = plt.subplots(figsize=(12, 6))
+    ax2 = ax1.twinx()
+    bars = ax1.bar(x, d["anzahl.spiele"].to_numpy(), width=0.8, color="lightgray", alpha=0.65,
+                   label="Anzahl Spiele")
+
+    handles = [bars]
+    for spalte, label, farbe, stil in TORDIFF_LINIEN:
+        h, = ax2.plot(x, d[spalte].to_numpy(), label=_label(label, team), linewidth=2.2, marker="o", markersize=4,
+                      linestyle=stil, color=farbe)
+        handles.append(h)
+
+    ax1.set_xlabel(f"Tordifferenz ({kurzname(team)} - Gegner)", fontsize=12)
+    ax1.set_ylabel("Anzahl Spiele", fontsize=12)
+    ax2.set_ylabel("Durchschnittliches Sentiment", fontsize=12)
+    xmin, xmax = int(np.min(x)), int(np.max(x))
+    ax1.set_xticks(np.arange(xmin, xmax + 1, 1))
+    ax2.set_ylim(-0.2, 1)
+    ax2.axhline(0, color="black", linestyle=":", linewidth=1)
+    if xmin <= 0 <= xmax:
+        ax1.axvline(0, color="lightgray", linestyle="--", linewidth=1.2)
+    ax1.grid(axis="x", linestyle="--", color="lightgray", alpha=0.6)
+    ax2.grid(axis="y", linestyle=":", color="gray", alpha=0.3)
+    ax1.set_title(f"Sentiment in Abhängigkeit von der Tordifferenz (ausgehend {team})", fontsize=14)
+    ax1.legend(handles, [h.get_label() for h in handles], frameon=False, loc="upper left", ncol=2)
+    fig.tight_layout()
+    return fig
+
+
+def korrelationsmatrix(t: dict, team: str):
+    corr = t["spielkennzahlen"].select_dtypes(include="number").corr()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    im = ax.imshow(corr, cmap="coolwarm", interpolation="none", vmin=-1, vmax=1)
+    fig.colorbar(im, label="Korrelationskoeffizient (r)")
+    ax.set_xticks(range(len(corr.columns)), corr.columns, rotation=90)
+    ax.set_yticks(range(len(corr.columns)), corr.columns)
+    ax.set_title("Korrelationsmatrix pro Spiel")
+    fig.tight_layout()
+    return fig
+
+
+def korrelation_ballbesitz(t: dict, team: str):
+    d = t["sprechanteil"]
+    kurz = kurzname(team)
+    return _korrelation(d["meta.ballbesitz_bayern"], d["bayern.percent"], f"Ballbesitz {kurz} (%)",
+                        f"Korrelation: Ballbesitz vs. Redeanteil ({kurz})", team)
+
+
+def korrelation_tordifferenz(t: dict, team: str):
+    d = t["sprechanteil"]
+    kurz = kurzname(team)
+    return _korrelation(d["ergebnis.tordifferenz"], d["bayern.percent"], f"Tordifferenz ({kurz} - Gegner)",
+                        f"Korrelation: Tordifferenz vs. Redeanteil {kurz}", team)
+
+
+def spielverlauf_interpoliert(t: dict, team: str):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    _minutenkurven(ax, t["sentiment_minute"], team)
+    ax.legend(frameon=False, fontsize=11, loc="upper center")
+    fig.tight_layout()
+    return fig
+
+
+def spielverlauf_mit_erstem_tor(t: dict, team: str):
+    fig, ax1 = plt.subplots(figsize=(12, 6))
+    ax2 = ax1.twinx()
+    ax2.hist(t["erste_fuehrung"]["schaetzung.spielminute"], bins=20, range=(-5, 95), alpha=0.38,
+             color="gray", edgecolor=None)
+    ax2.set_ylabel(f"Erzielte 1:0 Führungen durch {team}", fontsize=11, color="black")
+    ax2.set_ylim(0, ax2.get_ylim()[1] * 1.1)
+
+    _minutenkurven(ax1, t["sentiment_minute"], team)
+    handles, labels = ax1.get_legend_handles_labels()
+    handles.append(Patch(facecolor="gray", alpha=0.38, label="1:0-Tore (Histogramm)"))
+    labels.append("1:0-Tore (Histogramm)")
+    ax1.legend(handles, labels, frameon=False, fontsize=11, loc="upper center")
+    fig.tight_layout()
+    return fig
+
+
+# Name → (Eingabetabellen, Zeichenfunktion, gemeinsam genutzte Hilfsfunktionen)
+FIGUREN = {
+    "saisonverlauf": (["saisonverlauf"], saisonverlauf, []),
+    "tordifferenzverlauf": (["tordifferenz"], tordifferenzverlauf, []),
+    "korrelationsmatrix": (["spielkennzahlen"], korrelationsmatrix, []),
+    "korrelation_ballbesitz": (["sprechanteil"], korrelation_ballbesitz, [_korrelation]),
+    "korrelation_tordifferenz": (["sprechanteil"], korrelation_tordifferenz, [_korrelation]),
+    "spielverlauf_interpoliert": (["sentiment_minute"], spielverlauf_interpoliert, [_minutenkurven]),
+    "spielverlauf_mit_erstem_tor": (["sentiment_minute", "erste_fuehrung"], spielverlauf_mit_erstem_tor,
+                                    [_minutenkurven]),
+}
+
+
+# ---------- Cache & Rendern ----------
+def _tabellen_hash(tabelle: pd.DataFrame) -> str:
+    h = hashlib.sha256("|".join(map(str, tabelle.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(tabelle, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def code_version(name: str) -> str:
+    _, funktion, hilfen = FIGUREN[name]
+    quelltext = "".join(inspect.getsource(f) for f in [funktion, _label, *hilfen])
+    kopf = f"{GRAFIK_VERSION}|{matplotlib.__version__}|{KURVEN}|{TORDIFF_LINIEN}|{MARKIERUNGEN}|"
+    return hashlib.sha256((kopf + quelltext).encode("utf-8")).hexdigest()
+
+
+def rendern(aufgabe) -> tuple[str, float]:
+    """Eine Figur zeichnen und in alle Formate speichern (läuft im Worker-Prozess)."""
+    name, tabellen, ziele, team = aufgabe
+    start = time.perf_counter()
+    fig = FIGUREN[name][1](tabellen, team)
+    for pfad in ziele:
+        fig.savefig(pfad)
+    plt.close(fig)
+    return name, time.perf_counter() - start
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Grafiken aus den Analyse-Tabellen rendern (PNG + PDF).")
+    parser.add_argument("csv", help="Kombinierte Sentiment-CSV")
+    parser.add_argument("--out_dir", default="data/results", help="Enthält grafiken_png/ und grafiken_pdf/")
+    parser.add_argument("--nur", nargs="+", choices=list(FIGUREN), help="Nur diese Grafiken")
+    parser.add_argument("--neu", action="store_true", help="Cache ignorieren und alles neu zeichnen")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse (Standard: Anzahl CPU-Kerne)")
+    parser.add_argument("--model", default=MODEL, help=f"Modell für das Sentiment (Standard: {MODEL})")
+    parser.add_argument("--team", default=TEAM, help=f"Bezugsverein (Standard: {TEAM})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    out_dir = Path(args.out_dir)
+    for fmt in FORMATE:
+        (out_dir / f"grafiken_{fmt}").mkdir(parents=True, exist_ok=True)
+    cache_pfad = out_dir / CACHE_DATEI
+    cache = json.loads(cache_pfad.read_text(encoding="utf-8")) if cache_pfad.is_file() and not args.neu else {}
+
+    team = verein(args.team)
+    quellen = tabellen_quellen(args.csv, args.model, team)
+    tabellen, hashes = {}, {}
+    aufgaben, schluessel = [], {}
+    for name in args.nur or FIGUREN:
+        eingaben = FIGUREN[name][0]
+        for q in eingaben:
+            if q not in tabellen:
+                tabellen[q] = quellen[q]()
+                hashes[q] = _tabellen_hash(tabellen[q])
+        schluessel[name] = hashlib.sha256(
+            (code_version(name) + "|" + team + "|" + "|".join(hashes[q] for q in eingaben)).encode("utf-8")
+        ).hexdigest()
+        ziele = [out_dir / f"grafiken_{fmt}" / f"{name}.{fmt}" for fmt in FORMATE]
+        if cache.get(name) == schluessel[name] and all(z.is_file() for z in ziele):
+            print(f"{name:<30} unverändert, übersprungen")
+            continue
+        aufgaben.append((name, {q: tabellen[q] for q in eingaben}, ziele, team))
+    print(f"Tabellen in {time.perf_counter() - start:.2f}s, {len(aufgaben)} Grafik(en) zu zeichnen")
+
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1 or len(aufgaben) <= 1:
+        ergebnisse = [rendern(a) for a in aufgaben]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(aufgaben))) as pool:
+            ergebnisse = list(pool.map(rendern, aufgaben))
+    for name, sekunden in ergebnisse:
+        cache[name] = schluessel[name]
+        print(f"{name:<30} {sekunden:6.2f}s  ({', '.join(FORMATE)})")
+
+    cache_pfad.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+    print(f"Fertig in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Embedding-Index für "ähnliche Kommentare" über Spiele hinweg.
+
+Jedes Segment wird einmal mit einem lokalen (deutschsprachigen) Encoder
+kodiert. Die Vektoren liegen L2-normalisiert als float16-Matrix in einer
+memory-mapped Datei, jede Zeile gehört zu (source_file, index):
+
+    embeddings/
+        meta.json      Modell, Dimension
+        vectors.f16    N × dim float16, nur angehängt
+        ids.csv        zeile, source_file, index, kontext, aktiv
+        dateien.json   source_file → Inhalts-Hash
+
+Neue oder geänderte Spiele werden angehängt (alte Zeilen eines geänderten
+Spiels werden nur deaktiviert):
+
+    python segment_embeddings.py add ../../dataset/einzelspiele
+
+Suche per Text oder per Segment, optional nur in einem Kontext und nur in
+anderen Spielen (z.B. dieselbe Situation bei Bayern vs. Gegner):
+
+    python segment_embeddings.py query "Der Ball zappelt im Netz"
+    python segment_embeddings.py query --segment 23-24_S30_1._fc_union_berlin.json#76 --kontext Gegner --anderes_spiel
+
+Latenz der Suche bei wachsendem Korpus (synthetische Vektoren, ohne Encoder):
+
+    python segment_embeddings.py bench
+"""
+
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sentiment_data import TEAM, kontext_group, kontext_gruppen
+
+STORE_DIR = "embeddings"
+MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+BATCH = 64
+MAX_LEN = 128
+TOP_K = 10
+CHUNK = 65536   # Zeilen pro Block bei der Suche (begrenzt den float32-Zwischenspeicher)
+RESIDENT_MAX_BYTES = 1 << 30  # bis zu dieser Größe wird die Matrix einmal als float32 im RAM gehalten
+
+
+class TransformerEncoder:
+    """Mean-Pooling über einen Hugging-Face-Encoder; torch wird erst beim ersten Aufruf geladen."""
+
+    def __init__(self, model: str = MODEL, batch: int = BATCH):
+        self.model_name = model
+        self.batch = batch
+        self._tok = self._mdl = None
+
+    def _load(self):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        self._torch = torch
+        self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        self._tok = AutoTokenizer.from_pretrained(self.model_name)
+        self._mdl = AutoModel.from_pretrained(self.model_name).to(self._device).eval()
+
+    @property
+    def dim(self) -> int:
+        if self._mdl is None:
+            self._load()
+        return self._mdl.config.hidden_size
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        if self._mdl is None:
+            self._load()
+        torch = self._torch
+        out = []
+        for i in range(0, len(texts), self.batch):
+            enc = self._tok(texts[i:i + self.batch], truncation=True, padding=True,
+                            max_length=MAX_LEN, return_tensors="pt").to(self._device)
+            with torch.no_grad():
+                hidden = self._mdl(**enc).last_hidden_state
+            mask = enc["attention_mask"].unsqueeze(-1).float()
+            out.append(((hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)).cpu().numpy())
+        return normalize_rows(np.vstack(out).astype(np.float32))
+
+
+def normalize_rows(x: np.ndarray) -> np.ndarray:
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def top_k(matrix: np.ndarray, queries: np.ndarray, k: int, mask: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Kosinus-Ähnlichkeit (Vektoren sind normalisiert) für einen Stapel Anfragen.
+    Die Matrix wird blockweise nach float32 gewandelt; `mask` schließt Zeilen aus
+    (1D für alle Anfragen oder 2D pro Anfrage). Rückgabe: (Zeilen, Scores), je m × k.
+    """
+    queries = np.atleast_2d(queries).astype(np.float32)
+    m = len(queries)
+    best_idx = np.empty((m, 0), dtype=np.int64)
+    best_sim = np.empty((m, 0), dtype=np.float32)
+
+    for start in range(0, len(matrix), CHUNK):
+        block = np.asarray(matrix[start:start + CHUNK], dtype=np.float32)  # bei float32 keine Kopie
+        sims = queries @ block.T
+        if mask is not None:
+            sims[~np.broadcast_to(mask[..., start:start + len(block)], sims.shape)] = -np.inf
+        idx = np.broadcast_to(np.arange(start, start + len(block)), sims.shape)
+        best_idx = np.hstack([best_idx, idx])
+        best_sim = np.hstack([best_sim, sims])
+        if best_sim.shape[1] > k:
+            keep = np.argpartition(-best_sim, k - 1, axis=1)[:, :k]
+            best_idx = np.take_along_axis(best_idx, keep, axis=1)
+            best_sim = np.take_along_axis(best_sim, keep, axis=1)
+
+    order = np.argsort(-best_sim, axis=1)
+    return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_sim, order, axis=1)
+
+
+class EmbeddingStore:
+    def __init__(self, folder: str | Path = STORE_DIR):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.vec_path = self.folder / "vectors.f16"
+        self.ids_path = self.folder / "ids.csv"
+        self.meta_path = self.folder / "meta.json"
+        self.files_path = self.folder / "dateien.json"
+
+        self.meta = json.loads(self.meta_path.read_text("utf-8")) if self.meta_path.is_file() else {}
+        self.files = json.loads(self.files_path.read_text("utf-8")) if self.files_path.is_file() else {}
+        if self.ids_path.is_file():
+            self.ids = pd.read_csv(self.ids_path)
+        else:
+            self.ids = pd.DataFrame(columns=["zeile", "source_file", "index", "kontext", "aktiv"])
+        self._resident = None
+
+    @property
+    def dim(self) -> int | None:
+        return self.meta.get("dim")
+
+    def matrix(self) -> np.ndarray:
+        if not len(self.ids):
+            return np.empty((0, self.dim or 0), dtype=np.float16)
+        return np.memmap(self.vec_path, dtype=np.float16, mode="r", shape=(len(self.ids), self.dim))
+
+    def search_matrix(self) -> np.ndarray:
+        """
+        Matrix für Suchanfragen: kleine Stores einmal als float32 in den Speicher
+        (spart die Umwandlung pro Anfrage), große bleiben memory-mapped.
+        """
+        if self._resident is not None and len(self._resident) == len(self.ids):
+            return self._resident
+        matrix = self.matrix()
+        if matrix.size * 4 <= RESIDENT_MAX_BYTES:
+            self._resident = np.asarray(matrix, dtype=np.float32)
+            return self._resident
+        return matrix
+
+    def _save_index(self):
+        self.ids.to_csv(self.ids_path, index=False)
+        self.files_path.write_text(json.dumps(self.files, ensure_ascii=False, indent=2), "utf-8")
+        self.meta_path.write_text(json.dumps(self.meta, indent=2), "utf-8")
+
+    def append(self, vectors: np.ndarray, rows: pd.DataFrame):
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimension {vectors.shape[1]} passt nicht zum Store ({self.dim}).")
+        self.meta["dim"] = int(vectors.shape[1])
+        # Vektoren eines abgebrochenen Laufs ohne Zeile in ids.csv abschneiden, sonst verschiebt sich `zeile`
+        gueltig = len(self.ids) * self.dim * np.dtype(np.float16).itemsize
+        if self.vec_path.is_file() and self.vec_path.stat().st_size > gueltig:
+            with self.vec_path.open("r+b") as f:
+                f.truncate(gueltig)
+        with self.vec_path.open("ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float16).tobytes())
+        rows = rows.assign(zeile=np.arange(len(self.ids), len(self.ids) + len(rows)), aktiv=True)
+        self.ids = pd.concat([self.ids, rows[self.ids.columns]], ignore_index=True) if len(self.ids) else rows[self.ids.columns]
+
+    def deactivate(self, source_file: str):
+        self.ids.loc[self.ids["source_file"] == source_file, "aktiv"] = False
+
+    def add_matches(self, data_dir: str | Path, encoder) -> int:
+        """Kodiert neue/geänderte Spiel-JSONs und hängt sie an. Rückgabe: Anzahl neuer Segmente."""
+        if self.meta.get("model") not in (None, encoder.model_name):
+            raise ValueError(f"Store wurde mit {self.meta['model']} erstellt, nicht mit {encoder.model_name}.")
+        self.meta["model"] = encoder.model_name
+
+        neu = 0
+        for path in sorted(Path(data_dir).glob("*.json")):
+            digest = file_hash(path)
+            if self.files.get(path.name) == digest:
+                continue
+            with path.open("r", encoding="utf-8") as f:
+                segmente = (json.load(f).get("content") or {}).get("transkript", [])
+            self.deactivate(path.name)
+            if segmente:
+                rows = pd.DataFrame({
+                    "source_file": path.name,
+                    "index": [s.get("index") for s in segmente],
+                    "kontext": [s.get("kontext") for s in segmente],
+                })
+                self.append(encoder([s.get("text") or "" for s in segmente]), rows)
+                neu += len(segmente)
+            self.files[path.name] = digest
+            # nach jedem Spiel sichern, ein Abbruch verliert nur das aktuelle
+            self._save_index()
+        return neu
+
+    def row_of(self, source_file: str, index: int) -> int:
+        treffer = self.ids[(self.ids["source_file"] == source_file) & (self.ids["index"] == index) & self.ids["aktiv"]]
+        if treffer.empty:
+            raise KeyError(f"Segment {source_file}#{index} nicht im Store.")
+        return int(treffer["zeile"].iloc[0])
+
+    def search(self, queries: np.ndarray, k: int = TOP_K, kontext: str | None = None,
+               ausschliessen: list[str | None] | None = None) -> list[pd.DataFrame]:
+        """
+        Batch-Suche. `kontext` filtert auf eine Kontextgruppe (kontext_gruppen():
+        Bezugsverein, Gegner, Neutral); `ausschliessen` gibt pro Anfrage ein source_file an,
+        dessen Segmente nicht als Treffer zählen.
+        """
+        mask = self.ids["aktiv"].to_numpy(dtype=bool).copy()
+        if kontext:
+            mask &= np.asarray(kontext_group(self.ids["kontext"])) == kontext
+        if ausschliessen:
+            files = self.ids["source_file"].to_numpy()
+            mask = np.vstack([mask & (files != f) if f else mask for f in ausschliessen])
+
+        idx, sims = top_k(self.search_matrix(), queries, k, mask)
+        results = []
+        for row_idx, row_sim in zip(idx, sims):
+            ok = np.isfinite(row_sim)
+            results.append(self.ids.iloc[row_idx[ok]].assign(score=row_sim[ok]).reset_index(drop=True))
+        return results
+
+
+def load_texts(data_dir: str | Path) -> dict[tuple[str, int], str]:
+    texts = {}
+    for path in Path(data_dir).glob("*.json"):
+        with path.open("r", encoding="utf-8") as f:
+            for s in (json.load(f).get("content") or {}).get("transkript", []):
+                texts[(path.name, s.get("index"))] = s.get("text")
+    return texts
+
+
+def bench(dim: int, sizes: list[int], batches: list[int], k: int = TOP_K, wiederholungen: int = 5):
+    """Suchlatenz auf zufälligen normalisierten float16-Vektoren in einer temporären memmap-Datei."""
+    rng = np.random.default_rng(0)
+    print(f"{'Zeilen':>10} {'Batch':>6} {'memmap ms':>10} {'RAM ms':>8} {'RAM ms/Anfrage':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = Path(tmp) / f"bench_{n}.f16"
+            mm = np.memmap(path, dtype=np.float16, mode="w+", shape=(n, dim))
+            for start in range(0, n, CHUNK):
+                stop = min(n, start + CHUNK)
+                mm[start:stop] = normalize_rows(rng.standard_normal((stop - start, dim)).astype(np.float32))
+            mm.flush()
+            matrix = np.memmap(path, dtype=np.float16, mode="r", shape=(n, dim))
+            resident = np.asarray(matrix, dtype=np.float32)
+
+            for b in batches:
+                q = normalize_rows(rng.standard_normal((b, dim)).astype(np.float32))
+                zeiten = []
+                for m in (matrix, resident):
+                    top_k(m, q, k)  # Aufwärmen (Seiten-Cache)
+                    start = time.perf_counter()
+                    for _ in range(wiederholungen):
+                        top_k(m, q, k)
+                    zeiten.append((time.perf_counter() - start) * 1000 / wiederholungen)
+                print(f"{n:>10,} {b:>6} {zeiten[0]:>10.1f} {zeiten[1]:>8.1f} {zeiten[1] / b:>15.2f}")
+            del matrix, mm, resident
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Embedding-Index und Ähnlichkeitssuche für Segmente.")
+    parser.add_argument("--store", default=STORE_DIR, help=f"Ordner des Index (Standard: {STORE_DIR})")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    p = sub.add_parser("add", help="Neue/geänderte Spiele kodieren und anhängen")
+    p.add_argument("data_dir", help="Ordner mit Spiel-JSONs")
+    p.add_argument("--model", default=MODEL, help="HF-Modell-ID oder lokaler Ordner")
+    p.add_argument("--batch", type=int, default=BATCH)
+
+    p = sub.add_parser("query", help="Ähnliche Segmente suchen")
+    p.add_argument("texte", nargs="*", help="Ein oder mehrere Anfragetexte (werden gemeinsam kodiert)")
+    p.add_argument("--segment", nargs="*", default=[], help="Vorhandene Segmente als Anfrage, Format datei.json#index")
+    p.add_argument("--data_dir", default="../../dataset/einzelspiele", help="Für die Anzeige der Treffertexte")
+    p.add_argument("-k", type=int, default=TOP_K)
+    p.add_argument("--kontext", choices=kontext_gruppen(TEAM), help=f"Kontextgruppe (Bezugsverein {TEAM}: Umgebungsvariable BEZUGSVEREIN)")
+    p.add_argument("--anderes_spiel", action="store_true", help="Treffer aus dem Spiel des Anfrage-Segments ausschließen")
+
+    p = sub.add_parser("bench", help="Suchlatenz bei wachsendem Korpus messen")
+    p.add_argument("--dim", type=int, default=384)
+    p.add_argument("--sizes", type=int, nargs="+", default=[7_500, 75_000, 300_000, 750_000])
+    p.add_argument("--batches", type=int, nargs="+", default=[1, 32])
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.befehl == "bench":
+        bench(args.dim, args.sizes, args.batches)
+        return
+
+    store = EmbeddingStore(args.store)
+
+    if args.befehl == "add":
+        start = time.perf_counter()
+        neu = store.add_matches(args.data_dir, TransformerEncoder(args.model, args.batch))
+        print(f"{neu} Segmente kodiert in {time.perf_counter() - start:.1f}s, "
+              f"{int(store.ids['aktiv'].sum())} aktive Zeilen im Store.")
+        return
+
+    vectors, labels, ausschliessen = [], [], []
+    matrix = store.matrix()
+    for seg in args.segment:
+        source_file, index = seg.rsplit("#", 1)
+        vectors.append(np.asarray(matrix[store.row_of(source_file, int(index))], dtype=np.float32))
+        labels.append(seg)
+        ausschliessen.append(source_file if args.anderes_spiel else None)
+    if args.texte:
+        vectors.extend(TransformerEncoder(store.meta["model"])(args.texte))
+        labels.extend(args.texte)
+        ausschliessen.extend([None] * len(args.texte))
+    if not vectors:
+        raise SystemExit("Bitte Anfragetexte oder --segment angeben.")
+
+    start = time.perf_counter()
+    results = store.search(np.vstack(vectors), args.k, args.kontext, ausschliessen)
+    dauer_ms = (time.perf_counter() - start) * 1000
+
+    texts = load_texts(args.data_dir) if Path(args.data_dir).is_dir() else {}
+    for label, res in zip(labels, results):
+        print(f"\n=== {label}")
+        for r in res.itertuples():
+            text = texts.get((r.source_file, r.index), "")
+            print(f"  {r.score:.3f}  {r.source_file}#{r.index} [{r.kontext}] {text}")
+    print(f"\n{len(labels)} Anfragen in {dauer_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Volltextsuche über alle Kommentar-Segmente (SQLite FTS5).
+
+Index aus den Spiel-JSONs aufbauen bzw. inkrementell aktualisieren (nur
+geänderte/neue Dateien werden neu eingelesen), optional mit den
+vorhergesagten Sentiments aus der kombinierten CSV:
+
+    python segment_search.py index ../../dataset/einzelspiele \\
+        --sentiment_csv ../../dataset/combined_data_with_sentiment.csv
+
+Suchen: alle Begriffe müssen vorkommen, '"Thomas Müller"' ist eine Phrase,
+Präfix mit * (Sonderzeichen wie 1:0 oder Bindestriche werden wörtlich gesucht).
+Mit --fts geht die Anfrage unverändert als FTS5-Syntax durch (AND/OR/NOT, NEAR):
+
+    python segment_search.py query Rekordmeister
+    python segment_search.py query "Müller*" --saison 23/24 --kontext "FC Bayern München" --fenster 2
+    python segment_search.py query Elfmeter --gegner dortmund --sentiment Negativ
+    python segment_search.py query "Elfmeter OR Strafstoß" --fts
+
+Umlaute werden gefaltet (Müller findet auch "Muller"), ß wird zu ss.
+"""
+
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+DB_DATEI = "segment_index.sqlite"
+SENTIMENT_MODEL = "fine_tuned_german_sentiment"
+FENSTER = 1
+LIMIT = 20
+
+
+def fold(text: str) -> str:
+    """Normalisierung für Index und Anfrage; Diakritika faltet der Tokenizer selbst."""
+    return (text or "").replace("ß", "ss").replace("ẞ", "SS")
+
+
+def fts_query(query: str) -> str:
+    """Jeder Begriff als FTS5-Phrase (Anführungszeichen verdoppelt), ein * am Ende bleibt Präfixsuche."""
+    teile = []
+    for begriff in re.findall(r'"[^"]*"\*?|\S+', fold(query)):
+        praefix = begriff.endswith("*")
+        begriff = begriff.rstrip("*")
+        if len(begriff) >= 2 and begriff[0] == begriff[-1] == '"':
+            begriff = begriff[1:-1]
+        if begriff:
+            teile.append('"' + begriff.replace('"', '""') + '"' + ("*" if praefix else ""))
+    return " ".join(teile)
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class SegmentIndex:
+    def __init__(self, path: str | Path = DB_DATEI):
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS dateien (
+                source_file TEXT PRIMARY KEY,
+                hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS segmente (
+                id INTEGER PRIMARY KEY,
+                source_file TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                kontext TEXT,
+                phase INTEGER,
+                saison TEXT,
+                spieltag INTEGER,
+                gegner TEXT,
+                kommentator TEXT,
+                sentiment TEXT,
+                UNIQUE (source_file, idx)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS segmente_fts USING fts5(
+                text, tokenize = "unicode61 remove_diacritics 2"
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def _delete_file(self, source_file: str):
+        ids = [r[0] for r in self.conn.execute("SELECT id FROM segmente WHERE source_file = ?", (source_file,))]
+        self.conn.executemany("DELETE FROM segmente_fts WHERE rowid = ?", [(i,) for i in ids])
+        self.conn.execute("DELETE FROM segmente WHERE source_file = ?", (source_file,))
+        self.conn.execute("DELETE FROM dateien WHERE source_file = ?", (source_file,))
+
+    def _insert_file(self, path: Path, digest: str):
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        meta = data.get("meta") or {}
+        offizielle = data.get("offizielle") or {}
+
+        for seg in (data.get("content") or {}).get("transkript", []):
+            cur = self.conn.execute(
+                "INSERT INTO segmente (source_file, idx, text, kontext, phase, saison, spieltag, gegner, kommentator) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    path.name,
+                    seg.get("index"),
+                    seg.get("text") or "",
+                    seg.get("kontext"),
+                    (seg.get("klassifikation") or {}).get("phase"),
+                    meta.get("saison"),
+                    meta.get("spieltag"),
+                    meta.get("gegner"),
+                    offizielle.get("kommentator"),
+                ),
+            )
+            self.conn.execute(
+                "INSERT INTO segmente_fts (rowid, text) VALUES (?, ?)",
+                (cur.lastrowid, fold(seg.get("text"))),
+            )
+        self.conn.execute("INSERT INTO dateien (source_file, hash) VALUES (?, ?)", (path.name, digest))
+
+    def index_dir(self, data_dir: str | Path) -> tuple[int, int]:
+        """Gleicht den Index mit dem Ordner ab. Rückgabe: (neu/geändert, entfernt)."""
+        files = {p.name: p for p in sorted(Path(data_dir).glob("*.json"))}
+        bekannt = {r["source_file"]: r["hash"] for r in self.conn.execute("SELECT * FROM dateien")}
+
+        geaendert = entfernt = 0
+        with self.conn:
+            for name in set(bekannt) - set(files):
+                self._delete_file(name)
+                entfernt += 1
+            for name, path in files.items():
+                digest = file_hash(path)
+                if bekannt.get(name) == digest:
+                    continue
+                self._delete_file(name)
+                self._insert_file(path, digest)
+                geaendert += 1
+        return geaendert, entfernt
+
+    def load_sentiment(self, csv_path: str | Path, model: str = SENTIMENT_MODEL) -> int:
+        """Übernimmt Modellvorhersagen aus der kombinierten CSV (Zuordnung über source_file + index)."""
+        col = f"sentiment__{model}"
+        df = pd.read_csv(csv_path, usecols=["source_file", "index", col])
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE segmente SET sentiment = ? WHERE source_file = ? AND idx = ?",
+                zip(df[col].astype(str), df["source_file"], df["index"].astype(int)),
+            )
+        return len(df)
+
+    def search(
+        self,
+        query: str,
+        saison: str | None = None,
+        spieltag: int | None = None,
+        gegner: str | None = None,
+        kommentator: str | None = None,
+        kontext: str | None = None,
+        sentiment: str | None = None,
+        fenster: int = FENSTER,
+        limit: int = LIMIT,
+        fts: bool = False,
+    ) -> list[dict]:
+        """
+        Treffer nach BM25 sortiert. Jeder Treffer enthält unter "umfeld" die
+        `fenster` Segmente davor und danach aus demselben Spiel.
+        Gegner und Kommentator werden als Teilstring (ohne Groß/klein) gesucht.
+        Mit `fts` ist `query` rohe FTS5-Syntax, sonst gilt fts_query().
+        """
+        where = ["segmente_fts MATCH ?"]
+        params: list = [fold(query) if fts else fts_query(query)]
+        for spalte, wert in [("saison", saison), ("spieltag", spieltag), ("kontext", kontext), ("sentiment", sentiment)]:
+            if wert is not None:
+                where.append(f"s.{spalte} = ?")
+                params.append(wert)
+        for spalte, wert in [("gegner", gegner), ("kommentator", kommentator)]:
+            if wert is not None:
+                where.append(f"s.{spalte} LIKE ?")
+                params.append(f"%{wert}%")
+
+        hits = [dict(r) for r in self.conn.execute(
+            f"""
+            SELECT s.*, bm25(segmente_fts) AS score
+            FROM segmente_fts JOIN segmente s ON s.id = segmente_fts.rowid
+            WHERE {' AND '.join(where)}
+            ORDER BY score
+            LIMIT ?
+            """,
+            (*params, limit),
+        )]
+
+        for hit in hits:
+            hit["umfeld"] = [dict(r) for r in self.conn.execute(
+                "SELECT idx, text, kontext, sentiment FROM segmente "
+                "WHERE source_file = ? AND idx BETWEEN ? AND ? ORDER BY idx",
+                (hit["source_file"], hit["idx"] - fenster, hit["idx"] + fenster),
+            )]
+        return hits
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Volltextsuche über die Kommentar-Segmente.")
+    parser.add_argument("--db", default=DB_DATEI, help=f"Indexdatei (Standard: {DB_DATEI})")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    p = sub.add_parser("index", help="Index aus Spiel-JSONs aufbauen/aktualisieren")
+    p.add_argument("data_dir", help="Ordner mit den Spiel-JSONs (z.B. dataset/einzelspiele)")
+    p.add_argument("--sentiment_csv", help="Kombinierte CSV mit Modellvorhersagen")
+    p.add_argument("--model", default=SENTIMENT_MODEL, help=f"Modellspalte für Sentiment (Standard: {SENTIMENT_MODEL})")
+
+    p = sub.add_parser("query", help="Suchen")
+    p.add_argument("query", help="Suchbegriffe, z.B. Rekordmeister, \"Thomas Müller\", Kane*, 1:0")
+    p.add_argument("--fts", action="store_true", help="Anfrage als rohe FTS5-Syntax (AND/OR/NOT, NEAR)")
+    p.add_argument("--saison", help="z.B. 23/24")
+    p.add_argument("--spieltag", type=int)
+    p.add_argument("--gegner", help="Teilstring, z.B. dortmund")
+    p.add_argument("--kommentator", help="Teilstring")
+    p.add_argument("--kontext", help="z.B. 'FC Bayern München', Neutral oder ein Gegnername")
+    p.add_argument("--sentiment", help="Positiv, Neutral oder Negativ")
+    p.add_argument("--fenster", type=int, default=FENSTER, help=f"Segmente davor/danach (Standard: {FENSTER})")
+    p.add_argument("--limit", type=int, default=LIMIT, help=f"Maximale Trefferzahl (Standard: {LIMIT})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    index = SegmentIndex(args.db)
+
+    if args.befehl == "index":
+        start = time.perf_counter()
+        geaendert, entfernt = index.index_dir(args.data_dir)
+        print(f"{geaendert} Dateien neu indiziert, {entfernt} entfernt.")
+        if args.sentiment_csv:
+            n = index.load_sentiment(args.sentiment_csv, args.model)
+            print(f"Sentiment für {n} Segmente übernommen.")
+        print(f"Dauer: {time.perf_counter() - start:.2f}s")
+
+    elif args.befehl == "query":
+        start = time.perf_counter()
+        try:
+            hits = index.search(
+                args.query,
+                saison=args.saison,
+                spieltag=args.spieltag,
+                gegner=args.gegner,
+                kommentator=args.kommentator,
+                kontext=args.kontext,
+                sentiment=args.sentiment,
+                fenster=args.fenster,
+                limit=args.limit,
+                fts=args.fts,
+            )
+        except sqlite3.OperationalError as e:
+            print(f"Ungültige Anfrage '{args.query}': {e}")
+            index.close()
+            raise SystemExit(1)
+        dauer_ms = (time.perf_counter() - start) * 1000
+
+        for hit in hits:
+            print(f"\n{hit['source_file']} #{hit['idx']}  [{hit['kontext']} | {hit['sentiment'] or '-'}]  {hit['kommentator']}")
+            for seg in hit["umfeld"]:
+                marker = ">>" if seg["idx"] == hit["idx"] else "  "
+                print(f"  {marker} {seg['idx']:>3}: {seg['text']}")
+        print(f"\n{len(hits)} Treffer in {dauer_ms:.1f} ms")
+
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Vorberechneter Aggregations-Würfel hinter den Notebooks.
+
+Statt in jeder Zelle groupby(['source_file', 'kontext_group']) + pivot über
+alle Zeilen laufen zu lassen, wird einmal ein Würfel aus Summen und Anzahlen
+
+    Spiel × kontext_group × Phase × Kommentator × Heim/Auswärts
+
+gebildet (~1.000 Zellen statt ~7.000 Zeilen) plus eine Spieltabelle mit den
+Metadaten pro Spiel. Alle veröffentlichten Tabellen werden daraus abgeleitet:
+
+    from sentiment_cube import load_cube
+    cube = load_cube("data/output_with_sentiment.csv")
+    cube.per_game()           # sentiment_per_game.xlsx
+    cube.per_goal_diff()      # sentiment_per_goal_diff.xlsx
+    cube.per_commentator()    # sentiment_per_commentator_with_justified_bias.xlsx
+    cube.speaking_share()     # Sprechanteil Bayern/Gegner pro Spiel
+
+Mittelwerte sind immer Summe / Anzahl der Zeilen mit Sentiment, also
+identisch mit df.groupby(...).mean() auf der Zeilentabelle. Der Würfel wird
+wie der Datensatz in .cache/ abgelegt.
+
+    python sentiment_cube.py data/output_with_sentiment.csv --out_dir data/results
+
+Die vier Tabellen sind die Quelle der Wahrheit für die Kennzahlen und
+werden von ergebnis_inkrementell.py und live.py bei jedem Update komplett
+überschrieben. Konfidenzintervalle und p-Werte aus bias_statistik.py liegen
+deshalb in eigenen Dateien <tabelle>_statistik.xlsx (statistik_datei()),
+die hier nie geschrieben werden.
+"""
+
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sentiment_data import MODEL, TEAM, load_dataset, _cache_path
+
+CUBE_VERSION = 1
+
+DIMENSIONEN = [
+    "source_file",
+    "kontext_group",
+    "klassifikation.phase",
+    "offizielle.kommentator",
+    "meta.heim_auswaerts",
+]
+
+# pro Spiel konstant → Spieltabelle statt Würfel-Dimension
+SPIEL_SPALTEN = {
+    "meta.saison": "first",
+    "meta.spieltag": "first",
+    "meta.gegner": "first",
+    "meta.tabelle": "first",
+    "ergebnis.bayern": "first",
+    "ergebnis.gegner": "first",
+    "meta.ballbesitz_bayern": "mean",
+}
+
+# Spaltennamen in Reihenfolge der kontext_group-Kategorien; "bayern" steht für den Bezugsverein
+KONTEXT_NAMEN = ["bayern", "gegner", "neutral"]
+
+W_UNJUST, W_SPEECH = 0.6, 0.4
+
+
+def build_cube(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(zellen, spiele) aus der Zeilentabelle von load_dataset()."""
+    w = df["weighted_sentiment"].astype("float64")
+    zellen = (
+        df.assign(
+            _w=w,
+            _n_w=w.notna().astype("int32"),
+            _s=df["sentiment_numeric"].astype("float64"),
+        )
+        .groupby(DIMENSIONEN, dropna=False, observed=True, sort=True)
+        .agg(n=("_n_w", "size"), n_sentiment=("_n_w", "sum"), sum_weighted=("_w", "sum"), sum_sentiment=("_s", "sum"))
+        .reset_index()
+    )
+
+    spiele = df.groupby("source_file", observed=True).agg(
+        {c: f for c, f in SPIEL_SPALTEN.items() if c in df.columns}
+    )
+    spiele["ergebnis.tordifferenz"] = spiele["ergebnis.bayern"] - spiele["ergebnis.gegner"]
+    spiele["klassifikation.phase"] = zellen.groupby("source_file", observed=True)["klassifikation.phase"].max()
+    return zellen, spiele.reset_index()
+
+
+def _mittel(summen: pd.DataFrame) -> pd.Series:
+    return summen["sum_weighted"] / summen["n_sentiment"].replace(0, np.nan)
+
+
+class SentimentCube:
+    def __init__(self, zellen: pd.DataFrame, spiele: pd.DataFrame):
+        self.zellen = zellen
+        self.spiele = spiele
+
+    @property
+    def team(self) -> str:
+        """Bezugsverein = erste Kategorie von kontext_group."""
+        return str(self.zellen["kontext_group"].cat.categories[0])
+
+    # ---------- Bausteine ----------
+    def rollup(self, nach: list[str], **filter) -> pd.DataFrame:
+        """Summen/Anzahlen über die übrigen Dimensionen; Spielattribute werden bei Bedarf angehängt."""
+        z = self.zellen
+        for spalte, wert in filter.items():
+            z = z[z[spalte].isin(wert if isinstance(wert, (list, tuple, set)) else [wert])]
+        spiel_attr = [c for c in nach if c not in z.columns]
+        if spiel_attr:
+            z = z.merge(self.spiele[["source_file", *spiel_attr]], on="source_file", how="left")
+        r = (
+            z.groupby(nach, observed=True, sort=True)[["n", "n_sentiment", "sum_weighted", "sum_sentiment"]]
+            .sum()
+            .reset_index()
+        )
+        r["weighted_sentiment"] = _mittel(r)
+        return r
+
+    def by_kontext(self, nach: list[str], wert: str = "weighted_sentiment", praefix: str = "sentiment") -> pd.DataFrame:
+        """Pivot nach kontext_group → <praefix>.bayern / .gegner / .neutral."""
+        r = self.rollup([*nach, "kontext_group"])
+        p = r.pivot(index=nach, columns="kontext_group", values=wert)
+        namen = dict(zip(map(str, self.zellen["kontext_group"].cat.categories), KONTEXT_NAMEN))
+        p.columns = [f"{praefix}.{namen[str(c)]}" for c in p.columns]
+        for name in KONTEXT_NAMEN:
+            if f"{praefix}.{name}" not in p.columns:
+                p[f"{praefix}.{name}"] = np.nan
+        return p[[f"{praefix}.{n}" for n in KONTEXT_NAMEN]].reset_index()
+
+    # ---------- veröffentlichte Tabellen ----------
+    def saisonverlauf(self) -> pd.DataFrame:
+        """Sentiment pro Spiel & Kontext mit Spieltag/Saison/Tabelle, sortiert nach Saison und Spieltag."""
+        spalten = ["source_file", "meta.gegner", "meta.spieltag", "meta.saison", "ergebnis.bayern", "ergebnis.gegner"]
+        out = self.spiele[spalten].merge(self.by_kontext(["source_file"]), on="source_file", how="left")
+        out = out.merge(self.spiele[["source_file", "meta.tabelle"]], on="source_file", how="left")
+        return out.sort_values(["meta.saison", "meta.spieltag"]).reset_index(drop=True)
+
+    def per_game(self) -> pd.DataFrame:
+        """sentiment_per_game.xlsx: Kontexte (fehlend = 0), Durchschnitt und Differenz Bayern − Gegner."""
+        spalten = ["source_file", "meta.gegner", "ergebnis.bayern", "ergebnis.gegner"]
+        out = self.spiele[spalten].merge(self.by_kontext(["source_file"]), on="source_file", how="left")
+        gesamt = self.rollup(["source_file"])[["source_file", "weighted_sentiment"]]
+        out = out.merge(gesamt.rename(columns={"weighted_sentiment": "sentiment.average"}), on="source_file")
+        kontexte = ["sentiment.bayern", "sentiment.gegner", "sentiment.neutral"]
+        out[kontexte] = out[kontexte].fillna(0)
+        out["sentiment.diff"] = out["sentiment.bayern"] - out["sentiment.gegner"]
+        return out.sort_values(by="sentiment.diff", ascending=False).reset_index(drop=True)
+
+    def per_goal_diff(self) -> pd.DataFrame:
+        """sentiment_per_goal_diff.xlsx: Kontexte, ungewichteter Kontext-Durchschnitt, Differenz, Anzahl Spiele."""
+        out = self.by_kontext(["ergebnis.tordifferenz"])
+        kontexte = ["sentiment.bayern", "sentiment.gegner", "sentiment.neutral"]
+        out["sentiment.average"] = out[kontexte].mean(axis=1)
+        out["sentiment.diff"] = out["sentiment.bayern"] - out["sentiment.gegner"]
+        spiele = (
+            self.spiele.groupby("ergebnis.tordifferenz")["source_file"].nunique()
+            .rename("anzahl.spiele").reset_index()
+        )
+        out = out.merge(spiele, on="ergebnis.tordifferenz", how="left")
+        order_cols = ["ergebnis.tordifferenz", "anzahl.spiele", *kontexte, "sentiment.average", "sentiment.diff"]
+        return out[order_cols].sort_values("ergebnis.tordifferenz").reset_index(drop=True)
+
+    def _kommentator_basis(self) -> pd.DataFrame:
+        k = "offizielle.kommentator"
+        out = self.by_kontext([k])
+        z = self.zellen[self.zellen[k].notna()].merge(
+            self.spiele[["source_file", "ergebnis.tordifferenz"]], on="source_file", how="left"
+        )
+        g = z.groupby(k, observed=True)
+        basis = pd.DataFrame({
+            "anzahl.spiele": g["source_file"].nunique(),
+            # Zeilen-gewichtet wie df.groupby(k)['ergebnis.tordifferenz'].mean()
+            "tordifferenz.average": (z["n"] * z["ergebnis.tordifferenz"]).groupby(z[k], observed=True).sum()
+            / z["n"].where(z["ergebnis.tordifferenz"].notna()).groupby(z[k], observed=True).sum(),
+        }).reset_index()
+        return out.merge(basis, on=k, how="left")
+
+    def per_commentator_simple(self, min_spiele: int = 3) -> pd.DataFrame:
+        """sentiment_per_commentator.xlsx: Kontexte, Differenz und Durchschnitt, sortiert nach Differenz."""
+        out = self._kommentator_basis()
+        out["sentiment.diff"] = out["sentiment.bayern"] - out["sentiment.gegner"]
+        out["sentiment.average"] = out[["sentiment.bayern", "sentiment.gegner", "sentiment.neutral"]].mean(axis=1)
+        return (
+            out.loc[out["anzahl.spiele"] >= min_spiele]
+            .sort_values("sentiment.diff", ascending=False)
+            .reset_index(drop=True)
+        )
+
+    def per_commentator(self, min_spiele: int = 3) -> pd.DataFrame:
+        """sentiment_per_commentator_with_justified_bias.xlsx (Bias, erwarteter Bias aus Tordifferenz, Score)."""
+        k = "offizielle.kommentator"
+        out = self._kommentator_basis()
+        rows = self.by_kontext([k], wert="n", praefix="rows").fillna(0)
+        rows["rows.total"] = rows[["rows.bayern", "rows.gegner", "rows.neutral"]].sum(axis=1)
+        den = rows["rows.total"].replace(0, np.nan)
+        for name in ["bayern", "gegner", "neutral"]:
+            rows[f"sprechanteil.{name}"] = (rows[f"rows.{name}"] / den).fillna(0)
+        out = out.merge(
+            rows[[k, "sprechanteil.bayern", "sprechanteil.gegner", "sprechanteil.neutral",
+                  "rows.total", "rows.bayern", "rows.gegner", "rows.neutral"]],
+            on=k, how="left",
+        )
+
+        out["sentiment.bias"] = out["sentiment.bayern"] - out["sentiment.gegner"]
+        out["sprechanteil.bias"] = out["sprechanteil.bayern"] - out["sprechanteil.gegner"]
+        valid = out[["tordifferenz.average", "sentiment.bias"]].dropna()
+        if len(valid) >= 2 and valid["tordifferenz.average"].nunique() >= 2:
+            a, b = np.polyfit(valid["tordifferenz.average"].to_numpy(), valid["sentiment.bias"].to_numpy(), deg=1)
+            out["expected.bias"] = a * out["tordifferenz.average"] + b
+        else:
+            out["expected.bias"] = 0.0
+        out["unjustified.bias"] = out["sentiment.bias"] - out["expected.bias"]
+        out["parteilichkeit.score"] = (
+            W_UNJUST * out["unjustified.bias"].fillna(0) + W_SPEECH * out["sprechanteil.bias"].fillna(0)
+        )
+        out["sentiment.average"] = out[["sentiment.bayern", "sentiment.gegner", "sentiment.neutral"]].mean(axis=1)
+        return (
+            out.loc[out["anzahl.spiele"] >= min_spiele]
+            .sort_values(["parteilichkeit.score", "anzahl.spiele"], ascending=[False, False])
+            .reset_index(drop=True)
+        )
+
+    def speaking_share(self) -> pd.DataFrame:
+        """Sprechanteil Bayern vs. Rest (Gegner + Neutral) pro Spiel mit Ballbesitz und Tordifferenz."""
+        rows = self.by_kontext(["source_file"], wert="n", praefix="rows").fillna(0)
+        rows["rows.gegner"] = rows["rows.gegner"] + rows["rows.neutral"]
+        rows["rows.total"] = rows["rows.bayern"] + rows["rows.gegner"]
+        rows["bayern.percent"] = (rows["rows.bayern"] / rows["rows.total"]).round(2)
+        rows["gegner.percent"] = (rows["rows.gegner"] / rows["rows.total"]).round(2)
+        out = rows.merge(
+            self.spiele[["source_file", "meta.ballbesitz_bayern", "ergebnis.tordifferenz"]],
+            on="source_file", how="left",
+        )
+        return out[["source_file", "bayern.percent", "gegner.percent", "meta.ballbesitz_bayern",
+                    "ergebnis.tordifferenz"]].sort_values("bayern.percent", ascending=False)
+
+    def game_metrics(self) -> pd.DataFrame:
+        """Kennzahlen pro Spiel für die Korrelationsmatrix (Ballbesitz, Phase, Zeilen und Sprechanteile je Kontext)."""
+        out = self.spiele[["source_file", "meta.gegner", "meta.ballbesitz_bayern", "ergebnis.bayern",
+                           "ergebnis.gegner", "klassifikation.phase", "ergebnis.tordifferenz"]]
+        rows = self.by_kontext(["source_file"], wert="n", praefix="rows").fillna(0)
+        rows["rows.total"] = rows[["rows.bayern", "rows.gegner", "rows.neutral"]].sum(axis=1)
+        den = rows["rows.total"].replace(0, np.nan)
+        for name in ["bayern", "gegner", "neutral"]:
+            rows[f"sprechanteil.{name}"] = (rows[f"rows.{name}"] / den).fillna(0).round(2)
+        return out.merge(
+            rows[["source_file", "rows.total", "rows.bayern", "rows.gegner", "rows.neutral",
+                  "sprechanteil.bayern", "sprechanteil.gegner", "sprechanteil.neutral"]],
+            on="source_file", how="left",
+        )
+
+
+def load_cube(
+    path: str | Path, model: str = MODEL, cache: bool = True, verbose: bool = True, team: str = TEAM
+) -> SentimentCube:
+    """Würfel aus .cache/ oder aus dem (gecachten) Datensatz neu aufbauen."""
+    path = Path(path)
+    start = time.perf_counter()
+    basis = _cache_path(path, [f"cube{CUBE_VERSION}"], model, True, team)
+    dateien = basis.with_name(basis.stem + "-zellen.parquet"), basis.with_name(basis.stem + "-spiele.parquet")
+
+    if cache and all(d.is_file() for d in dateien):
+        cube = SentimentCube(*(pd.read_parquet(d) for d in dateien))
+        quelle = "Cache"
+    else:
+        df = load_dataset(path, model=model, cache=cache, verbose=False, team=team)
+        cube = SentimentCube(*build_cube(df))
+        if cache:
+            dateien[0].parent.mkdir(exist_ok=True)
+            cube.zellen.to_parquet(dateien[0], index=False)
+            cube.spiele.to_parquet(dateien[1], index=False)
+        quelle = "Datensatz"
+
+    if verbose:
+        print(f"Würfel: {len(cube.zellen):,} Zellen, {len(cube.spiele)} Spiele aus {quelle} "
+              f"in {time.perf_counter() - start:.3f}s")
+    return cube
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ergebnistabellen aus dem Aggregations-Würfel schreiben.")
+    parser.add_argument("csv", help="Kombinierte Sentiment-CSV")
+    parser.add_argument("--out_dir", default="data/results", help="Zielordner für die xlsx-Tabellen")
+    parser.add_argument("--model", default=MODEL, help=f"Modell für das Sentiment (Standard: {MODEL})")
+    parser.add_argument("--team", default=TEAM, help=f"Bezugsverein (Standard: {TEAM})")
+    return parser.parse_args()
+
+
+# (Datei, Methode des Würfels, Index mitschreiben wie in den Notebooks)
+TABELLEN = [
+    ("sentiment_per_game.xlsx", "per_game", True),
+    ("sentiment_per_goal_diff.xlsx", "per_goal_diff", False),
+    ("sentiment_per_commentator.xlsx", "per_commentator_simple", True),
+    ("sentiment_per_commentator_with_justified_bias.xlsx", "per_commentator", False),
+]
+
+
+def statistik_datei(datei: str) -> str:
+    """sentiment_per_game.xlsx → sentiment_per_game_statistik.xlsx (geschrieben von bias_statistik.py)."""
+    return datei.removesuffix(".xlsx") + "_statistik.xlsx"
+
+
+def write_tables(cube: SentimentCube, out_dir: str | Path):
+    """Die Tabellen aus TABELLEN schreiben; die _statistik-Dateien bleiben unberührt."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for datei, methode, mit_index in TABELLEN:
+        start = time.perf_counter()
+        tabelle = getattr(cube, methode)()
+        dauer_ms = (time.perf_counter() - start) * 1000
+        tabelle.to_excel(out_dir / datei, index=mit_index)
+        print(f"{datei:<55} {len(tabelle):>3} Zeilen in {dauer_ms:6.1f} ms")
+
+
+def main():
+    args = parse_args()
+    write_tables(load_cube(args.csv, model=args.model, team=args.team), args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
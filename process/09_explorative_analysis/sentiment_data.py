@@ -0,0 +1,234 @@
+"""
+Gemeinsamer, typisierter Loader für den kombinierten Sentiment-Datensatz.
+
+Statt in jedem Notebook pd.read_csv + Spaltenauswahl + .map/.apply:
+
+    from sentiment_data import load_dataset
+    df = load_dataset("data/output_with_sentiment.csv")
+
+- nur die benötigten Spalten werden gelesen (Projektion)
+- Kategorien für Kontext, Gegner, Kommentator und Label-Spalten,
+  int8/int16 für Phase, Tore usw., float32 für Konfidenzen
+- sentiment_numeric, weighted_sentiment und kontext_group werden einmal
+  vektorisiert abgeleitet
+- die fertige Tabelle wird als Parquet in .cache/ neben der CSV abgelegt und
+  beim nächsten Laden direkt gelesen (solange CSV und Spaltenauswahl gleich sind)
+
+Vergleich Speicher/Ladezeit gegen ein einfaches pd.read_csv:
+
+    python sentiment_data.py data/output_with_sentiment.csv
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bezugsverein (Umgebungsvariable BEZUGSVEREIN, Standard FC Bayern München)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vereine import STANDARD, TEAM, verein  # noqa: E402
+
+SCHEMA_VERSION = 1
+MODEL = "fine_tuned_german_sentiment"
+CACHE_DIR = ".cache"
+
+SENTIMENT_WERTE = {"Positiv": 1, "Negativ": -1, "Neutral": 0}
+KONTEXT_GRUPPEN = [STANDARD, "Gegner", "Neutral"]
+
+# Spalten, die die Notebooks standardmäßig verwenden (ohne Modellspalten)
+BASIS_SPALTEN = [
+    "index",
+    "text",
+    "kontext",
+    "klassifikation.tore_bayern",
+    "klassifikation.tore_gegner",
+    "klassifikation.phase",
+    "meta.saison",
+    "meta.spieltag",
+    "meta.heim_auswaerts",
+    "meta.gegner",
+    "meta.tabelle",
+    "meta.ballbesitz_bayern",
+    "ergebnis.bayern",
+    "ergebnis.gegner",
+    "offizielle.schiedsrichter",
+    "offizielle.kommentator",
+    "source_file",
+]
+
+KATEGORIEN = {
+    "kontext",
+    "meta.saison",
+    "meta.heim_auswaerts",
+    "meta.gegner",
+    "offizielle.schiedsrichter",
+    "offizielle.kommentator",
+    "source_file",
+}
+
+GANZZAHLEN = {
+    "index": "int16",
+    "klassifikation.tore_bayern": "int8",
+    "klassifikation.tore_gegner": "int8",
+    "klassifikation.phase": "int8",
+    "meta.spieltag": "int8",
+    "meta.tabelle": "int8",
+    "ergebnis.bayern": "int8",
+    "ergebnis.gegner": "int8",
+}
+
+GLEITKOMMA = {"meta.ballbesitz_bayern"}
+
+
+def spalten_typ(spalte: str) -> str | None:
+    """dtype laut Schema; Label-/Konfidenzspalten werden am Präfix erkannt."""
+    if spalte.startswith("sentiment__"):
+        return "float32" if spalte.endswith("__conf") else "category"
+    if spalte in KATEGORIEN:
+        return "category"
+    if spalte in GLEITKOMMA:
+        return "float32"
+    return None
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Ganzzahlen verkleinern; Spalten mit fehlenden Werten werden float32."""
+    for spalte, typ in GANZZAHLEN.items():
+        if spalte not in df.columns:
+            continue
+        werte = pd.to_numeric(df[spalte], errors="coerce")
+        df[spalte] = werte.astype(typ) if werte.notna().all() else werte.astype("float32")
+    return df
+
+
+def sentiment_numeric(labels: pd.Series) -> np.ndarray:
+    """Positiv/Negativ/Neutral → 1/-1/0 über die Kategorie-Codes, unbekannt → NaN."""
+    cat = labels.astype("category").cat
+    lookup = np.array([SENTIMENT_WERTE.get(c, np.nan) for c in cat.categories] + [np.nan], dtype="float32")
+    werte = lookup[cat.codes.to_numpy()]  # Code -1 (fehlend) greift auf das letzte Element
+    # ohne fehlende Werte reicht int8
+    return werte.astype("int8") if not np.isnan(werte).any() else werte
+
+
+def kontext_gruppen(team: str = TEAM) -> list[str]:
+    """Kategorien von kontext_group: Bezugsverein, Gegner, Neutral."""
+    return [verein(team), "Gegner", "Neutral"]
+
+
+def kontext_group(kontext: pd.Series, team: str = TEAM) -> pd.Categorical:
+    """Dreistufige Zuordnung Bezugsverein / Gegner / Neutral, berechnet pro Kategorie statt pro Zeile."""
+    cat = kontext.astype("category").cat
+    gruppen = kontext_gruppen(team)
+
+    def gruppe(x) -> int:
+        x = str(x).strip()
+        if x == gruppen[0]:
+            return 0
+        if x.lower() == "neutral":
+            return 2
+        return 1
+
+    lookup = np.array([gruppe(c) for c in cat.categories] + [1], dtype="int8")
+    return pd.Categorical.from_codes(lookup[cat.codes.to_numpy()], categories=gruppen)
+
+
+def derive(df: pd.DataFrame, model: str = MODEL, team: str = TEAM) -> pd.DataFrame:
+    label_col = f"sentiment__{model}"
+    conf_col = f"{label_col}__conf"
+    if label_col in df.columns:
+        df["sentiment_numeric"] = sentiment_numeric(df[label_col])
+        if conf_col in df.columns:
+            df["weighted_sentiment"] = (
+                df["sentiment_numeric"].to_numpy(dtype="float32") * df[conf_col].to_numpy(dtype="float32")
+            )
+    if "kontext" in df.columns:
+        df["kontext_group"] = kontext_group(df["kontext"], team)
+    return df
+
+
+def _cache_path(csv_path: Path, columns: list[str], model: str, derived: bool, team: str = TEAM) -> Path:
+    stat = csv_path.stat()
+    key = f"{SCHEMA_VERSION}|{stat.st_size}|{stat.st_mtime_ns}|{model}|{derived}|{'|'.join(columns)}"
+    if verein(team) != STANDARD:  # Standard ohne Zusatz: vorhandene Caches bleiben gültig
+        key += f"|{verein(team)}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return csv_path.parent / CACHE_DIR / f"{csv_path.stem}-{digest}.parquet"
+
+
+def load_dataset(
+    path: str | Path,
+    columns: list[str] | None = None,
+    model: str = MODEL,
+    derived: bool = True,
+    cache: bool = True,
+    verbose: bool = True,
+    team: str = TEAM,
+) -> pd.DataFrame:
+    """
+    Lädt die CSV typisiert. `columns` ist die Projektion (Standard:
+    BASIS_SPALTEN + Label- und Konfidenzspalte von `model`); nicht vorhandene
+    Spalten werden ignoriert. Mit `derived` werden sentiment_numeric,
+    weighted_sentiment und kontext_group (bezogen auf `team`) ergänzt.
+    """
+    path = Path(path)
+    if columns is None:
+        columns = BASIS_SPALTEN + [f"sentiment__{model}", f"sentiment__{model}__conf"]
+
+    start = time.perf_counter()
+    cache_file = _cache_path(path, columns, model, derived, team)
+
+    if cache and cache_file.is_file():
+        df = pd.read_parquet(cache_file)
+        quelle = "Cache"
+    else:
+        vorhanden = set(pd.read_csv(path, nrows=0).columns)
+        usecols = [c for c in columns if c in vorhanden]
+        dtypes = {c: spalten_typ(c) for c in usecols if spalten_typ(c)}
+        df = pd.read_csv(path, usecols=usecols, dtype=dtypes)[usecols]
+        df = apply_schema(df)
+        if derived:
+            df = derive(df, model, team)
+        if cache:
+            cache_file.parent.mkdir(exist_ok=True)
+            df.to_parquet(cache_file, index=False)
+        quelle = "CSV"
+
+    if verbose:
+        mb = df.memory_usage(deep=True).sum() / 1e6
+        print(f"{len(df):,} Zeilen aus {quelle} in {time.perf_counter() - start:.3f}s, {mb:.2f} MB")
+    return df
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Speicher und Ladezeit: pd.read_csv vs. typisierter Loader.")
+    parser.add_argument("csv", help="Kombinierte Sentiment-CSV")
+    parser.add_argument("--model", default=MODEL, help=f"Modell für die abgeleiteten Spalten (Standard: {MODEL})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    start = time.perf_counter()
+    plain = pd.read_csv(args.csv)
+    plain_s = time.perf_counter() - start
+    plain_mb = plain.memory_usage(deep=True).sum() / 1e6
+
+    ergebnisse = [("pd.read_csv (alle Spalten, ohne Schema)", plain_s, plain_mb)]
+    for name, use_cache in [("typisiert aus CSV", False), ("typisiert aus Cache", True)]:
+        if use_cache:
+            load_dataset(args.csv, model=args.model, verbose=False)  # Cache sicher anlegen
+        start = time.perf_counter()
+        df = load_dataset(args.csv, model=args.model, cache=use_cache, verbose=False)
+        ergebnisse.append((name, time.perf_counter() - start, df.memory_usage(deep=True).sum() / 1e6))
+
+    for name, sekunden, mb in ergebnisse:
+        print(f"{name:<42} {sekunden * 1000:8.1f} ms {mb:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
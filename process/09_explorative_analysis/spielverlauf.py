@@ -0,0 +1,264 @@
+"""
+Spielverlauf: geschätzte Spielminute, Tor-Ereignisse und Sentiment-Kurven.
+
+Ersetzt die Hilfsspalten aus timeline_sentiment_metrics.ipynb
+(groupby-cumcount/transform + df.apply pro Zeile) durch einen
+vektorisierten Durchlauf über alle Spiele:
+
+    from spielverlauf import spielminuten, kurven
+    df = spielminuten(load_dataset("data/output_with_sentiment.csv"))
+    pro_minute = kurven(df, glaettung="mittel", fenster=5)
+    um_tore = kurven(df[df["letztes_tor"] == "bayern"], x="minuten_seit_tor", bereich=(0, 30))
+
+- Spielminute: Position des Satzes innerhalb seiner Phase (Mittelpunkt der
+  Bin) auf den Minutenbereich der Phase abgebildet (PHASE_BOUNDS)
+- Tor-Ereignisse: Zeilen, an denen sich der Spielstand gegenüber der
+  vorherigen Zeile desselben Spiels erhöht (Spielbeginn = 0:0). Jede Zeile
+  bekommt den Abstand in Minuten zum letzten und zum nächsten Tor sowie
+  dessen Team, damit Kurven auf Tore ausgerichtet werden können
+- Kurven: mittleres Sentiment je Minute × Kontextgruppe, optional pro
+  Gruppe (z.B. source_file), per bincount; Glättung konfigurierbar
+
+Alle Schritte arbeiten auf ganzen Arrays (Sortierung, bincount, kumulierte
+Maxima), ohne Python-Schleife über Spiele oder Zeilen.
+
+    python spielverlauf.py data/output_with_sentiment.csv --glaettung mittel+savgol
+"""
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.signal import savgol_filter
+
+from sentiment_data import KONTEXT_GRUPPEN, MODEL, TEAM, load_dataset
+
+# Minutenbereiche je Phase (anpassbar)
+PHASE_BOUNDS = {
+    0: (-5, 0),    # Vor dem Spiel -> Minute 0
+    1: (1, 45),    # 1. Halbzeit
+    2: (46, 90),   # 2. Halbzeit
+    3: (91, 95),   # Nach dem Spiel (zusammengefasst)
+}
+BEREICH = (-5, 95)
+FENSTER = 5
+POLYORDER = 2
+GLAETTUNGEN = ("keine", "mittel", "savgol", "mittel+savgol")
+
+# in Reihenfolge der kontext_group-Kategorien; "bayern" steht für den Bezugsverein
+KURVEN_SPALTEN = ["sentiment.bayern", "sentiment.gegner", "sentiment.neutral"]
+
+
+# ---------- Minuten & Tore ----------
+def _phasen_lookup(phase_bounds: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Unter- und Obergrenze je Phasennummer als Array; unbekannte Phasen → Minute 0."""
+    n = max(phase_bounds) + 2
+    lo, hi = np.zeros(n), np.zeros(n)
+    for phase, (a, b) in phase_bounds.items():
+        lo[phase], hi[phase] = a, b
+    return lo, hi
+
+
+def _vorher(ereignis: np.ndarray, spiel: np.ndarray) -> np.ndarray:
+    """Position des letzten Ereignisses bis einschließlich Zeile i im selben Spiel, sonst -1."""
+    pos = np.maximum.accumulate(np.where(ereignis, np.arange(len(ereignis)), -1))
+    gueltig = pos >= 0
+    gueltig[gueltig] = spiel[pos[gueltig]] == spiel[gueltig]
+    return np.where(gueltig, pos, -1)
+
+
+def spielminuten(df: pd.DataFrame, phase_bounds: dict = PHASE_BOUNDS) -> pd.DataFrame:
+    """
+    Sortiert nach source_file und index und ergänzt:
+
+        schaetzung.spielminute   geschätzte Minute (ganzzahlig)
+        tor.bayern, tor.gegner   Spielstand steigt in dieser Zeile
+        tor.nr                   Anzahl Tore bis einschließlich dieser Zeile
+        minuten_seit_tor         Minute − Minute des letzten Tors (NaN vor dem ersten Tor)
+        minuten_bis_tor          Minute des nächsten Tors − Minute (NaN nach dem letzten Tor)
+        letztes_tor, naechstes_tor   "bayern" / "gegner" / NaN
+    """
+    df = df.sort_values(["source_file", "index"], kind="stable").reset_index(drop=True)
+    spiel = df["source_file"].astype("category").cat.codes.to_numpy().astype(np.int64)
+    phase = df["klassifikation.phase"].fillna(-1).to_numpy().astype(np.int64)
+    n = len(df)
+
+    # Position innerhalb von (Spiel, Phase) wie groupby().cumcount(): stabil nach Gruppe sortieren,
+    # Abstand zum Anfang des jeweiligen Laufs
+    lo_tab, hi_tab = _phasen_lookup(phase_bounds)
+    phase_idx = np.where((phase >= 0) & (phase < len(lo_tab) - 1), phase, len(lo_tab) - 1)
+    gruppe = spiel * len(lo_tab) + phase_idx
+    order = np.argsort(gruppe, kind="stable")
+    g_sortiert = gruppe[order]
+    lauf_start = np.maximum.accumulate(np.where(np.r_[True, g_sortiert[1:] != g_sortiert[:-1]], np.arange(n), 0))
+    lauf_laenge = np.bincount(lauf_start, minlength=n)[lauf_start]
+    pos, anzahl = np.empty(n), np.empty(n)
+    pos[order] = np.arange(n) - lauf_start
+    anzahl[order] = lauf_laenge
+    frac = (pos + 0.5) / anzahl
+    lo, hi = lo_tab[phase_idx], hi_tab[phase_idx]
+    minute = np.round(lo + frac * (hi - lo)).astype(np.int64)
+
+    # Tor-Ereignisse: Stand gegenüber der Vorzeile im selben Spiel (erste Zeile gegen 0:0)
+    neues_spiel = np.r_[True, spiel[1:] != spiel[:-1]]
+    tore = {}
+    for team, spalte in [("bayern", "klassifikation.tore_bayern"), ("gegner", "klassifikation.tore_gegner")]:
+        stand = df[spalte].fillna(0).to_numpy().astype(np.int64)
+        vorher = np.where(neues_spiel, 0, np.r_[0, stand[:-1]])
+        tore[team] = stand > vorher
+    tor = tore["bayern"] | tore["gegner"]
+    team = np.where(tore["bayern"], "bayern", "gegner")
+
+    kumuliert = np.cumsum(tor)
+    spiel_start = np.maximum.accumulate(np.where(neues_spiel, np.arange(n), 0))
+    tor_nr = kumuliert - (kumuliert - tor)[spiel_start]
+
+    letztes = _vorher(tor, spiel)
+    naechstes = n - 1 - _vorher(tor[::-1], spiel[::-1])[::-1]
+    naechstes = np.where(naechstes == n, -1, naechstes)
+
+    return df.assign(**{
+        "schaetzung.spielminute": minute,
+        "tor.bayern": tore["bayern"],
+        "tor.gegner": tore["gegner"],
+        "tor.nr": tor_nr,
+        "minuten_seit_tor": np.where(letztes >= 0, minute - minute[letztes], np.nan),
+        "minuten_bis_tor": np.where(naechstes >= 0, minute[naechstes] - minute, np.nan),
+        "letztes_tor": pd.Categorical(np.where(letztes >= 0, team[letztes], None), categories=["bayern", "gegner"]),
+        "naechstes_tor": pd.Categorical(np.where(naechstes >= 0, team[naechstes], None),
+                                        categories=["bayern", "gegner"]),
+    })
+
+
+def tor_ereignisse(df: pd.DataFrame) -> pd.DataFrame:
+    """Eine Zeile pro Tor (aus spielminuten()): Spiel, Satz, Minute, Team und neuer Spielstand."""
+    d = df[df["tor.bayern"] | df["tor.gegner"]]
+    return pd.DataFrame({
+        "source_file": d["source_file"],
+        "index": d["index"],
+        "minute": d["schaetzung.spielminute"],
+        "team": np.where(d["tor.bayern"], "bayern", "gegner"),
+        "stand": d["klassifikation.tore_bayern"].astype(str) + ":" + d["klassifikation.tore_gegner"].astype(str),
+        "tor.nr": d["tor.nr"],
+    }).reset_index(drop=True)
+
+
+# ---------- Kurven ----------
+def _gleitendes_mittel(werte: np.ndarray, fenster: int) -> np.ndarray:
+    """Zentriertes Mittel entlang Achse -2, NaN werden ignoriert (wie rolling(center=True, min_periods=1))."""
+    links, rechts = fenster // 2, fenster - 1 - fenster // 2
+    ok = ~np.isnan(werte)
+    pad = [(0, 0)] * werte.ndim
+    pad[-2] = (links + 1, rechts)
+    summe = np.cumsum(np.pad(np.where(ok, werte, 0.0), pad), axis=-2)
+    anzahl = np.cumsum(np.pad(ok.astype(np.float64), pad), axis=-2)
+    m = werte.shape[-2]
+    s = np.take(summe, np.arange(fenster, fenster + m), axis=-2) - np.take(summe, np.arange(m), axis=-2)
+    c = np.take(anzahl, np.arange(fenster, fenster + m), axis=-2) - np.take(anzahl, np.arange(m), axis=-2)
+    with np.errstate(invalid="ignore"):
+        return np.where(c > 0, s / np.where(c > 0, c, 1), np.nan)
+
+
+def glaetten(werte: np.ndarray, glaettung: str = "mittel", fenster: int = FENSTER, polyorder: int = POLYORDER) -> np.ndarray:
+    """Glättung entlang der Minutenachse (-2) für (..., Minuten, Kontexte)."""
+    if glaettung in (None, "keine"):
+        return werte
+    if glaettung not in GLAETTUNGEN:
+        raise ValueError(f"Unbekannte Glättung '{glaettung}', erlaubt: {', '.join(GLAETTUNGEN)}")
+    if "mittel" in glaettung:
+        werte = _gleitendes_mittel(werte, fenster)
+    if "savgol" in glaettung and werte.shape[-2] >= fenster:
+        werte = _savgol(werte, fenster if fenster % 2 else fenster + 1, polyorder)
+    return werte
+
+
+def _savgol(werte: np.ndarray, fenster: int, polyorder: int) -> np.ndarray:
+    """Savitzky-Golay entlang Achse -2; Lücken werden dafür linear überbrückt und danach wieder NaN."""
+    luecke = np.isnan(werte)
+    if not luecke.any():
+        return savgol_filter(werte, fenster, polyorder, axis=-2, mode="interp")
+    # (..., Minuten, Kontexte) → Minuten × Reihen, interpolate arbeitet spaltenweise
+    form = werte.shape
+    reihen = np.moveaxis(werte, -2, 0).reshape(form[-2], -1)
+    gefuellt = pd.DataFrame(reihen).interpolate(limit_direction="both").fillna(0.0).to_numpy()
+    geglaettet = savgol_filter(gefuellt, fenster, polyorder, axis=0, mode="interp")
+    geglaettet = np.moveaxis(geglaettet.reshape(form[-2], *form[:-2], form[-1]), 0, -2)
+    return np.where(luecke, np.nan, geglaettet)
+
+
+def kurven(
+    df: pd.DataFrame,
+    x: str = "schaetzung.spielminute",
+    gruppe: str | None = None,
+    bereich: tuple[int, int] = BEREICH,
+    glaettung: str | None = "keine",
+    fenster: int = FENSTER,
+    polyorder: int = POLYORDER,
+    wert: str = "weighted_sentiment",
+) -> pd.DataFrame:
+    """
+    Mittleres `wert` je Minute (x, auf `bereich` begrenzt) und Kontextgruppe.
+    Ohne `gruppe`: Index minute, Spalten sentiment.bayern/.gegner/.neutral.
+    Mit `gruppe`: MultiIndex (gruppe, minute), jede Gruppe einzeln geglättet.
+    """
+    lo, hi = bereich
+    gruppen = df["kontext_group"].cat.categories if isinstance(df["kontext_group"].dtype, pd.CategoricalDtype) else KONTEXT_GRUPPEN
+    m, k = hi - lo + 1, len(gruppen)
+    werte = df[wert].to_numpy(dtype=np.float64)
+    minute = df[x].to_numpy(dtype=np.float64)
+    kontext = pd.Categorical(df["kontext_group"], categories=gruppen).codes.astype(np.int64)
+    if gruppe is None:
+        codes, namen = np.zeros(len(df), dtype=np.int64), None
+    else:
+        codes, namen = pd.factorize(df[gruppe], sort=True)
+    g = 1 if namen is None else len(namen)
+
+    ok = ~np.isnan(werte) & ~np.isnan(minute) & (kontext >= 0) & (codes >= 0)
+    zelle = (codes[ok] * m + np.clip(np.round(minute[ok]), lo, hi).astype(np.int64) - lo) * k + kontext[ok]
+    summe = np.bincount(zelle, weights=werte[ok], minlength=g * m * k).reshape(g, m, k)
+    anzahl = np.bincount(zelle, minlength=g * m * k).reshape(g, m, k)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mittel = np.where(anzahl > 0, summe / anzahl, np.nan)
+    mittel = glaetten(mittel, glaettung, fenster, polyorder)
+
+    spalten = pd.Index(KURVEN_SPALTEN, name="kontext_group")
+    minuten = pd.RangeIndex(lo, hi + 1, name="minute")
+    if namen is None:
+        return pd.DataFrame(mittel[0], index=minuten, columns=spalten)
+    index = pd.MultiIndex.from_product([namen, minuten], names=[gruppe, "minute"])
+    return pd.DataFrame(mittel.reshape(g * m, k), index=index, columns=spalten)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Spielminuten, Tor-Ereignisse und Sentiment-Kurven berechnen.")
+    parser.add_argument("csv", help="Kombinierte Sentiment-CSV")
+    parser.add_argument("--glaettung", default="mittel", choices=GLAETTUNGEN, help="Glättung der Kurven")
+    parser.add_argument("--fenster", type=int, default=FENSTER, help=f"Fenster in Minuten (Standard: {FENSTER})")
+    parser.add_argument("--model", default=MODEL, help=f"Modell für das Sentiment (Standard: {MODEL})")
+    parser.add_argument("--team", default=TEAM, help=f"Bezugsverein (Standard: {TEAM})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    df = load_dataset(args.csv, model=args.model, team=args.team)
+
+    start = time.perf_counter()
+    df = spielminuten(df)
+    t_minuten = time.perf_counter() - start
+    start = time.perf_counter()
+    pro_minute = kurven(df, glaettung=args.glaettung, fenster=args.fenster)
+    pro_spiel = kurven(df, gruppe="source_file", glaettung=args.glaettung, fenster=args.fenster)
+    t_kurven = time.perf_counter() - start
+
+    tore = tor_ereignisse(df)
+    print(f"Spielminuten für {len(df):,} Zeilen in {t_minuten * 1000:.1f} ms, "
+          f"Kurven (gesamt + {pro_spiel.index.get_level_values(0).nunique()} Spiele) in {t_kurven * 1000:.1f} ms")
+    print(f"{len(tore)} Tore ({(tore['team'] == 'bayern').sum()} Bayern, {(tore['team'] == 'gegner').sum()} Gegner), "
+          f"Minute im Mittel {tore['minute'].mean():.1f}")
+    print(pro_minute.iloc[::10].to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Benchmark-Suite: Laufzeit der Stufen auf synthetischen Korpora (korpus_generator.py)
+in mehreren Größen, Ergebnis als JSON, Abbruch bei Regressionen.
+
+Stufen je Skala:
+    merge_voll / merge_inkrementell   03_segmentation/merge_to_csv.py (eigener Prozess, --voll bzw. ohne Änderungen)
+    inferenz_vorbereitung             Target-Hints + Beinahe-Duplikat-Gruppen (csv_multi_model_infer.py)
+    inferenz                          predict_with_model mit einem winzigen lokalen BERT (zufällige Gewichte)
+    auswertung                        Laden + evaluate() wie auswertung_modelle.py
+    datensatz_laden / wuerfel / tabellen / spielverlauf
+                                      Notebook-Aggregationen (sentiment_data, sentiment_cube, spielverlauf)
+
+Stufen, deren Abhängigkeiten fehlen (torch/transformers), werden als
+"übersprungen" vermerkt statt den Lauf abzubrechen.
+
+    python benchmark.py                                   # Skalen 1, 10, 100
+    python benchmark.py --skalen 1 10 100 1000 --wiederholungen 1
+    python benchmark.py --vergleich benchmarks/20250101-120000.json --toleranz 0.2
+    python benchmark.py --nur merge_voll auswertung --toleranz_stufe merge_voll=0.5
+
+Mit --vergleich endet der Lauf mit Exit-Code 1, wenn eine Stufe langsamer als
+(1 + Toleranz) × Basis ist und dabei mindestens --mindestens Sekunden verliert.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+PROCESS_DIR = Path(__file__).resolve().parent
+for _stufe in ("06_automatic_sentiment", "08_confusionmatrix", "09_explorative_analysis"):
+    sys.path.append(str(PROCESS_DIR / _stufe))
+
+from korpus_generator import KORPUS_CSV, MANUAL_COL, SEED, korpus  # noqa: E402
+from sentiment_data import load_dataset  # noqa: E402
+from sentiment_cube import TABELLEN, SentimentCube, build_cube  # noqa: E402
+from spielverlauf import GLAETTUNGEN, kurven, spielminuten  # noqa: E402
+from evaluation import N_BOOT, evaluate  # noqa: E402
+
+BENCH_DIR = Path("benchmarks")
+SKALEN = [1, 10, 100]
+WIEDERHOLUNGEN = 3
+TOLERANZ = 0.25             # relative Verlangsamung, ab der eine Stufe als Regression gilt
+MINDESTENS_S = 0.05         # kleinere absolute Unterschiede sind Rauschen
+INFERENZ_MAX_ZEILEN = 5_000  # Inferenz auf CPU nur für eine Stichprobe, gemessen wird Zeilen/s
+
+MODEL_COLS = [
+    "sentiment__fine_tuned_german_sentiment",
+    "sentiment__xlm-roberta-base",
+    "sentiment__german-sentiment-bert",
+    "sentiment__german-news-sentiment-bert",
+]
+
+
+class Uebersprungen(Exception):
+    """Stufe kann in dieser Umgebung nicht laufen (z.B. fehlendes Paket)."""
+
+
+def _infer_modul():
+    try:
+        import csv_multi_model_infer
+    except ImportError as e:
+        raise Uebersprungen(f"{e.name or e} nicht installiert")
+    return csv_multi_model_infer
+
+
+# ---------- Stufen: (kontext) → Anzahl verarbeiteter Zeilen ----------
+def merge(kontext: dict, voll: bool) -> int:
+    befehl = [sys.executable, str(PROCESS_DIR / "03_segmentation" / "merge_to_csv.py")]
+    if voll:
+        befehl.append("--voll")
+    subprocess.run(befehl, cwd=kontext["ordner"], check=True, stdout=subprocess.DEVNULL,
+                   env={**os.environ, "TRACE": "0"})
+    return kontext["zeilen"]
+
+
+def inferenz_vorbereitung(kontext: dict) -> int:
+    infer = _infer_modul()
+    df = pd.read_csv(kontext["csv"], usecols=["text", "kontext", "meta.gegner"])
+    prepped = infer.prepare_texts(df)
+    reps, _ = infer.inference_groups(prepped, infer.DEDUP_THRESHOLD)
+    kontext["inferenz_texte"] = [prepped[i] for i in reps]
+    return len(prepped)
+
+
+def kleines_modell(ordner: Path, texte: list[str]) -> Path:
+    """Winziges BERT mit Wortschatz aus dem Korpus; zufällige Gewichte reichen für die Laufzeit."""
+    try:
+        import torch
+        from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+    except ImportError as e:
+        raise Uebersprungen(f"{e.name or e} nicht installiert")
+
+    ziel = ordner / ".kleines_modell"
+    if (ziel / "config.json").is_file():
+        return ziel
+    ziel.mkdir(parents=True, exist_ok=True)
+    woerter = pd.Series(" ".join(texte[:50_000]).lower().split()).value_counts().index[:8_000]
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *dict.fromkeys(list("[]=") + list(woerter))]
+    (ziel / "vocab.txt").write_text("\n".join(vocab) + "\n", "utf-8")
+    tok = BertTokenizer(str(ziel / "vocab.txt"))
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=128, num_labels=3,
+        id2label={0: "negative", 1: "neutral", 2: "positive"},
+        label2id={"negative": 0, "neutral": 1, "positive": 2},
+    )
+    torch.manual_seed(SEED)
+    BertForSequenceClassification(config).save_pretrained(ziel)
+    tok.save_pretrained(ziel)
+    return ziel
+
+
+def inferenz(kontext: dict) -> int:
+    infer = _infer_modul()
+    texte = kontext["inferenz_texte"][:INFERENZ_MAX_ZEILEN]
+    modell = kleines_modell(Path(kontext["ordner"]), texte)
+    infer.predict_with_model(texte, str(modell))
+    return len(texte)
+
+
+def auswertung(kontext: dict) -> int:
+    df = load_dataset(kontext["csv"], columns=[MANUAL_COL] + MODEL_COLS, derived=False, cache=False, verbose=False)
+    df = df[df[MANUAL_COL].notna()]
+    evaluate(df, MANUAL_COL, [c for c in MODEL_COLS if c in df.columns], n_boot=N_BOOT)
+    return len(df)
+
+
+def datensatz_laden(kontext: dict) -> int:
+    kontext["df"] = load_dataset(kontext["csv"], cache=False, verbose=False)
+    return len(kontext["df"])
+
+
+def wuerfel(kontext: dict) -> int:
+    kontext["cube"] = SentimentCube(*build_cube(kontext["df"]))
+    return len(kontext["df"])
+
+
+def tabellen(kontext: dict) -> int:
+    for _, methode, _ in TABELLEN:
+        getattr(kontext["cube"], methode)()
+    return len(kontext["df"])
+
+
+def spielverlauf(kontext: dict) -> int:
+    df = spielminuten(kontext["df"])
+    for glaettung in GLAETTUNGEN:
+        kurven(df, glaettung=glaettung)
+    kurven(df, x="minuten_seit_tor")
+    return len(df)
+
+
+STUFEN = {
+    "merge_voll": lambda k: merge(k, voll=True),
+    "merge_inkrementell": lambda k: merge(k, voll=False),
+    "inferenz_vorbereitung": inferenz_vorbereitung,
+    "inferenz": inferenz,
+    "auswertung": auswertung,
+    "datensatz_laden": datensatz_laden,
+    "wuerfel": wuerfel,
+    "tabellen": tabellen,
+    "spielverlauf": spielverlauf,
+}
+
+# Stufen, deren Ergebnis eine andere Stufe braucht; laufen bei Bedarf einmal ungemessen vorher
+VORAUSSETZUNGEN = {
+    "inferenz": ["inferenz_vorbereitung"],
+    "wuerfel": ["datensatz_laden"],
+    "tabellen": ["datensatz_laden", "wuerfel"],
+    "spielverlauf": ["datensatz_laden"],
+}
+
+
+# ---------- Lauf ----------
+def messen(funktion, kontext: dict, wiederholungen: int) -> dict:
+    dauern, zeilen = [], 0
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        zeilen = funktion(kontext)
+        dauern.append(time.perf_counter() - start)
+    median = statistics.median(dauern)
+    return {
+        "s": round(median, 4),
+        "min_s": round(min(dauern), 4),
+        "laeufe_s": [round(d, 4) for d in dauern],
+        "zeilen": zeilen,
+        "zeilen_pro_s": round(zeilen / median, 1) if median else None,
+    }
+
+
+def lauf(skalen: list[float], stufen: list[str], wiederholungen: int, korpus_dir: Path, seed: int) -> dict:
+    ergebnis = {
+        "zeit": datetime.now().isoformat(timespec="seconds"),
+        "rechner": {
+            "python": platform.python_version(),
+            "plattform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "einstellungen": {"wiederholungen": wiederholungen, "seed": seed, "inferenz_max_zeilen": INFERENZ_MAX_ZEILEN},
+        "skalen": {},
+    }
+    for faktor in skalen:
+        ordner = korpus_dir / f"x{faktor:g}"
+        info = korpus(ordner, faktor, seed)
+        kontext = {"ordner": ordner, "csv": ordner / KORPUS_CSV, "zeilen": info["zeilen"]}
+        werte = {"spiele": info["spiele"], "zeilen": info["zeilen"], "stufen": {}}
+        erledigt = set()
+        for name in stufen:
+            try:
+                for vorher in VORAUSSETZUNGEN.get(name, []):
+                    if vorher not in erledigt:
+                        STUFEN[vorher](kontext)
+                        erledigt.add(vorher)
+                werte["stufen"][name] = messen(STUFEN[name], kontext, wiederholungen)
+                erledigt.add(name)
+                m = werte["stufen"][name]
+                print(f"  ×{faktor:<6g} {name:<24} {m['s']:9.3f}s  ({m['zeilen_pro_s'] or 0:,.0f} Zeilen/s)")
+            except Uebersprungen as e:
+                werte["stufen"][name] = {"uebersprungen": str(e)}
+                print(f"  ×{faktor:<6g} {name:<24} übersprungen: {e}")
+        ergebnis["skalen"][f"{faktor:g}"] = werte
+    return ergebnis
+
+
+# ---------- Vergleich ----------
+def regressionen(basis: dict, neu: dict, toleranz: float, pro_stufe: dict[str, float], mindestens: float) -> list[str]:
+    """Zeilen für den Vergleich ausgeben, Regressionen als Liste zurückgeben."""
+    gefunden = []
+    print(f"\nVergleich mit Basis vom {basis.get('zeit', '?')}:")
+    for skala, werte in neu["skalen"].items():
+        for name, m in werte["stufen"].items():
+            b = basis.get("skalen", {}).get(skala, {}).get("stufen", {}).get(name, {})
+            if "s" not in m or "s" not in b:
+                continue
+            grenze = pro_stufe.get(name, toleranz)
+            delta = m["s"] / b["s"] - 1 if b["s"] else 0.0
+            regression = delta > grenze and m["s"] - b["s"] >= mindestens
+            marke = "REGRESSION" if regression else ""
+            print(f"  ×{skala:<6} {name:<24} {b['s']:9.3f}s → {m['s']:9.3f}s  {delta:+7.1%}  (Grenze {grenze:+.0%}) {marke}")
+            if regression:
+                gefunden.append(f"×{skala} {name}: {b['s']:.3f}s → {m['s']:.3f}s ({delta:+.1%})")
+    return gefunden
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stufen auf synthetischen Korpora verschiedener Größe messen.")
+    parser.add_argument("--skalen", type=float, nargs="+", default=SKALEN,
+                        help=f"Vielfache der echten Spielanzahl (Standard: {' '.join(map(str, SKALEN))})")
+    parser.add_argument("--nur", nargs="+", choices=list(STUFEN), help="Nur diese Stufen messen")
+    parser.add_argument("--wiederholungen", type=int, default=WIEDERHOLUNGEN,
+                        help=f"Läufe pro Stufe, gewertet wird der Median (Standard: {WIEDERHOLUNGEN})")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--korpus_dir", default=str(BENCH_DIR / "korpus"), help="Ablage der erzeugten Korpora")
+    parser.add_argument("--out", help=f"Ergebnis-JSON (Standard: {BENCH_DIR}/<zeit>.json)")
+    parser.add_argument("--vergleich", help="Basis-JSON eines früheren Laufs")
+    parser.add_argument("--toleranz", type=float, default=TOLERANZ,
+                        help=f"Erlaubte relative Verlangsamung (Standard: {TOLERANZ})")
+    parser.add_argument("--toleranz_stufe", nargs="*", default=[], metavar="STUFE=WERT",
+                        help="Abweichende Toleranz pro Stufe, z.B. merge_voll=0.5")
+    parser.add_argument("--mindestens", type=float, default=MINDESTENS_S,
+                        help=f"Mindestverlust in Sekunden für eine Regression (Standard: {MINDESTENS_S})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    pro_stufe = {}
+    for eintrag in args.toleranz_stufe:
+        name, _, wert = eintrag.partition("=")
+        if name not in STUFEN or not wert:
+            raise SystemExit(f"Ungültige Toleranz '{eintrag}' (erwartet STUFE=WERT, Stufen: {', '.join(STUFEN)})")
+        pro_stufe[name] = float(wert)
+
+    stufen = args.nur or list(STUFEN)
+    ergebnis = lauf(args.skalen, stufen, args.wiederholungen, Path(args.korpus_dir), args.seed)
+
+    out = Path(args.out) if args.out else BENCH_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(ergebnis, ensure_ascii=False, indent=1), "utf-8")
+    print(f"\nErgebnis: {out}")
+
+    if args.vergleich:
+        basis = json.loads(Path(args.vergleich).read_text("utf-8"))
+        gefunden = regressionen(basis, ergebnis, args.toleranz, pro_stufe, args.mindestens)
+        if gefunden:
+            print(f"\n{len(gefunden)} Regression(en):")
+            for zeile in gefunden:
+                print(f"  {zeile}")
+            sys.exit(1)
+        print("\nKeine Regressionen.")
+
+
+if __name__ == "__main__":
+    main()
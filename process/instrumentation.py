@@ -0,0 +1,362 @@
+"""
+Leichtgewichtige Messung für alle Stufen-Skripte: Spans, Zähler, Histogramme.
+
+In einem Skript:
+
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    import instrumentation as instr  # noqa: E402
+
+    instr.start("klassifikation")             # Trace wird beim Beenden geschrieben
+    with instr.span("datei", datei=path.name):
+        resp = instr.chat_completion(client, model="gpt-4o", messages=...)
+    instr.count("klassifikation.wiederholungen")
+    instr.observe("transkripte.latenz_s", dauer)
+    instr.gauge("inferenz.zeilen_pro_s", n / dauer)
+
+- Spans messen Wandzeit (pro Stufe, pro Datei/Video/Modell), verschachtelt
+  und threadsicher
+- chat_completion() erfasst Latenz, Fehler, Prompt-/Completion-Tokens und
+  geschätzte Kosten pro Modell
+- am Ende kommen Spitzen-Speicher (RSS, ggf. CUDA) und Gesamtdauer dazu
+
+Ein Lauf schreibt genau eine JSON-Datei nach traces/ (TRACE_DIR). Läuft das
+Skript unter pipeline.py, schreibt jeder Prozess in den Lauf-Ordner und der
+Runner fasst am Ende alles zu traces/<lauf>.json zusammen. TRACE=0 schaltet
+das Schreiben ab.
+
+Zwei Läufe vergleichen:
+
+    python instrumentation.py report traces/20250101-120000.json traces/20250102-090000.json
+    python instrumentation.py report traces/20250102-090000.json            # ein Lauf
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+
+TRACE_DIR = "traces"
+MAX_SPANS = 50_000      # Einzel-Spans im Trace; Zusammenfassungen sind immer vollständig
+
+# USD pro 1 Mio. Tokens (Prompt, Completion), Stand der OpenAI-Preisliste
+PREISE = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+
+def _quantil(werte: list[float], q: float) -> float:
+    if not werte:
+        return 0.0
+    s = sorted(werte)
+    pos = (len(s) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (pos - lo)
+
+
+def zusammenfassung(werte: list[float]) -> dict:
+    return {
+        "n": len(werte),
+        "summe": sum(werte),
+        "mittel": sum(werte) / len(werte) if werte else 0.0,
+        "p50": _quantil(werte, 0.5),
+        "p95": _quantil(werte, 0.95),
+        "max": max(werte) if werte else 0.0,
+    }
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: Byte
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def peak_cuda_mb() -> float | None:
+    torch = sys.modules.get("torch")  # nur wenn das Skript torch ohnehin geladen hat
+    if torch is None or not torch.cuda.is_available():
+        return None
+    return torch.cuda.max_memory_allocated() / (1024 * 1024)
+
+
+class Tracer:
+    def __init__(self, name: str = "", lauf: str | None = None):
+        self.name = name
+        self.lauf = lauf or os.getenv("TRACE_RUN") or datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.beginn = datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._lokal = threading.local()
+        self.spans: list[dict] = []
+        self.dauern: dict[str, list[float]] = {}
+        self.zaehler: dict[str, float] = {}
+        self.histogramme: dict[str, list[float]] = {}
+        self.messwerte: dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        stack = self._lokal.__dict__.setdefault("stack", [])
+        pfad = "/".join([*stack, name])
+        stack.append(name)
+        start = time.perf_counter()
+        fehler = None
+        try:
+            yield
+        except BaseException as e:
+            fehler = type(e).__name__
+            raise
+        finally:
+            dauer = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.dauern.setdefault(pfad, []).append(dauer)
+                if len(self.spans) < MAX_SPANS:
+                    eintrag = {"name": pfad, "start_s": round(start - self._t0, 4), "dauer_s": round(dauer, 4)}
+                    if attrs:
+                        eintrag["attrs"] = attrs
+                    if fehler:
+                        eintrag["fehler"] = fehler
+                    self.spans.append(eintrag)
+
+    def count(self, name: str, n: float = 1):
+        with self._lock:
+            self.zaehler[name] = self.zaehler.get(name, 0) + n
+
+    def observe(self, name: str, wert: float):
+        with self._lock:
+            self.histogramme.setdefault(name, []).append(float(wert))
+
+    def gauge(self, name: str, wert: float):
+        with self._lock:
+            self.messwerte[name] = float(wert)
+
+    def to_dict(self) -> dict:
+        messwerte = dict(self.messwerte)
+        for name, wert in [("peak_rss_mb", peak_rss_mb()), ("peak_cuda_mb", peak_cuda_mb())]:
+            if wert is not None:
+                messwerte[name] = round(wert, 1)
+        with self._lock:
+            return {
+                "name": self.name,
+                "lauf": self.lauf,
+                "pid": os.getpid(),
+                "beginn": self.beginn,
+                "dauer_s": round(time.perf_counter() - self._t0, 3),
+                "span_summen": {k: zusammenfassung(v) for k, v in self.dauern.items()},
+                "zaehler": dict(self.zaehler),
+                "histogramme": {k: zusammenfassung(v) for k, v in self.histogramme.items()},
+                "messwerte": messwerte,
+                "spans": list(self.spans),
+            }
+
+    def write(self, ordner: str | Path | None = None) -> Path:
+        """Im Pipeline-Lauf: <TRACE_DIR>/<name>-<pid>.json, sonst <TRACE_DIR>/<lauf>-<name>.json."""
+        ordner = Path(ordner or os.getenv("TRACE_DIR") or TRACE_DIR)
+        ordner.mkdir(parents=True, exist_ok=True)
+        datei = f"{self.name}-{os.getpid()}.json" if os.getenv("TRACE_RUN") else f"{self.lauf}-{self.name}.json"
+        pfad = ordner / datei
+        pfad.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=1), "utf-8")
+        return pfad
+
+
+# ---------- Modulweite Instanz für die Skripte ----------
+_tracer = Tracer()
+
+
+def start(name: str) -> Tracer:
+    """Benennt den Trace des Prozesses und schreibt ihn beim Beenden (auch nach Fehlern)."""
+    global _tracer
+    _tracer = Tracer(name)
+    if os.getenv("TRACE", "1") != "0":
+        atexit.register(_schreiben, _tracer)
+    return _tracer
+
+
+def _schreiben(tracer: Tracer):
+    try:
+        pfad = tracer.write()
+        print(f"Trace: {pfad}")
+    except OSError as e:
+        print(f"Trace konnte nicht geschrieben werden: {e}")
+
+
+def span(name: str, **attrs):
+    return _tracer.span(name, **attrs)
+
+
+def count(name: str, n: float = 1):
+    _tracer.count(name, n)
+
+
+def observe(name: str, wert: float):
+    _tracer.observe(name, wert)
+
+
+def gauge(name: str, wert: float):
+    _tracer.gauge(name, wert)
+
+
+def chat_completion(client, **kwargs):
+    """client.chat.completions.create() mit Latenz, Tokens und Kosten (Präfix: openai.<modell>)."""
+    modell = kwargs.get("model", "unbekannt")
+    praefix = f"openai.{modell}"
+    start_t = time.perf_counter()
+    try:
+        resp = client.chat.completions.create(**kwargs)
+    except Exception:
+        count(f"{praefix}.fehler")
+        raise
+    observe(f"{praefix}.latenz_s", time.perf_counter() - start_t)
+    count(f"{praefix}.anfragen")
+
+    usage = getattr(resp, "usage", None)
+    if usage is not None:
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        count(f"{praefix}.prompt_tokens", prompt)
+        count(f"{praefix}.completion_tokens", completion)
+        if modell in PREISE:
+            p_in, p_out = PREISE[modell]
+            count(f"{praefix}.kosten_usd", (prompt * p_in + completion * p_out) / 1e6)
+    return resp
+
+
+# ---------- Zusammenführen (pipeline.py) ----------
+def merge_run(ordner: Path, ziel: Path, extra: dict | None = None) -> Path:
+    """Fasst alle Prozess-Traces eines Laufs zu einer Datei zusammen und entfernt die Einzeldateien."""
+    teile = sorted(ordner.glob("*.json"))
+    prozesse = [json.loads(p.read_text("utf-8")) for p in teile]
+    daten = dict(extra or {})
+    daten["prozesse"] = prozesse
+    ziel.write_text(json.dumps(daten, ensure_ascii=False, indent=1), "utf-8")
+    for p in teile:
+        p.unlink()
+    if not any(ordner.iterdir()):
+        ordner.rmdir()
+    return ziel
+
+
+# ---------- Report ----------
+def load_trace(pfad: str | Path) -> dict:
+    """
+    Flache Kennzahlen eines Laufs: Einzel-Trace oder zusammengeführter
+    Pipeline-Trace. Spans/Histogramme gleichen Namens aus mehreren Prozessen
+    (z.B. eine Klassifikation pro Spiel) werden addiert.
+    """
+    daten = json.loads(Path(pfad).read_text("utf-8"))
+    traces = [daten, *daten.get("prozesse", [])]
+
+    kennzahlen = {"spans": {}, "zaehler": {}, "histogramme": {}, "messwerte": {}}
+    for t in traces:
+        name = t.get("name") or "lauf"
+        for k, s in t.get("span_summen", {}).items():
+            alt = kennzahlen["spans"].get(f"{name}/{k}")
+            kennzahlen["spans"][f"{name}/{k}"] = _addieren(alt, s)
+        for k, v in t.get("zaehler", {}).items():
+            kennzahlen["zaehler"][k] = kennzahlen["zaehler"].get(k, 0) + v
+        for k, s in t.get("histogramme", {}).items():
+            kennzahlen["histogramme"][k] = _addieren(kennzahlen["histogramme"].get(k), s)
+        for k, v in t.get("messwerte", {}).items():
+            schluessel = f"{name}/{k}"
+            # Spitzenwerte: Maximum über Prozesse derselben Stufe
+            kennzahlen["messwerte"][schluessel] = max(v, kennzahlen["messwerte"].get(schluessel, v))
+        if "dauer_s" in t:
+            kennzahlen["spans"][name] = _addieren(kennzahlen["spans"].get(name), zusammenfassung([t["dauer_s"]]))
+    return kennzahlen
+
+
+def _addieren(a: dict | None, b: dict) -> dict:
+    """Zwei Zusammenfassungen kombinieren (Quantile: Maximum als konservative Schätzung)."""
+    if a is None:
+        return dict(b)
+    n = a["n"] + b["n"]
+    summe = a["summe"] + b["summe"]
+    return {
+        "n": n,
+        "summe": summe,
+        "mittel": summe / n if n else 0.0,
+        "p50": max(a["p50"], b["p50"]),
+        "p95": max(a["p95"], b["p95"]),
+        "max": max(a["max"], b["max"]),
+    }
+
+
+def _delta(a: float | None, b: float | None) -> str:
+    if a is None or b is None:
+        return ""
+    if a == 0:
+        return "" if b == 0 else "neu"
+    return f"{(b - a) / a:+.0%}"
+
+
+def _zahl(x: float | None) -> str:
+    if x is None:
+        return "-"
+    if x == int(x):
+        return f"{x:,.0f}"
+    return f"{x:.3f}" if abs(x) < 10 else f"{x:,.1f}"
+
+
+def report(pfad_a: str | Path, pfad_b: str | Path | None = None):
+    a = load_trace(pfad_a)
+    b = load_trace(pfad_b) if pfad_b else None
+
+    def tabelle(titel: str, zeilen: list[tuple[str, float | None, float | None, str]]):
+        if not zeilen:
+            return
+        print(f"\n{titel}")
+        breite = max(len(z[0]) for z in zeilen)
+        for name, wa, wb, extra in zeilen:
+            if b is None:
+                print(f"  {name:<{breite}}  {_zahl(wa):>12}  {extra}")
+            else:
+                print(f"  {name:<{breite}}  {_zahl(wa):>12}  {_zahl(wb):>12}  {_delta(wa, wb):>6}  {extra}")
+
+    print(f"A: {pfad_a}")
+    if b is not None:
+        print(f"B: {pfad_b}")
+
+    def gruppe(teil: str, wert: str | None = None):
+        zeilen = []
+        for n in sorted(set(a[teil]) | set(b[teil] if b else ())):
+            sa, sb = a[teil].get(n), (b[teil].get(n) if b else None)
+            if wert is None:
+                zeilen.append((n, sa, sb, ""))
+                continue
+            anzahl = [str(s["n"]) if s else "-" for s in ([sa, sb] if b else [sa])]
+            zeilen.append((n, sa and sa[wert], sb and sb[wert], f"n={'/'.join(anzahl)}"))
+        return zeilen
+
+    tabelle("Wandzeit (Summe, s)", gruppe("spans", "summe"))
+    tabelle("Histogramme (p95)", gruppe("histogramme", "p95"))
+    tabelle("Zähler", gruppe("zaehler"))
+    tabelle("Messwerte", gruppe("messwerte"))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Traces der Pipeline auswerten.")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+    p = sub.add_parser("report", help="Kennzahlen eines Laufs bzw. Vergleich zweier Läufe")
+    p.add_argument("trace_a", help="Trace-JSON (Basis)")
+    p.add_argument("trace_b", nargs="?", help="Trace-JSON zum Vergleich")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.befehl == "report":
+        report(args.trace_a, args.trace_b)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Synthetischer Korpus im Schema von dataset/einzelspiele für Skalierungstests.
+
+Die Verteilungen werden aus den echten Daten geschätzt (profil()):
+- Segmente pro Spiel, Wörter pro Segment, Wortschatz mit Häufigkeiten und
+  Anteil exakt wiederholter Sätze (Floskeln)
+- Kontext: Bayern / Gegner / Neutral / sonstige Vereine
+- Phasen als Anteil der Segmente pro Phase (Grenzen aus echten Spielen)
+- Spiel-Metadaten (Gegner, Ergebnis, Kommentator, ...) als ganze Datensätze
+- Labels und Konfidenzen jedes Modells je Kontext, manuelle Labels je
+  Modell-Label (aus kommentare_annotiert.csv)
+
+Ausgabe in <ziel>/:
+
+    mit_zuordnung/*.json            Spiel-JSONs (Eingabe von merge_to_csv.py)
+    alle_saetze_mit_sentiment.csv   zusammengeführte Tabelle inkl. Modellspalten und sentiment__manual
+    korpus.json                     Schlüssel und Umfang (für Wiederverwendung)
+
+    python korpus_generator.py --faktor 10 --ziel benchmarks/korpus/x10
+"""
+
+import re
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+PROCESS_DIR = Path(__file__).resolve().parent
+EINZELSPIELE = PROCESS_DIR.parent / "dataset" / "einzelspiele"
+KOMBINIERT = PROCESS_DIR.parent / "dataset" / "combined_data_with_sentiment.csv"
+ANNOTIERT = PROCESS_DIR / "08_confusionmatrix" / "kommentare_annotiert.csv"
+
+GENERATOR_VERSION = 1
+SEED = 42
+BAYERN = "FC Bayern München"
+KONTEXT_TYPEN = ["bayern", "gegner", "neutral", "andere"]
+MANUAL_COL = "sentiment__manual"
+MANUELL_WERTE = ["p", "o", "n"]
+KORPUS_CSV = "alle_saetze_mit_sentiment.csv"
+SPIELE_ORDNER = "mit_zuordnung"
+
+
+def _kontext_typ(kontext: pd.Series, gegner: pd.Series) -> np.ndarray:
+    typ = np.full(len(kontext), 3, dtype="int8")
+    typ[(kontext == gegner).to_numpy()] = 1
+    typ[(kontext == "Neutral").to_numpy()] = 2
+    typ[(kontext == BAYERN).to_numpy()] = 0
+    return typ
+
+
+def _anteile(werte: pd.Series) -> dict[str, float]:
+    return {str(k): float(v) for k, v in werte.value_counts(normalize=True).sort_index().items()}
+
+
+def profil(einzelspiele: Path = EINZELSPIELE, kombiniert: Path = KOMBINIERT, annotiert: Path = ANNOTIERT) -> dict:
+    """Verteilungen der echten Daten als JSON-fähiges dict."""
+    spiele, phasen_grenzen, segmente = [], [], []
+    for pfad in sorted(Path(einzelspiele).glob("*.json")):
+        with pfad.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        transkript = (data.get("content") or {}).get("transkript", [])
+        if not transkript:
+            continue
+        spiele.append({k: data.get(k) or {} for k in ("meta", "ergebnis", "offizielle")})
+        segmente.append(len(transkript))
+        phase = np.array([(s.get("klassifikation") or {}).get("phase", 0) for s in transkript])
+        phasen_grenzen.append([float((phase < p).mean()) for p in (1, 2, 3)])
+
+    df = pd.read_csv(kombiniert)
+    texte = df["text"].astype(str)
+    woerter = texte.str.split()
+    wortschatz = Counter(w for ws in woerter for w in ws)
+    vokabular, haeufigkeit = zip(*wortschatz.most_common())
+
+    typ = _kontext_typ(df["kontext"], df["meta.gegner"])
+    andere = df.loc[typ == 3, "kontext"].value_counts()
+
+    modelle = [c for c in df.columns if c.startswith("sentiment__") and not c.endswith("__conf") and c != MANUAL_COL]
+    labels, konfidenz = {}, {}
+    for col in modelle:
+        labels[col] = {
+            KONTEXT_TYPEN[t]: _anteile(df.loc[typ == t, col].dropna()) for t in range(len(KONTEXT_TYPEN))
+        }
+        if f"{col}__conf" in df.columns:
+            konfidenz[col] = {
+                str(label): np.quantile(gruppe.dropna(), np.linspace(0, 1, 101)).round(4).tolist()
+                for label, gruppe in df.groupby(col)[f"{col}__conf"]
+            }
+
+    manuell = {"anteil": 0.0, "gegeben": {}}
+    if Path(annotiert).is_file():
+        a = pd.read_csv(annotiert)
+        if MANUAL_COL in a.columns and modelle and modelle[0] in a.columns:
+            m = a[a[MANUAL_COL].isin(MANUELL_WERTE)]
+            manuell["anteil"] = len(m) / len(a)
+            manuell["gegeben"] = {str(k): _anteile(g[MANUAL_COL]) for k, g in m.groupby(modelle[0])}
+
+    return {
+        "version": GENERATOR_VERSION,
+        "spiele": spiele,
+        "segmente_pro_spiel": segmente,
+        "phasen_grenzen": phasen_grenzen,
+        "woerter_pro_segment": np.bincount(woerter.str.len()).tolist(),
+        "vokabular": list(vokabular),
+        "wort_haeufigkeit": list(haeufigkeit),
+        "duplikat_anteil": float(texte.duplicated().mean()),
+        "kontext_anteile": np.bincount(typ, minlength=len(KONTEXT_TYPEN)).tolist(),
+        "andere_kontexte": {str(k): int(v) for k, v in andere.items()},
+        "modelle": modelle,
+        "labels": labels,
+        "konfidenz": konfidenz,
+        "manuell": manuell,
+    }
+
+
+def _verteilung(gewichte) -> np.ndarray:
+    p = np.asarray(gewichte, dtype="float64")
+    return p / p.sum()
+
+
+def _labels(rng, anteile: dict[str, float], n: int) -> np.ndarray:
+    """n Werte gemäß {wert: gewicht} ziehen."""
+    werte = np.array(list(anteile), dtype=object)
+    return werte[rng.choice(len(werte), size=n, p=_verteilung(list(anteile.values())))]
+
+
+def _dateiname(spiel: dict, nr: int) -> str:
+    saison = str(spiel["meta"].get("saison", "")).replace("/", "-")
+    gegner = re.sub(r"\s+", "_", str(spiel["meta"].get("gegner", "")).strip().lower())
+    return f"{saison}_S{spiel['meta'].get('spieltag', 0)}_{gegner}_{nr:06d}.json"
+
+
+def generieren(p: dict, faktor: float, seed: int = SEED) -> tuple[list[dict], pd.DataFrame]:
+    """(Spiele, zusammengeführte Tabelle) für faktor × so viele Spiele wie im Profil."""
+    rng = np.random.default_rng([seed, int(faktor * 1000)])
+    n_spiele = max(1, round(len(p["spiele"]) * faktor))
+
+    # ---------- pro Spiel ----------
+    vorlage = rng.integers(len(p["spiele"]), size=n_spiele)
+    n_seg = np.asarray(p["segmente_pro_spiel"])[rng.integers(len(p["segmente_pro_spiel"]), size=n_spiele)]
+    grenzen = np.asarray(p["phasen_grenzen"])[rng.integers(len(p["phasen_grenzen"]), size=n_spiele)]
+    spiele = [p["spiele"][i] for i in vorlage]
+    tore = np.array([[s["ergebnis"].get("bayern", 0) or 0, s["ergebnis"].get("gegner", 0) or 0] for s in spiele])
+    gegner = np.array([str(s["meta"].get("gegner", "")) for s in spiele], dtype=object)
+
+    # Tore gleichverteilt zwischen Anpfiff (Ende Phase 0) und Abpfiff (Ende Phase 2)
+    max_tore = max(int(tore.max()), 1)
+    lage = grenzen[:, [0]] + rng.random((n_spiele, 2, max_tore)).transpose(1, 0, 2) * (grenzen[:, [2]] - grenzen[:, [0]])
+    lage[np.arange(max_tore)[None, None, :] >= tore.T[:, :, None]] = np.inf
+
+    # ---------- pro Segment ----------
+    n = int(n_seg.sum())
+    spiel = np.repeat(np.arange(n_spiele), n_seg)
+    start = np.cumsum(n_seg) - n_seg
+    index = np.arange(n) - start[spiel]
+    rel = (index + 0.5) / n_seg[spiel]
+    phase = (rel[:, None] >= grenzen[spiel]).sum(axis=1)
+    tore_bayern = (lage[0][spiel] < rel[:, None]).sum(axis=1)
+    tore_gegner = (lage[1][spiel] < rel[:, None]).sum(axis=1)
+
+    typ = rng.choice(len(KONTEXT_TYPEN), size=n, p=_verteilung(p["kontext_anteile"]))
+    kontext = np.full(n, "Neutral", dtype=object)
+    kontext[typ == 0] = BAYERN
+    kontext[typ == 1] = gegner[spiel[typ == 1]]
+    if p["andere_kontexte"]:
+        kontext[typ == 3] = _labels(rng, p["andere_kontexte"], int((typ == 3).sum()))
+
+    # Texte: Länge und Wörter aus den empirischen Verteilungen, dazu wiederholte Floskeln
+    laengen = rng.choice(len(p["woerter_pro_segment"]), size=n, p=_verteilung(p["woerter_pro_segment"]))
+    laengen = np.maximum(laengen, 1)
+    vokabular = np.asarray(p["vokabular"], dtype=object)
+    woerter = vokabular[rng.choice(len(vokabular), size=int(laengen.sum()), p=_verteilung(p["wort_haeufigkeit"]))]
+    grenzen_w = np.cumsum(laengen)
+    texte = np.array([" ".join(woerter[e - l:e]) for e, l in zip(grenzen_w.tolist(), laengen.tolist())], dtype=object)
+    wiederholt = np.flatnonzero(rng.random(n) < p["duplikat_anteil"])
+    wiederholt = wiederholt[wiederholt > 0]
+    texte[wiederholt] = texte[rng.integers(0, wiederholt)]
+
+    def meta_spalte(teil: str, schluessel: str):
+        return np.array([s[teil].get(schluessel) for s in spiele], dtype=object)[spiel]
+
+    namen = np.array([_dateiname(s, i) for i, s in enumerate(spiele)], dtype=object)
+    df = pd.DataFrame({
+        "index": index,
+        "text": texte,
+        "kontext": kontext,
+        "klassifikation.tore_bayern": tore_bayern,
+        "klassifikation.tore_gegner": tore_gegner,
+        "klassifikation.phase": phase,
+    })
+    for teil in ("meta", "ergebnis", "offizielle"):
+        for schluessel in dict.fromkeys(k for s in p["spiele"] for k in s[teil]):
+            df[f"{teil}.{schluessel}"] = meta_spalte(teil, schluessel)
+    df["source_file"] = namen[spiel]
+    if "meta.ballbesitz_bayern" in df.columns:
+        df["meta.ballbesitz_bayern"] = pd.to_numeric(df["meta.ballbesitz_bayern"], errors="coerce")
+
+    # ---------- Modell-Labels, Konfidenzen, manuelle Stichprobe ----------
+    for col in p["modelle"]:
+        label = np.empty(n, dtype=object)
+        for t, name in enumerate(KONTEXT_TYPEN):
+            maske = typ == t
+            if maske.any() and p["labels"][col][name]:
+                label[maske] = _labels(rng, p["labels"][col][name], int(maske.sum()))
+        df[col] = label
+        if col in p["konfidenz"]:
+            conf = np.full(n, np.nan)
+            for wert, quantile in p["konfidenz"][col].items():
+                maske = label == wert
+                conf[maske] = np.interp(rng.random(int(maske.sum())), np.linspace(0, 1, 101), quantile)
+            df[f"{col}__conf"] = conf.round(4)
+
+    manuell = np.full(n, None, dtype=object)
+    stichprobe = rng.random(n) < p["manuell"]["anteil"]
+    if p["modelle"]:
+        for wert, anteile in p["manuell"]["gegeben"].items():
+            maske = stichprobe & (df[p["modelle"][0]].to_numpy() == wert)
+            manuell[maske] = _labels(rng, anteile, int(maske.sum()))
+    df[MANUAL_COL] = manuell
+
+    # ---------- Spiel-JSONs ----------
+    spalten = {c: df[c].tolist() for c in ("index", "text", "kontext")}
+    klass = np.column_stack([tore_bayern, tore_gegner, phase]).tolist()
+    spiel_jsons = []
+    for i, s in enumerate(spiele):
+        von, bis = int(start[i]), int(start[i] + n_seg[i])
+        transkript = [
+            {
+                "index": spalten["index"][j],
+                "text": spalten["text"][j],
+                "kontext": spalten["kontext"][j],
+                "klassifikation": dict(zip(("tore_bayern", "tore_gegner", "phase"), klass[j])),
+            }
+            for j in range(von, bis)
+        ]
+        spiel_jsons.append({"datei": namen[i], "daten": {**s, "content": {"transkript": transkript}}})
+    return spiel_jsons, df
+
+
+def schluessel(faktor: float, seed: int, quellen: list[Path]) -> str:
+    """Ändert sich mit Generator-Version, Faktor, Seed und den Quelldateien."""
+    teile = [str(GENERATOR_VERSION), str(faktor), str(seed)]
+    for q in quellen:
+        q = Path(q)
+        dateien = sorted(q.glob("*.json")) if q.is_dir() else [q] if q.is_file() else []
+        teile += [f"{d.name}:{d.stat().st_size}:{d.stat().st_mtime_ns}" for d in dateien]
+    return hashlib.sha1("|".join(teile).encode("utf-8")).hexdigest()[:16]
+
+
+def schreiben(ziel: Path, spiele: list[dict], df: pd.DataFrame, info: dict):
+    ordner = ziel / SPIELE_ORDNER
+    ordner.mkdir(parents=True, exist_ok=True)
+    for alt in ordner.glob("*.json"):
+        alt.unlink()
+    for s in spiele:
+        with (ordner / s["datei"]).open("w", encoding="utf-8") as f:
+            json.dump(s["daten"], f, ensure_ascii=False)
+    df.to_csv(ziel / KORPUS_CSV, index=False)
+    (ziel / "korpus.json").write_text(json.dumps(info, ensure_ascii=False, indent=1), "utf-8")
+
+
+def korpus(
+    ziel: str | Path,
+    faktor: float,
+    seed: int = SEED,
+    einzelspiele: Path = EINZELSPIELE,
+    kombiniert: Path = KOMBINIERT,
+    annotiert: Path = ANNOTIERT,
+    verbose: bool = True,
+) -> dict:
+    """Korpus erzeugen oder wiederverwenden, wenn <ziel>/korpus.json denselben Schlüssel hat."""
+    ziel = Path(ziel)
+    key = schluessel(faktor, seed, [einzelspiele, kombiniert, annotiert])
+    info_datei = ziel / "korpus.json"
+    if info_datei.is_file() and (ziel / KORPUS_CSV).is_file():
+        info = json.loads(info_datei.read_text("utf-8"))
+        if info.get("schluessel") == key:
+            if verbose:
+                print(f"Korpus ×{faktor:g} vorhanden: {info['spiele']:,} Spiele, {info['zeilen']:,} Zeilen ({ziel})")
+            return info
+
+    start = time.perf_counter()
+    spiele, df = generieren(profil(einzelspiele, kombiniert, annotiert), faktor, seed)
+    info = {"schluessel": key, "faktor": faktor, "seed": seed, "spiele": len(spiele), "zeilen": len(df)}
+    schreiben(ziel, spiele, df, info)
+    if verbose:
+        print(f"Korpus ×{faktor:g} erzeugt: {len(spiele):,} Spiele, {len(df):,} Zeilen "
+              f"in {time.perf_counter() - start:.1f}s ({ziel})")
+    return info
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Synthetischen Korpus aus den Verteilungen der echten Daten erzeugen.")
+    parser.add_argument("--faktor", type=float, default=10, help="Vielfaches der echten Spielanzahl (Standard: 10)")
+    parser.add_argument("--ziel", required=True, help="Zielordner")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--einzelspiele", default=str(EINZELSPIELE), help="Ordner mit echten Spiel-JSONs")
+    parser.add_argument("--kombiniert", default=str(KOMBINIERT), help="Echte CSV mit Modell-Labels")
+    parser.add_argument("--annotiert", default=str(ANNOTIERT), help="Echte CSV mit sentiment__manual")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    korpus(args.ziel, args.faktor, args.seed, Path(args.einzelspiele), Path(args.kombiniert), Path(args.annotiert))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Append-only Journal für manuelle Labels (04_manual_labeling, 07_manual_sentiment_check).
+
+Jede Annotation ist eine JSON-Zeile, die sofort angehängt und per fsync auf
+die Platte gebracht wird. Kosten pro Label sind damit konstant (statt die
+ganze CSV neu zu schreiben), und ein Absturz verliert höchstens die gerade
+getippte Eingabe. Eine halb geschriebene letzte Zeile wird beim Lesen
+ignoriert; bei mehreren Einträgen zur selben ID gilt der letzte. Ein
+Eintrag mit Label None nimmt ein Label zurück: er bleibt beim
+Kompaktieren erhalten und leert beim Zusammenführen den Wert in CSV/JSON.
+
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from label_journal import LabelJournal, segment_id  # noqa: E402
+
+    journal = LabelJournal(journal_pfad("kommentare_annotiert.csv"))
+    labels = journal.labels()                        # {id: {"label": "p", ...}}
+    journal.append(segment_id(row), "p")
+    journal.append(segment_id(row), None)            # zurücknehmen
+    in_dataframe(df, journal.stand(), "sentiment__manual")
+
+Segment-IDs sind stabil über Läufe: "<source_file>#<index>", wenn beides
+vorhanden ist, sonst ein Hash des Textes.
+
+Kompaktieren (bei Bedarf, nicht pro Label):
+
+    python label_journal.py csv kommentare_annotiert.labels.jsonl kommentare_annotiert.csv --spalte sentiment__manual
+    python label_journal.py json saetze_mit_stimmung3.labels.jsonl saetze3.json saetze_mit_stimmung3.json
+    python label_journal.py kompaktieren kommentare_annotiert.labels.jsonl   # nur letzte Einträge behalten
+    python label_journal.py status kommentare_annotiert.labels.jsonl
+"""
+
+import os
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import pandas as pd
+
+
+def segment_id(eintrag) -> str:
+    """Stabile ID für eine CSV-Zeile oder einen JSON-Eintrag (dict/Series)."""
+    source_file, index = eintrag.get("source_file"), eintrag.get("index")
+    if isinstance(source_file, str) and source_file and index is not None and not pd.isna(index):
+        return f"{source_file}#{int(index)}"
+    text = " ".join(str(eintrag.get("text", "")).split())
+    return "text:" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def segment_ids(df: pd.DataFrame) -> pd.Series:
+    """segment_id() für alle Zeilen einer Tabelle; vektorisiert, wenn source_file und index vorhanden sind."""
+    if {"source_file", "index"} <= set(df.columns):
+        index = pd.to_numeric(df["index"], errors="coerce")
+        ok = df["source_file"].notna() & index.notna()
+        ids = df["source_file"].astype(str) + "#" + index.fillna(0).astype("int64").astype(str)
+        if ok.all():
+            return ids
+        return ids.where(ok, df.loc[~ok].apply(segment_id, axis=1))
+    return df.apply(segment_id, axis=1)
+
+
+def journal_pfad(ausgabe: str | Path) -> Path:
+    """Journal liegt neben der Ausgabedatei: kommentare_annotiert.csv → kommentare_annotiert.labels.jsonl."""
+    ausgabe = Path(ausgabe)
+    return ausgabe.with_name(f"{ausgabe.stem}.labels.jsonl")
+
+
+def _atomar_schreiben(pfad: Path, schreiben):
+    """Erst in eine temporäre Datei, dann umbenennen: die Zieldatei ist nie halb geschrieben."""
+    tmp = pfad.with_name(pfad.name + ".tmp")
+    schreiben(tmp)
+    os.replace(tmp, pfad)
+
+
+class LabelJournal:
+    """JSONL-Datei mit einem Eintrag pro Annotation, nur Anhängen."""
+
+    def __init__(self, path: str | Path, sync: bool = True):
+        self.path = Path(path)
+        self.sync = sync
+        self._datei = None
+
+    def append(self, sid: str, label, **felder):
+        """Ein Label (oder None zum Zurücknehmen) anhängen; kehrt erst zurück, wenn es auf der Platte ist."""
+        if self._datei is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._abgerissenes_ende_entfernen()
+            self._datei = open(self.path, "a", encoding="utf-8")
+        eintrag = {"id": sid, "label": label, **felder, "zeit": datetime.now().isoformat(timespec="seconds")}
+        self._datei.write(json.dumps(eintrag, ensure_ascii=False) + "\n")
+        self._datei.flush()
+        if self.sync:
+            os.fsync(self._datei.fileno())
+
+    def _abgerissenes_ende_entfernen(self):
+        """Halbe letzte Zeile (Absturz beim Schreiben) abschneiden, damit neue Einträge nicht daran kleben."""
+        if not self.path.is_file():
+            return
+        with open(self.path, "rb+") as f:
+            inhalt = f.read()
+            if inhalt and not inhalt.endswith(b"\n"):
+                f.truncate(inhalt.rfind(b"\n") + 1)
+
+    def eintraege(self) -> list[dict]:
+        """Alle vollständigen Einträge in Schreibreihenfolge."""
+        if not self.path.is_file():
+            return []
+        eintraege = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for nr, zeile in enumerate(f, start=1):
+                if not zeile.endswith("\n"):
+                    print(f"Warnung: unvollständige letzte Zeile {nr} in {self.path} ignoriert.")
+                    break
+                try:
+                    eintraege.append(json.loads(zeile))
+                except json.JSONDecodeError:
+                    print(f"Warnung: Zeile {nr} in {self.path} ist kein JSON, übersprungen.")
+        return eintraege
+
+    def stand(self) -> dict[str, dict]:
+        """Letzter Eintrag pro ID, einschließlich Zurücknahmen (Label None)."""
+        stand = {}
+        for e in self.eintraege():
+            stand[e["id"]] = e
+        return stand
+
+    def labels(self) -> dict[str, dict]:
+        """Letzter Stand pro ID; zurückgenommene Labels (None) fehlen."""
+        return {sid: e for sid, e in self.stand().items() if e.get("label") is not None}
+
+    def kompaktieren(self) -> tuple[int, int]:
+        """Journal auf den letzten Eintrag pro ID reduzieren → (vorher, nachher); Zurücknahmen bleiben."""
+        self.close()
+        eintraege = self.eintraege()
+        letzte = self.stand()
+
+        def schreiben(tmp: Path):
+            with open(tmp, "w", encoding="utf-8") as f:
+                for e in letzte.values():
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+        if self.path.is_file():
+            _atomar_schreiben(self.path, schreiben)
+        return len(eintraege), len(letzte)
+
+    def close(self):
+        if self._datei is not None:
+            self._datei.close()
+            self._datei = None
+
+
+# ---------- Zusammenführen in die Ausgabedateien ----------
+def in_dataframe(df: pd.DataFrame, labels: dict[str, dict], spalte: str) -> int:
+    """Labels in `spalte` eintragen, Zurücknahmen (None) leeren die Zelle → Anzahl gesetzter Zeilen.
+
+    Für Zurücknahmen `journal.stand()` übergeben; die Spalte wird bei Bedarf angelegt.
+    """
+    if spalte not in df.columns:
+        df[spalte] = pd.NA
+    ids = segment_ids(df)
+    werte = ids.map({sid: e["label"] for sid, e in labels.items() if e.get("label") is not None})
+    treffer = werte.notna()
+    zurueck = ids.isin([sid for sid, e in labels.items() if e.get("label") is None])
+    df[spalte] = df[spalte].astype(object)
+    df.loc[treffer, spalte] = werte[treffer]
+    df.loc[zurueck, spalte] = pd.NA
+    return int(treffer.sum())
+
+
+def in_eintraege(eintraege: list[dict], labels: dict[str, dict], felder: dict[str, str]) -> int:
+    """Labels in JSON-Einträge übernehmen; `felder` bildet Journal-Felder auf Eintrags-Schlüssel ab.
+
+    Zurücknahmen (Label None, aus `journal.stand()`) setzen alle Felder auf None und zählen nicht mit.
+    """
+    n = 0
+    for eintrag in eintraege:
+        e = labels.get(segment_id(eintrag))
+        if e is None:
+            continue
+        zurueck = e.get("label") is None
+        for quelle, ziel in felder.items():
+            eintrag[ziel] = None if zurueck else e.get(quelle)
+        n += not zurueck
+    return n
+
+
+def csv_schreiben(df: pd.DataFrame, pfad: str | Path):
+    _atomar_schreiben(Path(pfad), lambda tmp: df.to_csv(tmp, index=False))
+
+
+def json_schreiben(daten, pfad: str | Path):
+    def schreiben(tmp: Path):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(daten, f, ensure_ascii=False, indent=2)
+
+    _atomar_schreiben(Path(pfad), schreiben)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Label-Journal kompaktieren oder in CSV/JSON übernehmen.")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    p = sub.add_parser("csv", help="Labels in eine CSV übernehmen")
+    p.add_argument("journal")
+    p.add_argument("eingabe", help="CSV mit source_file/index oder text")
+    p.add_argument("ausgabe", nargs="?", help="Ziel-CSV (Standard: Eingabe überschreiben)")
+    p.add_argument("--spalte", default="sentiment__manual", help="Label-Spalte (Standard: sentiment__manual)")
+
+    p = sub.add_parser("json", help="Labels in eine JSON-Liste übernehmen (sentiment/target)")
+    p.add_argument("journal")
+    p.add_argument("eingabe", help="JSON-Liste mit index/text")
+    p.add_argument("ausgabe", nargs="?", help="Ziel-JSON (Standard: Eingabe überschreiben)")
+
+    p = sub.add_parser("kompaktieren", help="Nur den letzten Eintrag pro ID behalten")
+    p.add_argument("journal")
+
+    p = sub.add_parser("status", help="Einträge und Labels zählen")
+    p.add_argument("journal")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    journal = LabelJournal(args.journal)
+
+    if args.befehl == "csv":
+        df = pd.read_csv(args.eingabe)
+        n = in_dataframe(df, journal.stand(), args.spalte)
+        csv_schreiben(df, args.ausgabe or args.eingabe)
+        print(f"{n} Labels in Spalte '{args.spalte}' → {args.ausgabe or args.eingabe}")
+    elif args.befehl == "json":
+        with open(args.eingabe, "r", encoding="utf-8") as f:
+            daten = json.load(f)
+        n = in_eintraege(daten, journal.stand(), {"label": "sentiment", "target": "target"})
+        json_schreiben(daten, args.ausgabe or args.eingabe)
+        print(f"{n} Labels → {args.ausgabe or args.eingabe}")
+    elif args.befehl == "kompaktieren":
+        vorher, nachher = journal.kompaktieren()
+        print(f"{journal.path}: {vorher} Einträge → {nachher}")
+    else:
+        eintraege = journal.eintraege()
+        labels = journal.labels()
+        werte = pd.Series([e["label"] for e in labels.values()], dtype=object)
+        zurueck = len(journal.stand()) - len(labels)
+        print(f"{journal.path}: {len(eintraege)} Einträge, {len(labels)} gelabelte Segmente, {zurueck} zurückgenommen")
+        if len(werte):
+            print(werte.value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
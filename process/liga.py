@@ -0,0 +1,181 @@
+"""
+Pipeline für alle Vereine der Liga: ein Shard (Arbeitsordner) pro Bezugsverein.
+
+Jeder Shard läuft als eigene pipeline.py --team <Verein> in einem Worker-Pool,
+unabhängig von den anderen (eigene Rohdaten, eigener Hash-Zustand, eigene
+Logs). Eingaben, die für alle Vereine gleich sind, liegen einmal unter
+<basis>/gemeinsam/ und werden in jeden Shard verlinkt; die HF-Modelle teilen
+sich einen Cache (HF_HOME).
+
+    <basis>/gemeinsam/kader_23.txt, scraping/kader_23.txt   Kader (alle Vereine)
+    <basis>/gemeinsam/fine_tuned_german_sentiment/           Modellgewichte
+    <basis>/gemeinsam/Selbst_belabelt/                       Trainingsdaten
+    <basis>/gemeinsam/hf_cache/                              HF_HOME
+    <basis>/<verein>/                                        Shard, z.B. liga/borussia_dortmund/
+
+Training und manuelle Auswertung laufen nicht pro Verein (ein Modell für
+alle), deshalb fehlen sie in LIGA_STUFEN. Shards ohne Ordner werden übersprungen.
+
+    python liga.py pipeline --basis liga --dry_run
+    python liga.py pipeline --basis liga --vereine dortmund leverkusen --workers 2
+    python liga.py vergleich --basis liga                 # → liga/vergleich.xlsx
+
+`vergleich` rechnet den Bias (Bezugsverein − Gegner) aller Shards in einem
+Lauf mit dem Cluster-Bootstrap aus bias_statistik.py, ein Verein pro Gruppe.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from pipeline import STUFEN
+from vereine import LIGA, TEAM_VARIABLE, slug, verein
+
+# Auswertung aus 09_explorative_analysis
+sys.path.append(str(Path(__file__).resolve().parent / "09_explorative_analysis"))
+from sentiment_data import MODEL  # noqa: E402
+from sentiment_cube import load_cube  # noqa: E402
+from bias_statistik import ALPHA, N_REPLIKATE, SEED, gruppen_statistik, spiel_summen  # noqa: E402
+
+PROCESS_DIR = Path(__file__).resolve().parent
+BASIS = "liga"
+GEMEINSAM = "gemeinsam"
+GEMEINSAME_EINGABEN = ["kader_23.txt", "scraping", "fine_tuned_german_sentiment", "Selbst_belabelt"]
+LIGA_STUFEN = [s["name"] for s in STUFEN if s["name"] not in ("training", "auswertung")]
+ERGEBNIS_CSV = "data/output_with_sentiment.csv"
+WORKERS = 4
+SHARD_WORKERS = 2
+
+
+def shard_ordner(basis: Path, team: str) -> Path:
+    return basis / slug(team)
+
+
+def gemeinsame_verlinken(basis: Path, ordner: Path) -> list[str]:
+    """Gemeinsame Eingaben als Symlink in den Shard legen (vorhandene Dateien bleiben)."""
+    verlinkt = []
+    for name in GEMEINSAME_EINGABEN:
+        quelle, ziel = basis / GEMEINSAM / name, ordner / name
+        if quelle.exists() and not ziel.exists() and not ziel.is_symlink():
+            ziel.symlink_to(os.path.relpath(quelle, ordner), target_is_directory=quelle.is_dir())
+            verlinkt.append(name)
+    return verlinkt
+
+
+def shard_ausfuehren(basis: Path, team: str, shard_workers: int, dry_run: bool) -> tuple[str, int, float]:
+    """pipeline.py für einen Verein → (Verein, Rückgabecode, Sekunden)."""
+    ordner = shard_ordner(basis, team)
+    gemeinsame_verlinken(basis, ordner)
+    env = {**os.environ, TEAM_VARIABLE: team}
+    env.setdefault("HF_HOME", str((basis / GEMEINSAM / "hf_cache").resolve()))
+    cmd = [
+        sys.executable, str(PROCESS_DIR / "pipeline.py"),
+        "--arbeitsordner", str(ordner), "--team", team,
+        "--workers", str(shard_workers), "--nur", *LIGA_STUFEN,
+    ]
+    if dry_run:
+        cmd.append("--dry_run")
+
+    log = ordner / "logs" / "liga.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(log, "w", encoding="utf-8") as f:
+        rc = subprocess.run(cmd, stdout=f, stderr=subprocess.STDOUT, env=env).returncode
+    return team, rc, time.perf_counter() - start
+
+
+def pipeline(args) -> bool:
+    basis = Path(args.basis)
+    (basis / GEMEINSAM).mkdir(parents=True, exist_ok=True)
+    vereine = []
+    for team in args.vereine:
+        if shard_ordner(basis, team).is_dir():
+            vereine.append(team)
+        else:
+            print(f"[übersprungen] {team}: {shard_ordner(basis, team)} fehlt")
+    if not vereine:
+        print("Keine Shards gefunden.")
+        return True
+
+    print(f"{len(vereine)} Vereine, {args.workers} parallel, Stufen: {', '.join(LIGA_STUFEN)}")
+    fehlgeschlagen = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(shard_ausfuehren, basis, t, args.shard_workers, args.dry_run) for t in vereine]
+        for future in as_completed(futures):
+            team, rc, dauer = future.result()
+            status = "ok" if rc == 0 else f"FEHLER (rc={rc})"
+            print(f"  {team:<28} {status:<14} {dauer:7.1f}s  → {shard_ordner(basis, team) / 'logs' / 'liga.log'}")
+            if rc != 0:
+                fehlgeschlagen.append(team)
+    if args.dry_run:
+        print("Geplante Aufgaben stehen in den Logs der Shards.")
+    return not fehlgeschlagen
+
+
+def vergleich(args) -> bool:
+    basis = Path(args.basis)
+    teile = []
+    for team in args.vereine:
+        csv = shard_ordner(basis, team) / ERGEBNIS_CSV
+        if not csv.is_file():
+            print(f"[übersprungen] {team}: {csv} fehlt")
+            continue
+        summen = spiel_summen(load_cube(csv, model=args.model, verbose=False, team=team))
+        teile.append(summen.assign(verein=team))
+    if not teile:
+        print("Keine Ergebnisse gefunden.")
+        return False
+
+    start = time.perf_counter()
+    summen = pd.concat(teile, ignore_index=True)
+    tabelle = gruppen_statistik(summen, "verein", n_rep=args.n, alpha=args.alpha, seed=args.seed, workers=args.workers)
+    tabelle = tabelle.sort_values("bias", ascending=False).reset_index(drop=True)
+    print(f"{len(teile)} Vereine, {len(summen)} Spiele, {args.n} Replikate in {time.perf_counter() - start:.2f}s\n")
+    for _, r in tabelle.iterrows():
+        print(f"  {r['verein']:<28} {r['bias']:+.4f} [{r['ci_low']:+.4f}, {r['ci_high']:+.4f}]  "
+              f"p = {r['p']:.4f}  ({r['n_spiele']} Spiele)")
+
+    ziel = Path(args.out or basis / "vergleich.xlsx")
+    ziel.parent.mkdir(parents=True, exist_ok=True)
+    tabelle.to_excel(ziel, index=False)
+    print(f"\nGeschrieben: {ziel}")
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pipeline und Bias-Vergleich für alle Vereine als Shards.")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+    for name, hilfe in [("pipeline", "pipeline.py pro Verein ausführen"), ("vergleich", "Bias aller Vereine vergleichen")]:
+        p = sub.add_parser(name, help=hilfe)
+        p.add_argument("--basis", default=BASIS, help=f"Ordner mit den Shards (Standard: {BASIS})")
+        p.add_argument("--vereine", nargs="+", type=verein, default=LIGA, help="Standard: Bundesliga 2024/25")
+        p.add_argument("--workers", type=int, default=WORKERS, help=f"Parallele Shards bzw. Prozesse (Standard: {WORKERS})")
+
+    p = sub.choices["pipeline"]
+    p.add_argument("--shard_workers", type=int, default=SHARD_WORKERS,
+                   help=f"Parallele Aufgaben innerhalb eines Shards (Standard: {SHARD_WORKERS})")
+    p.add_argument("--dry_run", action="store_true", help="Nur anzeigen, was neu berechnet würde")
+
+    p = sub.choices["vergleich"]
+    p.add_argument("--out", default=None, help="Ziel-xlsx (Standard: <basis>/vergleich.xlsx)")
+    p.add_argument("--model", default=MODEL, help=f"Modell für das Sentiment (Standard: {MODEL})")
+    p.add_argument("--n", type=int, default=N_REPLIKATE, help=f"Replikate (Standard: {N_REPLIKATE})")
+    p.add_argument("--alpha", type=float, default=ALPHA, help=f"Irrtumswahrscheinlichkeit (Standard: {ALPHA})")
+    p.add_argument("--seed", type=int, default=SEED)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    ok = pipeline(args) if args.befehl == "pipeline" else vergleich(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Near-Realtime-Modus: jedes neue Transkript läuft einzeln und sofort durch die
+ganze Kette, statt auf den nächsten Batch-Lauf von pipeline.py zu warten.
+
+    bereinigung → extraktion → segmentierung → zuordnung → inferenz → aggregation
+
+Jede Stufe ist ein eigener Thread, verbunden über Warteschlangen: während
+Spiel B bereinigt wird, läuft für Spiel A schon die Inferenz. Die Stufen
+rufen dieselben Funktionen wie die Batch-Skripte auf (analyze, extract_all,
+segmentieren, classify_data, track_match, predict_with_model, aktualisieren),
+Modelle werden einmal geladen und bleiben im Speicher.
+
+Quellen (eine von beiden):
+    --eingang live/eingang    Ordner mit einer JSON pro Spiel (siehe unten);
+                              danach nach erledigt/ bzw. fehler/ verschoben
+    --db raw_data.sqlite      Zeilen mit Transkript, aber ohne clean_transkript;
+                              Ergebnisse werden zurückgeschrieben
+
+Eingangs-JSON (Dateien am besten unter anderem Namen schreiben und dann
+umbenennen; Dateien jünger als STABIL_S werden erst beim nächsten Mal gelesen):
+    {"transkript": "...", "beschreibung": "...", "saison": "24/25",
+     "spieltag": 12, "tabelle": 1, "meta": {"gegner": "..."}}
+Felder in "meta" (heim_auswaerts, gegner, schiedsrichter, kommentator,
+tore_bayern, tore_gegner) ersetzen die Extraktion aus der Beschreibung.
+
+Ausgaben im Arbeitsordner, wie im Batch:
+    einzelne_spiele/<name>.json, mit_zuordnung/<name>.json
+    live/spiele/<name>.csv                 Segmente mit Sentiment
+    data/results/*.xlsx                    Tabellen (ergebnis_inkrementell.py)
+    live/latenz.jsonl                      eine Zeile pro Spiel: Warte- und
+                                           Laufzeit pro Stufe, Ende-zu-Ende
+
+Offline testen: LLM=lokal ersetzt die GPT-Aufrufe (siehe llm.py). Der
+Bezugsverein kommt wie bei den Batch-Skripten aus BEZUGSVEREIN (vereine.py).
+
+    python live.py --eingang live/eingang
+    LLM=lokal python live.py --eingang live/eingang --einmal
+    python live.py --db raw_data.sqlite --intervall 30
+"""
+
+import sys
+import json
+import time
+import queue
+import shutil
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+
+import instrumentation as instr
+from vereine import TEAM
+
+PROCESS_DIR = Path(__file__).resolve().parent
+for _stufe in ("01_scraping", "02_preperation", "03_segmentation", "06_automatic_sentiment", "09_explorative_analysis"):
+    sys.path.append(str(PROCESS_DIR / _stufe))
+
+EINGANG = "live/eingang"
+LATENZ_DATEI = "live/latenz.jsonl"
+SPIELE_DIR = Path("live/spiele")
+OUT_DIR = "data/results"
+INTERVALL_S = 5.0
+STABIL_S = 1.0           # Dateien erst lesen, wenn sie so lange unverändert sind
+ENDE = None              # Signal zum Beenden der Stufen-Threads
+
+META_FELDER = ["heim_auswaerts", "gegner", "schiedsrichter", "kommentator", "tore_bayern", "tore_gegner"]
+
+
+def _wert(v):
+    """'Unbekannt' und leere Felder wie in raw_store.py als None."""
+    return None if v is None or (isinstance(v, str) and v.strip() in ("", "Unbekannt")) else v
+
+
+# ---------- Quellen ----------
+class OrdnerQuelle:
+    """Neue *.json im Eingangsordner; nach der Verarbeitung nach erledigt/ bzw. fehler/."""
+
+    def __init__(self, ordner: str | Path):
+        self.ordner = Path(ordner)
+        for unter in ("erledigt", "fehler"):
+            (self.ordner / unter).mkdir(parents=True, exist_ok=True)
+        self.in_arbeit: set[str] = set()
+
+    def neue(self) -> list[dict]:
+        jetzt = time.time()
+        spiele = []
+        for pfad in sorted(self.ordner.glob("*.json"), key=lambda p: p.stat().st_mtime):
+            eingang = pfad.stat().st_mtime
+            if pfad.name in self.in_arbeit or jetzt - eingang < STABIL_S:
+                continue
+            try:
+                daten = json.loads(pfad.read_text("utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[fehler]   {pfad.name}: nicht lesbar ({e})")
+                shutil.move(pfad, self.ordner / "fehler" / pfad.name)
+                continue
+            self.in_arbeit.add(pfad.name)
+            spiele.append({"id": pfad.name, "eingang": eingang, "roh": daten})
+        return spiele
+
+    def abschliessen(self, spiel: dict):
+        ziel = "fehler" if spiel.get("fehler") else "erledigt"
+        shutil.move(self.ordner / spiel["id"], self.ordner / ziel / spiel["id"])
+        self.in_arbeit.discard(spiel["id"])
+
+
+class DatenbankQuelle:
+    """Zeilen der Rohdaten-Datenbank mit Transkript, aber ohne clean_transkript."""
+
+    def __init__(self, pfad: str | Path):
+        self.pfad = Path(pfad)
+        # Fehlgeschlagene Zeilen erst nach einem Neustart wieder versuchen
+        self.gesehen: set[str] = set()
+
+    def _db(self):
+        # eigene Verbindung pro Aufruf: Abfragen und Rückschreiben laufen in verschiedenen Threads
+        from raw_store import RawStore
+        return RawStore(self.pfad)
+
+    def neue(self) -> list[dict]:
+        db = self._db()
+        try:
+            zeilen = db.rows(["saison", "spieltag", "tabelle", "titel", "beschreibung", "transkript", "clean_transkript"])
+        finally:
+            db.close()
+        spiele = []
+        for z in zeilen:
+            if not (z["transkript"] or "").strip() or z["clean_transkript"] or z["video_id"] in self.gesehen:
+                continue
+            self.gesehen.add(z["video_id"])
+            spiele.append({"id": z["video_id"], "eingang": time.time(), "roh": z})
+        return spiele
+
+    def abschliessen(self, spiel: dict):
+        if spiel.get("fehler"):
+            return
+        db = self._db()
+        try:
+            db.update(spiel["id"], clean_transkript=spiel["clean"], **spiel["metadaten"])
+        finally:
+            db.close()
+
+
+# ---------- Stufen ----------
+class Stufen:
+    """Die Arbeitsschritte pro Spiel; Module und Modelle werden einmal geladen."""
+
+    def __init__(self, modelle: list[str], model: str, out_dir: str | Path, team: str):
+        import transcript_cleaning
+        import youtube_extraction
+        import excel_to_json_segments
+        import classify_json_context
+        import score_tracker
+
+        self.bereiniger = transcript_cleaning
+        self.extraktor = youtube_extraction
+        self.segmentierer = excel_to_json_segments
+        self.zuordner = classify_json_context
+        self.spielstand = score_tracker
+        self.modelle = modelle
+        self.model = model
+        self.out_dir = Path(out_dir)
+        self.team = team
+        self._geladen: dict[str, tuple] = {}
+        self._stand = None
+
+    def bereinigung(self, spiel: dict):
+        roh = spiel["roh"]
+        clean = self.bereiniger.analyze(roh.get("transkript"), roh.get("beschreibung"))
+        if clean == "Kein Transkript vorhanden.":
+            raise ValueError("Kein Transkript vorhanden.")
+        spiel["clean"] = clean
+
+    def extraktion(self, spiel: dict):
+        roh = spiel["roh"]
+        vorgegeben = {k: v for k, v in (roh.get("meta") or {}).items() if k in META_FELDER}
+        if set(META_FELDER) <= set(vorgegeben):
+            spiel["metadaten"] = vorgegeben
+            return
+        ergebnis = self.extraktor.extract_all({0: roh.get("beschreibung") or ""}, self.team)[0]
+        spiel["metadaten"] = {**{k: ergebnis.get(k) for k in META_FELDER}, **vorgegeben}
+
+    def segmentierung(self, spiel: dict):
+        roh, m = spiel["roh"], spiel["metadaten"]
+        saetze = self.segmentierer.segmentieren(spiel["clean"])
+        instr.count("live.segmente", len(saetze))
+        spiel["daten"] = {
+            "meta": {
+                "saison": roh.get("saison"),
+                "spieltag": roh.get("spieltag"),
+                "heim_auswaerts": _wert(m.get("heim_auswaerts")),
+                "gegner": _wert(m.get("gegner")),
+                "tabelle": roh.get("tabelle"),
+            },
+            "ergebnis": {"bayern": _wert(m.get("tore_bayern")), "gegner": _wert(m.get("tore_gegner"))},
+            "offizielle": {"schiedsrichter": _wert(m.get("schiedsrichter")), "kommentator": _wert(m.get("kommentator"))},
+            "content": {"transkript": [{"index": i, "text": s} for i, s in enumerate(saetze)]},
+        }
+        if spiel["daten"]["meta"]["gegner"] is None:
+            raise ValueError("Gegner unbekannt, Zuordnung nicht möglich.")
+        spiel["name"] = self.segmentierer.dateiname(roh.get("saison", ""), roh.get("spieltag", ""), m["gegner"])
+        self._schreiben(Path(self.segmentierer.AUSGABE_ORDNER) / spiel["name"], spiel["daten"])
+
+    def zuordnung(self, spiel: dict):
+        daten = spiel["daten"]
+        self.zuordner.classify_data(daten)
+        for seg, klass in zip(daten["content"]["transkript"], self.spielstand.track_match(daten)):
+            seg["klassifikation"] = klass
+        spiel["json"] = self.zuordner.OUTPUT_DIR / spiel["name"]
+        self._schreiben(spiel["json"], daten)
+
+    def inferenz(self, spiel: dict):
+        import csv_multi_model_infer as infer
+        from merge_to_csv import load_one_json, order_columns
+
+        df = order_columns(load_one_json(spiel["json"]))
+        prepped = infer.prepare_texts(df, self.team)
+        reps, pos = infer.inference_groups(prepped, infer.DEDUP_THRESHOLD)
+        texte = [prepped[i] for i in reps]
+        for model_dir in self.modelle:
+            if model_dir not in self._geladen:
+                self._geladen[model_dir] = infer.load_model(model_dir)
+            preds, confs = infer.predict_with_model(texte, model_dir, self._geladen[model_dir])
+            spalten = infer.model_columns(model_dir)
+            df[spalten[0]] = [preds[i] for i in pos]
+            if infer.ADD_CONFIDENCE:
+                df[spalten[1]] = [round(float(confs[i]), 4) for i in pos]
+
+        SPIELE_DIR.mkdir(parents=True, exist_ok=True)
+        spiel["csv"] = SPIELE_DIR / f"{Path(spiel['name']).stem}.csv"
+        df.to_csv(spiel["csv"], index=False)
+
+    def aggregation(self, spiel: dict):
+        from sentiment_data import load_dataset
+        from sentiment_cube import write_tables
+        from ergebnis_inkrementell import STAND_DATEI, ErgebnisStand, aktualisieren
+
+        if self._stand is None:
+            # SQLite-Verbindung im Thread dieser Stufe öffnen
+            self._stand = ErgebnisStand(self.out_dir / STAND_DATEI)
+            self._stand.pruefe_kopf(self.model, self.team)
+        df = load_dataset(spiel["csv"], model=self.model, cache=False, verbose=False, team=self.team)
+        neu, geaendert, _ = aktualisieren(self._stand, df)
+        if neu or geaendert:
+            write_tables(self._stand.cube(self.team), self.out_dir)
+
+    @staticmethod
+    def _schreiben(pfad: Path, daten: dict):
+        pfad.parent.mkdir(parents=True, exist_ok=True)
+        with pfad.open("w", encoding="utf-8") as f:
+            json.dump(daten, f, ensure_ascii=False, indent=2)
+
+    def reihenfolge(self) -> list[tuple[str, callable]]:
+        return [
+            ("bereinigung", self.bereinigung),
+            ("extraktion", self.extraktion),
+            ("segmentierung", self.segmentierung),
+            ("zuordnung", self.zuordnung),
+            ("inferenz", self.inferenz),
+            ("aggregation", self.aggregation),
+        ]
+
+
+# ---------- Kette ----------
+class Kette:
+    """Ein Thread pro Stufe, verbunden über Warteschlangen; fertige Spiele gehen an abschluss()."""
+
+    def __init__(self, stufen: list[tuple[str, callable]], abschluss):
+        self.abschluss = abschluss
+        self.queues = [queue.Queue() for _ in range(len(stufen) + 1)]
+        self.threads = [
+            threading.Thread(target=self._stufe, args=(name, f, self.queues[i], self.queues[i + 1]), name=name, daemon=True)
+            for i, (name, f) in enumerate(stufen)
+        ]
+        self.threads.append(threading.Thread(target=self._abschluss, name="abschluss", daemon=True))
+        for t in self.threads:
+            t.start()
+
+    def einreihen(self, spiel: dict):
+        spiel.update(entdeckt=time.time(), stufen={}, bereit=time.perf_counter())
+        self.queues[0].put(spiel)
+
+    def _stufe(self, name, funktion, ein: queue.Queue, aus: queue.Queue):
+        while (spiel := ein.get()) is not ENDE:
+            if not spiel.get("fehler"):
+                beginn = time.perf_counter()
+                try:
+                    with instr.span(name, spiel=spiel["id"]):
+                        funktion(spiel)
+                except Exception as e:
+                    spiel["fehler"] = f"{name}: {type(e).__name__}: {e}"
+                    instr.count(f"live.fehler.{name}")
+                ende = time.perf_counter()
+                spiel["stufen"][name] = {"warten_s": round(beginn - spiel["bereit"], 4), "dauer_s": round(ende - beginn, 4)}
+                instr.observe(f"live.{name}.warten_s", beginn - spiel["bereit"])
+                spiel["bereit"] = ende
+            aus.put(spiel)
+        aus.put(ENDE)
+
+    def _abschluss(self):
+        while (spiel := self.queues[-1].get()) is not ENDE:
+            try:
+                self.abschluss(spiel)
+            except Exception as e:
+                print(f"[fehler]   {spiel['id']}: Abschluss fehlgeschlagen ({e})")
+
+    def beenden(self):
+        """Bereits eingereihte Spiele laufen noch durch."""
+        self.queues[0].put(ENDE)
+        for t in self.threads:
+            t.join()
+
+
+def latenz_eintrag(spiel: dict) -> dict:
+    fertig = time.time()
+    return {
+        "spiel": spiel.get("name") or spiel["id"],
+        "quelle": spiel["id"],
+        "eingang": datetime.fromtimestamp(spiel["eingang"]).isoformat(timespec="seconds"),
+        "fertig": datetime.fromtimestamp(fertig).isoformat(timespec="seconds"),
+        "erkannt_nach_s": round(spiel["entdeckt"] - spiel["eingang"], 3),
+        "ende_zu_ende_s": round(fertig - spiel["entdeckt"], 3),
+        "stufen": spiel["stufen"],
+        "fehler": spiel.get("fehler"),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Neue Transkripte einzeln und sofort durch die ganze Kette schicken.")
+    quelle = parser.add_mutually_exclusive_group()
+    quelle.add_argument("--eingang", default=EINGANG, help=f"Eingangsordner mit einer JSON pro Spiel (Standard: {EINGANG})")
+    quelle.add_argument("--db", default=None, help="Stattdessen neue Zeilen der Rohdaten-Datenbank verarbeiten")
+    parser.add_argument("--modelle", nargs="+", default=None, help="Sentiment-Modelle (Standard: ./<model>)")
+    parser.add_argument("--model", default=None, help="Modell für die Tabellen (Standard: wie sentiment_data.py)")
+    parser.add_argument("--out_dir", default=OUT_DIR, help=f"Zielordner der Tabellen (Standard: {OUT_DIR})")
+    parser.add_argument("--latenz", default=LATENZ_DATEI, help=f"Latenz-Protokoll (Standard: {LATENZ_DATEI})")
+    parser.add_argument("--intervall", type=float, default=INTERVALL_S, help=f"Sekunden zwischen zwei Abfragen (Standard: {INTERVALL_S})")
+    parser.add_argument("--einmal", action="store_true", help="Vorhandenes verarbeiten und beenden")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    from sentiment_data import MODEL
+
+    instr.start("live")
+    model = args.model or MODEL
+    stufen = Stufen(args.modelle or [f"./{model}"], model, args.out_dir, TEAM)
+    quelle = DatenbankQuelle(args.db) if args.db else OrdnerQuelle(args.eingang)
+    latenz = Path(args.latenz)
+    latenz.parent.mkdir(parents=True, exist_ok=True)
+
+    def abschluss(spiel: dict):
+        quelle.abschliessen(spiel)
+        eintrag = latenz_eintrag(spiel)
+        with latenz.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(eintrag, ensure_ascii=False) + "\n")
+        if eintrag["fehler"]:
+            instr.count("live.spiele_fehler")
+            print(f"[fehler]   {eintrag['spiel']}: {eintrag['fehler']}")
+        else:
+            instr.count("live.spiele")
+            instr.observe("live.ende_zu_ende_s", eintrag["ende_zu_ende_s"])
+            dauern = "  ".join(f"{k} {v['dauer_s']:.2f}s" for k, v in eintrag["stufen"].items())
+            print(f"[fertig]   {eintrag['spiel']}: {eintrag['ende_zu_ende_s']:.2f}s  ({dauern})")
+
+    kette = Kette(stufen.reihenfolge(), abschluss)
+    print(f"Live-Modus für {TEAM}: {args.db or args.eingang}, alle {args.intervall:g}s (Strg+C beendet)")
+    try:
+        while True:
+            for spiel in quelle.neue():
+                print(f"[neu]      {spiel['id']}")
+                kette.einreihen(spiel)
+            if args.einmal:
+                break
+            time.sleep(args.intervall)
+    except KeyboardInterrupt:
+        print("Beende nach den laufenden Spielen ...")
+    kette.beenden()
+
+
+if __name__ == "__main__":
+    main()
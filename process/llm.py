@@ -0,0 +1,156 @@
+"""
+Chat-Client für die GPT-Schritte (Bereinigung, Extraktion, Segmentierung, Kontext).
+
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    import llm  # noqa: E402
+
+    client = llm.client()
+    resp = instr.chat_completion(client, model="gpt-4o", messages=[...])
+
+Welcher Client, bestimmt die Umgebungsvariable LLM:
+
+- "openai" (Standard): OpenAI mit OPENAI_API_KEY; OPENAI_BASE_URL kann auf
+  einen kompatiblen Server zeigen (z.B. ein lokal gehostetes Modell).
+- "lokal": regelbasierter Ersatz ohne Netz und ohne Schlüssel. Er erkennt die
+  Aufgabe am System-Prompt und antwortet im selben Format wie GPT
+  (Transkript unverändert, Metadaten per Regex, ein Satz pro Segment,
+  Kontext über Vereins-Stichwörter). Für Tests von live.py und der Pipeline
+  offline, nicht für Ergebnisse.
+"""
+
+import os
+import re
+import json
+from types import SimpleNamespace
+
+from vereine import VEREINE, namen, verein
+
+STANDARD = "openai"
+BACKENDS = ("openai", "lokal")
+
+
+def client(backend: str | None = None):
+    """Client mit chat.completions.create() für das gewählte Backend."""
+    backend = backend or os.getenv("LLM") or STANDARD
+    if backend == "lokal":
+        return LokalerClient()
+    if backend != "openai":
+        raise ValueError(f"Unbekanntes LLM-Backend '{backend}' (erlaubt: {', '.join(BACKENDS)})")
+
+    from openai import OpenAI
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY fehlt in .env")
+    return OpenAI(api_key=api_key)
+
+
+# ---------- Lokaler Ersatz ----------
+SATZ_RE = re.compile(r"(?<=[.!?])\s+")
+STAND_RE = re.compile(r"(?<![\d:])(\d{1,2})\s?:\s?(\d{1,2})(?![\d:])")
+OFFIZIELLE_RE = {
+    "schiedsrichter": re.compile(r"Schiedsrichter(?:in)?\s*:?\s*([A-ZÄÖÜ][\w\-]+(?: [A-ZÄÖÜ][\w\-]+)+)"),
+    "kommentator": re.compile(r"(?:Kommentator(?:in)?|Reporter(?:in)?)\s*:?\s*([A-ZÄÖÜ][\w\-]+(?: [A-ZÄÖÜ][\w\-]+)+)"),
+}
+
+
+def _vereine_im_text(text: str) -> list[str]:
+    """Erwähnte Vereine in Reihenfolge des ersten Auftretens."""
+    klein = text.lower()
+    treffer = {}
+    for name, (_, stichwoerter) in VEREINE.items():
+        stellen = [klein.find(w) for w in [name.lower(), *stichwoerter] if w in klein]
+        if stellen:
+            treffer[name] = min(stellen)
+    return sorted(treffer, key=treffer.get)
+
+
+def bereinigen(transkript: str) -> str:
+    """Transkript ohne Korrektur, nur Leerraum vereinheitlicht."""
+    return " ".join(transkript.split())
+
+
+def metadaten(text: str, team: str) -> dict:
+    """Felder von youtube_extraction.FIELDS_SCHEMA aus Titel/Beschreibung."""
+    vereine = _vereine_im_text(text)
+    gegner = next((v for v in vereine if v != team), None)
+    heim = "Unbekannt"
+    if gegner and team in vereine:
+        heim = "Heim" if vereine.index(team) < vereine.index(gegner) else "Auswärts"
+
+    tore = {"tore_bayern": "Unbekannt", "tore_gegner": "Unbekannt"}
+    stand = STAND_RE.search(text)
+    if stand and heim != "Unbekannt":
+        a, b = int(stand.group(1)), int(stand.group(2))
+        tore = {"tore_bayern": a, "tore_gegner": b} if heim == "Heim" else {"tore_bayern": b, "tore_gegner": a}
+
+    offizielle = {k: (m.group(1) if (m := r.search(text)) else None) for k, r in OFFIZIELLE_RE.items()}
+    return {"heim_auswaerts": heim, "gegner": gegner or "Unbekannt", **offizielle, **tore}
+
+
+def segmentieren(text: str) -> list[str]:
+    """Ein Satz pro Aussage; der Text bleibt bis auf Leerraum an den Schnitten gleich."""
+    return [s for s in SATZ_RE.split(text.strip()) if s]
+
+
+def zuordnen(saetze: list[dict], team: str, gegner: str) -> list[dict]:
+    """Kontext pro Satz über Stichwörter; ohne Treffer gilt der vorige Satz (wie im Prompt)."""
+    eigene = namen(team)
+    try:
+        fremde = namen(gegner)
+    except ValueError:
+        fremde = []
+    fremde = [*fremde, *(w for w in re.split(r"[\s.]+", gegner.lower()) if len(w) > 3)]
+
+    vorher, ergebnis = "Neutral", []
+    for s in saetze:
+        klein = str(s["text"]).lower()
+        a, b = any(w in klein for w in eigene), any(w in klein for w in fremde)
+        if a != b:
+            vorher = team if a else gegner
+        elif a and b:
+            vorher = "Neutral"
+        ergebnis.append({"index": s["index"], "kontext": vorher})
+    return ergebnis
+
+
+def _zwischen(text: str, start: str, ende: str) -> str:
+    return text.split(start, 1)[1].split(ende, 1)[0] if start in text else ""
+
+
+def _antwort(system: str, user: str) -> str:
+    if "Bereinige es" in system:
+        return bereinigen(user.split("\n\n", 1)[0])
+
+    if "Du extrahierst" in system:
+        team = verein(_zwischen(user, "Bezugs-Team:", "\n").strip())
+        pakete = re.findall(r'ID (\d+):\s*"""(.*?)"""', user, re.DOTALL)
+        if pakete:
+            return json.dumps([{"id": int(i), **metadaten(t, team)} for i, t in pakete], ensure_ascii=False)
+        einzeln = re.search(r'Beschreibung:\s*"""(.*?)"""', user, re.DOTALL)
+        return json.dumps(metadaten(einzeln.group(1) if einzeln else "", team), ensure_ascii=False)
+
+    if "Du teilst einen deutschen Kommentartext" in system:
+        return json.dumps(segmentieren(_zwischen(user, 'Text:\n"""', '"""')), ensure_ascii=False)
+
+    if "welches Team er betrifft" in system:
+        erlaubt = re.findall(r"^- (.+)$", _zwischen(system, "Erlaubte Antworten", "\n\n"), re.MULTILINE)
+        team, gegner = erlaubt[0], erlaubt[1]
+        saetze = json.loads(user[user.index("["):user.rindex("]") + 1])
+        return json.dumps(zuordnen(saetze, team, gegner), ensure_ascii=False)
+
+    raise ValueError("Lokaler LLM-Ersatz kennt diese Anfrage nicht (System-Prompt ohne bekannte Aufgabe).")
+
+
+class LokalerClient:
+    """Nachbildung von OpenAI().chat.completions.create() für die Prompts dieses Projekts."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: list[dict], **kwargs):
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        user = "\n".join(m["content"] for m in messages if m["role"] == "user")
+        inhalt = _antwort(system, user)
+        # ohne usage: keine Token-/Kostenzähler im Trace
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=inhalt))], usage=None)
@@ -0,0 +1,420 @@
+"""
+Pipeline-Runner für die Stufen 01–08.
+
+Jede Stufe deklariert ihre Eingaben und Ausgaben. Eine Stufe läuft nur, wenn
+sich der Inhalts-Hash ihrer Eingaben (inkl. Skript und Argumente) seit dem
+letzten erfolgreichen Lauf geändert hat oder eine Ausgabe fehlt.
+Abhängigkeiten ergeben sich aus Ausgaben → Eingaben; unabhängige Stufen
+laufen parallel. Stufen mit `pro_datei` werden in eine Aufgabe pro Datei
+aufgeteilt (z.B. Kontext-Klassifikation pro Spiel).
+
+Deklarationen:
+    "pfad/datei.xlsx"              einzelne Datei
+    "ordner/*.json", "ordner/"     alle passenden Dateien / ganzer Ordner
+    "raw_data.sqlite:url,gegner"   Spalten der Rohdaten-Datenbank (raw_store.py)
+    "raw_data.sqlite:*"            ganze Tabelle
+
+Alle Pfade sind relativ zum Arbeitsordner, in dem auch die Skripte laufen.
+Jeder Lauf schreibt einen Trace nach traces/<lauf>.json (Wandzeit pro
+Aufgabe plus die Messwerte der Skripte selbst, siehe instrumentation.py).
+
+Interaktive Schritte (04 stimmungsanalyse.py, 07 manuelles_sentiment_labeling.py)
+bleiben manuell; ihre Ergebnisse gehen hier nur als Eingaben ein.
+
+    python pipeline.py --dry_run                  # was würde neu berechnet?
+    python pipeline.py                            # alles Nötige ausführen
+    python pipeline.py --nur klassifikation zusammenfuehren --workers 8
+    python pipeline.py --erzwingen inferenz
+    python pipeline.py --team "Borussia Dortmund" --arbeitsordner liga/borussia_dortmund
+
+Der Bezugsverein (--team, Standard FC Bayern München) geht per Umgebungsvariable
+BEZUGSVEREIN an die Skripte (siehe vereine.py) und zählt zu den Eingaben jeder Stufe.
+Alle Vereine als Shards: liga.py.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import sqlite3
+import hashlib
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import instrumentation as instr
+from vereine import STANDARD, TEAM_VARIABLE, verein
+
+PROCESS_DIR = Path(__file__).resolve().parent
+ARBEITSORDNER = "."
+STATE_DATEI = ".pipeline_state.json"
+LOG_DIR = "logs"
+WORKERS = 4
+
+DB = "raw_data.sqlite"
+
+STUFEN = [
+    {
+        "name": "metadaten",
+        "skript": "01_scraping/youtube_description.py",
+        "args": ["--db", DB],
+        "eingaben": [f"{DB}:url"],
+        "ausgaben": [f"{DB}:titel,beschreibung,veroeffentlicht,dauer_s"],
+    },
+    {
+        "name": "transkripte",
+        "skript": "01_scraping/transcript_api.py",
+        "args": ["--db", DB],
+        "eingaben": [f"{DB}:url"],
+        "ausgaben": [f"{DB}:transkript"],
+    },
+    {
+        "name": "bereinigung",
+        "skript": "02_preperation/transcript_cleaning.py",
+        "eingaben": [f"{DB}:transkript,beschreibung", "kader_23.txt"],
+        "ausgaben": [f"{DB}:clean_transkript"],
+    },
+    {
+        "name": "extraktion",
+        "skript": "02_preperation/youtube_extraction.py",
+        "eingaben": [f"{DB}:beschreibung"],
+        "ausgaben": [f"{DB}:heim_auswaerts,gegner,schiedsrichter,kommentator,tore_bayern,tore_gegner"],
+    },
+    {
+        "name": "export",
+        "skript": "01_scraping/raw_store.py",
+        "args": ["--db", DB, "export", "raw_data.xlsx"],
+        "eingaben": [f"{DB}:*"],
+        "ausgaben": ["raw_data.xlsx"],
+    },
+    {
+        # liest die von Hand gepflegte Arbeitsmappe (Transkript-Spalte)
+        "name": "segmentierung",
+        "skript": "03_segmentation/excel_to_json_segments.py",
+        "eingaben": ["data/23-25_working.xlsx"],
+        "ausgaben": ["einzelne_spiele/"],
+    },
+    {
+        "name": "klassifikation",
+        "skript": "03_segmentation/classify_json_context.py",
+        "pro_datei": "einzelne_spiele/*.json",
+        "args": ["{datei}"],
+        "eingaben": ["{datei}", "scraping/kader_23.txt"],
+        "ausgaben": ["mit_zuordnung/{name}"],
+    },
+    {
+        "name": "zusammenfuehren",
+        "skript": "03_segmentation/merge_to_csv.py",
+        "eingaben": ["mit_zuordnung/*.json"],
+        "ausgaben": ["alle_saetze_23-25.csv"],
+    },
+    {
+        "name": "training",
+        "skript": "05_model_finetuning/train_german_sentiment.py",
+        "eingaben": ["Selbst_belabelt/*.json"],
+        "ausgaben": ["fine_tuned_german_sentiment/"],
+    },
+    {
+        "name": "inferenz",
+        "skript": "06_automatic_sentiment/csv_multi_model_infer.py",
+        "args": ["--in_csv", "alle_saetze_23-25.csv", "--out_csv", "data/output_with_sentiment.csv"],
+        "eingaben": ["alle_saetze_23-25.csv", "fine_tuned_german_sentiment/"],
+        "ausgaben": ["data/output_with_sentiment.csv"],
+    },
+    {
+        "name": "auswertung",
+        "skript": "08_confusionmatrix/auswertung_modelle.py",
+        "args": ["kommentare_annotiert.csv", "--out_json", "auswertung.json", "--out_csv", "auswertung.csv"],
+        "eingaben": ["kommentare_annotiert.csv"],
+        "ausgaben": ["auswertung.json", "auswertung.csv"],
+    },
+]
+
+
+# ---------- Ressourcen ----------
+def is_db(decl: str) -> bool:
+    return ".sqlite:" in decl
+
+
+def resource_keys(decl: str) -> list[str]:
+    """Schlüssel für die Abhängigkeitsbestimmung (Pfad ohne Glob-Anteil bzw. DB-Spalte)."""
+    if is_db(decl):
+        db, spalten = decl.split(":", 1)
+        return [f"{db}:{s.strip()}" for s in spalten.split(",")]
+    basis = decl.split("*", 1)[0].split("{", 1)[0]
+    return [basis.rstrip("/")]
+
+
+def keys_overlap(a: str, b: str) -> bool:
+    if ":" in a and ":" in b:
+        (db_a, col_a), (db_b, col_b) = a.split(":", 1), b.split(":", 1)
+        return db_a == db_b and (col_a == col_b or "*" in (col_a, col_b))
+    if ":" in a or ":" in b:
+        return False
+    return a == b or a.startswith(b + "/") or b.startswith(a + "/")
+
+
+def files_of(decl: str, cwd: Path) -> list[Path]:
+    pfad = cwd / decl
+    if decl.endswith("/"):
+        return sorted(p for p in pfad.rglob("*") if p.is_file())
+    if any(c in decl for c in "*?["):
+        return sorted(Path(p) for p in glob.glob(str(pfad)) if Path(p).is_file())
+    return [pfad] if pfad.is_file() else []
+
+
+def hash_decl(decl: str, cwd: Path) -> str:
+    h = hashlib.sha256()
+    if is_db(decl):
+        db, spalten = decl.split(":", 1)
+        if not (cwd / db).is_file():
+            return "fehlt"
+        auswahl = "*" if spalten.strip() == "*" else ", ".join(s.strip() for s in spalten.split(","))
+        conn = sqlite3.connect(f"file:{cwd / db}?mode=ro", uri=True)
+        try:
+            for row in conn.execute(f"SELECT video_id, {auswahl} FROM videos ORDER BY video_id"):
+                h.update(repr(row).encode("utf-8"))
+        except sqlite3.OperationalError:
+            return "fehlt"
+        finally:
+            conn.close()
+        return h.hexdigest()
+
+    files = files_of(decl, cwd)
+    if not files:
+        return "fehlt"
+    for p in files:
+        h.update(str(p.relative_to(cwd)).encode("utf-8"))
+        h.update(hashlib.sha256(p.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def outputs_exist(decls: list[str], cwd: Path) -> bool:
+    return all(hash_decl(d, cwd) != "fehlt" for d in decls)
+
+
+# ---------- Planung ----------
+def dependencies(stufen: list[dict]) -> dict[str, set[str]]:
+    deps = {s["name"]: set() for s in stufen}
+    for b in stufen:
+        ein = [k for d in b["eingaben"] + [b.get("pro_datei") or ""] for k in resource_keys(d) if k]
+        for a in stufen:
+            if a is b:
+                continue
+            aus = [k for d in a["ausgaben"] for k in resource_keys(d) if k]
+            if any(keys_overlap(x, y) for x in ein for y in aus):
+                deps[b["name"]].add(a["name"])
+    return deps
+
+
+def topo_order(stufen: list[dict], deps: dict[str, set[str]]) -> list[dict]:
+    fertig, order = set(), []
+    offen = list(stufen)
+    while offen:
+        bereit = [s for s in offen if deps[s["name"]] <= fertig]
+        if not bereit:
+            raise RuntimeError(f"Zyklische Abhängigkeit zwischen: {[s['name'] for s in offen]}")
+        for s in bereit:
+            order.append(s)
+            fertig.add(s["name"])
+            offen.remove(s)
+    return order
+
+
+def tasks_of(stufe: dict, cwd: Path) -> list[dict]:
+    """Eine Aufgabe pro Datei bei `pro_datei`, sonst genau eine."""
+    if not stufe.get("pro_datei"):
+        return [{"key": stufe["name"], "args": stufe.get("args", []),
+                 "eingaben": stufe["eingaben"], "ausgaben": stufe["ausgaben"]}]
+
+    def fill(x, datei, name):
+        return x.replace("{datei}", datei).replace("{name}", name)
+
+    tasks = []
+    for p in files_of(stufe["pro_datei"], cwd):
+        datei, name = str(p.relative_to(cwd)), p.name
+        tasks.append({
+            "key": f"{stufe['name']}:{name}",
+            "args": [fill(a, datei, name) for a in stufe.get("args", [])],
+            "eingaben": [fill(d, datei, name) for d in stufe["eingaben"]],
+            "ausgaben": [fill(d, datei, name) for d in stufe["ausgaben"]],
+        })
+    return tasks
+
+
+def input_hashes(stufe: dict, task: dict, cwd: Path) -> dict[str, str]:
+    skript = PROCESS_DIR / stufe["skript"]
+    hashes = {d: hash_decl(d, cwd) for d in task["eingaben"]}
+    hashes["__skript__"] = hashlib.sha256(skript.read_bytes() + repr(task["args"]).encode("utf-8")).hexdigest()
+    team = verein(os.environ.get(TEAM_VARIABLE) or STANDARD)
+    if team != STANDARD:  # Standard ohne Eintrag: bestehende Zustände bleiben gültig
+        hashes["__team__"] = team
+    return hashes
+
+
+def changed_inputs(stufe: dict, task: dict, cwd: Path, state: dict) -> list[str]:
+    """Leere Liste = Aufgabe ist aktuell."""
+    alt = state.get(task["key"], {})
+    neu = input_hashes(stufe, task, cwd)
+    geaendert = [d for d, h in neu.items() if alt.get(d) != h]
+    if not geaendert and not outputs_exist(task["ausgaben"], cwd):
+        geaendert = ["(Ausgabe fehlt)"]
+    return geaendert
+
+
+# ---------- Ausführung ----------
+def run_task(stufe: dict, task: dict, cwd: Path, tracer: instr.Tracer, env: dict) -> tuple[int, float]:
+    log = cwd / LOG_DIR / f"{task['key'].replace(':', '__')}.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [sys.executable, str(PROCESS_DIR / stufe["skript"]), *task["args"]]
+    start = time.perf_counter()
+    with tracer.span(stufe["name"], aufgabe=task["key"]), log.open("w", encoding="utf-8") as f:
+        rc = subprocess.run(cmd, cwd=cwd, stdout=f, stderr=subprocess.STDOUT, env=env).returncode
+    if rc != 0:
+        tracer.count(f"pipeline.fehler.{stufe['name']}")
+    return rc, time.perf_counter() - start
+
+
+def load_state(cwd: Path) -> dict:
+    p = cwd / STATE_DATEI
+    return json.loads(p.read_text("utf-8")) if p.is_file() else {}
+
+
+def save_state(cwd: Path, state: dict):
+    (cwd / STATE_DATEI).write_text(json.dumps(state, ensure_ascii=False, indent=2), "utf-8")
+
+
+def dry_run(stufen: list[dict], deps: dict[str, set[str]], cwd: Path, state: dict, erzwingen: set[str]):
+    laeuft = set()
+    for stufe in topo_order(stufen, deps):
+        name = stufe["name"]
+        vorher = sorted(deps[name] & laeuft)
+        if name in erzwingen:
+            print(f"[neu]      {name}: erzwungen")
+            laeuft.add(name)
+            continue
+        if vorher:
+            print(f"[neu?]     {name}: hängt von {', '.join(vorher)} ab")
+            laeuft.add(name)
+            continue
+        tasks = tasks_of(stufe, cwd)
+        offen = {t["key"]: changed_inputs(stufe, t, cwd, state) for t in tasks}
+        offen = {k: v for k, v in offen.items() if v}
+        if not offen:
+            print(f"[aktuell]  {name}")
+            continue
+        laeuft.add(name)
+        if stufe.get("pro_datei"):
+            print(f"[neu]      {name}: {len(offen)} von {len(tasks)} Dateien")
+            for key in list(offen)[:10]:
+                print(f"             {key.split(':', 1)[1]}")
+        else:
+            print(f"[neu]      {name}: geändert: {', '.join(offen[name])}")
+
+
+def run(stufen: list[dict], deps: dict[str, set[str]], cwd: Path, state: dict, erzwingen: set[str], workers: int) -> bool:
+    namen = {s["name"]: s for s in stufen}
+    fertig, fehlgeschlagen = set(), set()
+    offen_tasks = {}     # Stufe → Anzahl laufender Aufgaben
+    futures = {}
+    gesamt_start = time.perf_counter()
+
+    # Skripte schreiben ihre Traces in den Lauf-Ordner, am Ende wird zusammengeführt
+    tracer = instr.Tracer("pipeline")
+    trace_ordner = cwd / instr.TRACE_DIR / tracer.lauf
+    env = {**os.environ, "TRACE_RUN": tracer.lauf, "TRACE_DIR": str(trace_ordner)}
+
+    def starten(pool, stufe):
+        tasks = tasks_of(stufe, cwd)
+        anzahl = 0
+        for task in tasks:
+            if stufe["name"] not in erzwingen and not changed_inputs(stufe, task, cwd, state):
+                continue
+            hashes_vorher = input_hashes(stufe, task, cwd)
+            futures[pool.submit(run_task, stufe, task, cwd, tracer, env)] = (stufe["name"], task, hashes_vorher)
+            anzahl += 1
+        if anzahl == 0:
+            tracer.count("pipeline.uebersprungen")
+            print(f"  übersprungen: {stufe['name']} (aktuell)")
+            fertig.add(stufe["name"])
+        else:
+            print(f"  gestartet:    {stufe['name']} ({anzahl} Aufgabe{'n' if anzahl > 1 else ''})")
+            offen_tasks[stufe["name"]] = anzahl
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        gestartet = set()
+        while True:
+            for name, stufe in namen.items():
+                if name in gestartet or not deps[name] <= fertig:
+                    continue
+                gestartet.add(name)
+                starten(pool, stufe)
+
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, task, hashes = futures.pop(fut)
+                rc, dauer = fut.result()
+                if rc == 0:
+                    state[task["key"]] = hashes
+                    save_state(cwd, state)
+                    print(f"  ok:           {task['key']} ({dauer:.1f}s)")
+                else:
+                    fehlgeschlagen.add(name)
+                    print(f"  FEHLER:       {task['key']} (Exit {rc}, siehe {LOG_DIR}/)")
+                offen_tasks[name] -= 1
+                if offen_tasks[name] == 0 and name not in fehlgeschlagen:
+                    fertig.add(name)
+
+    uebrig = [n for n in namen if n not in fertig and n not in fehlgeschlagen]
+    if uebrig:
+        print(f"Nicht ausgeführt (vorherige Stufe fehlgeschlagen): {', '.join(uebrig)}")
+    print(f"Gesamt: {time.perf_counter() - gesamt_start:.1f}s")
+
+    trace_ordner.mkdir(parents=True, exist_ok=True)
+    ziel = instr.merge_run(trace_ordner, cwd / instr.TRACE_DIR / f"{tracer.lauf}.json", tracer.to_dict())
+    print(f"Trace: {ziel.relative_to(cwd)}")
+    return not fehlgeschlagen
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pipeline 01–08 mit Hash-basiertem Überspringen ausführen.")
+    parser.add_argument("--arbeitsordner", default=ARBEITSORDNER, help="Ordner mit den Daten (Standard: aktueller Ordner)")
+    parser.add_argument("--dry_run", action="store_true", help="Nur anzeigen, was neu berechnet würde")
+    parser.add_argument("--nur", nargs="+", help="Nur diese Stufen berücksichtigen")
+    parser.add_argument("--erzwingen", nargs="+", default=[], help="Diese Stufen unabhängig vom Hash ausführen")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Parallele Aufgaben (Standard: {WORKERS})")
+    parser.add_argument("--team", type=verein, default=None,
+                        help=f"Bezugsverein (Standard: Umgebungsvariable {TEAM_VARIABLE}, sonst {STANDARD})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cwd = Path(args.arbeitsordner).resolve()
+    if args.team:
+        os.environ[TEAM_VARIABLE] = args.team  # erben alle Skripte über run()
+
+    stufen = STUFEN
+    if args.nur:
+        unbekannt = set(args.nur) - {s["name"] for s in STUFEN}
+        if unbekannt:
+            raise SystemExit(f"Unbekannte Stufen: {', '.join(sorted(unbekannt))}")
+        stufen = [s for s in STUFEN if s["name"] in args.nur]
+
+    deps = dependencies(stufen)
+    state = load_state(cwd)
+
+    if args.dry_run:
+        dry_run(stufen, deps, cwd, state, set(args.erzwingen))
+        return
+
+    ok = run(stufen, deps, cwd, state, set(args.erzwingen), args.workers)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Bezugsverein der Pipeline (bisher fest FC Bayern München) und die Vereine der Liga.
+
+Der Bezugsverein kommt aus der Umgebungsvariable BEZUGSVEREIN (gesetzt von
+pipeline.py --team bzw. liga.py), Standard ist FC Bayern München:
+
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from vereine import TEAM, kurzname, namen  # noqa: E402
+
+    TEAM                  # "FC Bayern München"
+    kurzname(TEAM)        # "Bayern"  → [TARGET=Bayern], Beispiele im Prompt
+    namen(TEAM)           # Stichwörter für Kontext/Text ("bayern", "fcb", ...)
+    andere_namen(TEAM)    # Stichwörter aller übrigen Vereine
+
+Die Spaltennamen im Datensatz (ergebnis.bayern, klassifikation.tore_bayern,
+meta.ballbesitz_bayern, sentiment.bayern, ...) bleiben unverändert und
+stehen für den Bezugsverein, damit bestehende Daten und Tabellen gültig bleiben.
+"""
+
+import os
+import re
+
+STANDARD = "FC Bayern München"
+
+# Name wie in meta.gegner → Kurzname, Stichwörter (klein geschrieben)
+VEREINE = {
+    "FC Bayern München": ("Bayern", ["fc bayern", "bayern münchen", "bayern", "münchner", "fcb", "rekordmeister"]),
+    "Bayer 04 Leverkusen": ("Leverkusen", ["leverkusen", "bayer 04", "werkself"]),
+    "Eintracht Frankfurt": ("Frankfurt", ["frankfurt", "eintracht"]),
+    "Borussia Dortmund": ("Dortmund", ["dortmund", "borussia", "bvb"]),
+    "SC Freiburg": ("Freiburg", ["freiburg"]),
+    "1. FSV Mainz 05": ("Mainz", ["mainz"]),
+    "RB Leipzig": ("Leipzig", ["leipzig"]),
+    "SV Werder Bremen": ("Bremen", ["werder", "bremen"]),
+    "VfB Stuttgart": ("Stuttgart", ["stuttgart"]),
+    "Borussia Mönchengladbach": ("Gladbach", ["gladbach", "borussia"]),
+    "VfL Wolfsburg": ("Wolfsburg", ["wolfsburg"]),
+    "FC Augsburg": ("Augsburg", ["augsburg"]),
+    "1. FC Union Berlin": ("Union", ["union"]),
+    "FC St. Pauli": ("St. Pauli", ["pauli"]),
+    "TSG Hoffenheim": ("Hoffenheim", ["hoffenheim"]),
+    "1. FC Heidenheim": ("Heidenheim", ["heidenheim"]),
+    "Holstein Kiel": ("Kiel", ["kiel", "holstein"]),
+    "VfL Bochum": ("Bochum", ["bochum"]),
+    # 2023/24, nicht mehr in der Liga
+    "1. FC Köln": ("Köln", ["köln", "koeln"]),
+    "SV Darmstadt 98": ("Darmstadt", ["darmstadt"]),
+}
+
+# Abweichende Schreibweisen in den Daten
+ALIASE = {"FSV Mainz 05": "1. FSV Mainz 05"}
+
+# Bundesliga 2024/25: Standardumfang von liga.py
+LIGA = list(VEREINE)[:18]
+
+
+def slug(name: str) -> str:
+    """Ordnername: "FC Bayern München" → "fc_bayern_muenchen"."""
+    s = name.lower()
+    for a, b in (("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss")):
+        s = s.replace(a, b)
+    return re.sub(r"[^a-z0-9]+", "_", s).strip("_")
+
+
+def verein(name: str) -> str:
+    """Offizieller Name zu Name, Kurzname, Alias oder Ordnername; ValueError, wenn unbekannt."""
+    name = (name or "").strip()
+    if name in VEREINE:
+        return name
+    if name in ALIASE:
+        return ALIASE[name]
+    for offiziell, (kurz, _) in VEREINE.items():
+        if name.casefold() in (kurz.casefold(), slug(offiziell)):
+            return offiziell
+    raise ValueError(f"Unbekannter Verein '{name}'. Bekannt: {', '.join(VEREINE)}")
+
+
+def kurzname(team: str) -> str:
+    return VEREINE[verein(team)][0]
+
+
+def namen(team: str) -> list[str]:
+    return VEREINE[verein(team)][1]
+
+
+def andere_namen(team: str) -> list[str]:
+    """Stichwörter aller übrigen Vereine (ohne solche, die auch den Bezugsverein bezeichnen)."""
+    eigene = set(namen(team))
+    return list(dict.fromkeys(n for v, (_, ns) in VEREINE.items() if v != verein(team) for n in ns if n not in eigene))
+
+
+# projekteigener Name: ein allgemeines TEAM aus Shell oder CI würde jeden Import brechen
+TEAM_VARIABLE = "BEZUGSVEREIN"
+TEAM = verein(os.getenv(TEAM_VARIABLE) or STANDARD)